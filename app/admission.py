@@ -0,0 +1,267 @@
+# app/admission.py
+"""
+Admission control and backpressure for LLM generation.
+
+Ollama answers a couple of requests at a time; everything beyond that just
+queues inside Ollama and every caller's latency grows until they all time
+out.  This module keeps the queue on OUR side, where it can be bounded and
+ordered:
+
+  • At most ADMISSION_MAX_CONCURRENCY generations run at once.  Further
+    requests wait in a priority queue (lower number = served first, FIFO
+    within a priority).  Priorities come from `QueryMeta.clientId` via
+    ADMISSION_CLIENT_PRIORITIES; unknown clients get ADMISSION_DEFAULT_PRIORITY.
+  • Shedding at the API door, by queue depth.  Admitted requests reserve
+    their place in the queue while they are still retrieving, so the depth
+    counts every admitted request that will not find a free generation slot
+    (a batch holds one place per concurrently answered item), and a request
+    is only admitted if the depth stays within the bound once it is queued:
+      429  once ADMISSION_SHED_QUEUE requests are queued, for requests that
+           are not prioritised (priority ≥ default) — background jobs back off
+           first and interactive clients keep headroom;
+      503  once ADMISSION_MAX_QUEUE requests are queued, for everyone, or
+           when a request has waited ADMISSION_QUEUE_TIMEOUT_S without a slot.
+    Both carry a Retry-After estimated from the queue depth and the recent
+    average generation time.
+  • Queue wait, queue depth, in-flight count and rejections are recorded in
+    app/metrics.py.
+"""
+
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from .config import (
+    ADMISSION_CLIENT_PRIORITIES,
+    ADMISSION_DEFAULT_PRIORITY,
+    ADMISSION_ENABLED,
+    ADMISSION_MAX_CONCURRENCY,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_QUEUE_TIMEOUT_S,
+    ADMISSION_SHED_QUEUE,
+)
+from .metrics import counter, gauge, histogram
+from .timings import record
+
+log = logging.getLogger(__name__)
+
+QUEUE_WAIT = histogram(
+    "rag_admission_wait_seconds", "Time a request waited for a generation slot.", ["priority"]
+)
+QUEUE_DEPTH = gauge("rag_admission_queue_depth", "Requests waiting for a generation slot.")
+IN_FLIGHT = gauge("rag_admission_in_flight", "Generations currently running.")
+REJECTED = counter("rag_admission_rejected_total", "Requests shed by admission control.", ["status"])
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed; carries the HTTP status and Retry-After seconds."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class _Reservation:
+    """Queue places taken at the door, not yet converted into generation slots.
+
+    A batch holds fewer places than it has requests: each place taken by a
+    generation slot is handed back to the batch while requests remain.
+    """
+
+    def __init__(self, count: int, places: int):
+        self.remaining = places  # places held right now
+        self.pending = count     # requests that have not taken a slot yet
+
+
+# Set by `admitted()` in the API handler; copied into the graph's worker threads.
+_reservation: ContextVar[_Reservation | None] = ContextVar("rag_admission_reservation", default=None)
+
+
+def priority_for(client_id: str | None) -> int:
+    """Map a `QueryMeta.clientId` to its admission priority (lower = sooner)."""
+    return ADMISSION_CLIENT_PRIORITIES.get(client_id or "", ADMISSION_DEFAULT_PRIORITY)
+
+
+class AdmissionController:
+    """Bounded, priority-ordered concurrency limiter (thread-based; graph nodes run in threads)."""
+
+    def __init__(
+        self,
+        enabled: bool = ADMISSION_ENABLED,
+        max_concurrency: int = ADMISSION_MAX_CONCURRENCY,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        shed_queue: int = ADMISSION_SHED_QUEUE,
+        queue_timeout_s: float = ADMISSION_QUEUE_TIMEOUT_S,
+        default_priority: int = ADMISSION_DEFAULT_PRIORITY,
+    ):
+        self.enabled = enabled
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self.shed_queue = shed_queue
+        self.queue_timeout_s = queue_timeout_s
+        self.default_priority = default_priority
+
+        self._cond = threading.Condition()
+        self._waiting: list[tuple[int, int]] = []  # heap of (priority, ticket)
+        self._tickets = itertools.count()
+        self._in_flight = 0
+        self._reserved = 0    # admitted at the door, no slot yet (retrieving or queued)
+        self._unreserved = 0  # queued callers that skipped the door (graph run directly)
+        self._avg_service_s = 5.0  # EWMA of generation time, seeds Retry-After
+
+    # ── Door check ───────────────────────────────────────────────────────────
+
+    def _depth(self) -> int:
+        # Requests that are, or will be, waiting: everyone without a slot beyond
+        # the slots that are free right now.  Call with the lock held.
+        free = self.max_concurrency - self._in_flight
+        return max(0, self._reserved + self._unreserved - free)
+
+    def retry_after(self) -> int:
+        """Seconds until a newly queued request would likely get a slot."""
+        backlog = self._depth() + 1
+        return max(1, math.ceil(backlog * self._avg_service_s / self.max_concurrency))
+
+    def admit(self, priority: int, count: int = 1, places: int | None = None) -> _Reservation | None:
+        """Reject *count* requests up front when the queue would grow too deep for
+        their priority, else reserve queue places for them (released by
+        :meth:`release`).  *places* caps the places held at once (default *count*)."""
+        if not self.enabled:
+            return None
+        places = count if places is None else max(1, min(places, count))
+        with self._cond:
+            depth = self._depth()
+            self._reserved += places
+            projected = self._depth()  # depth once these requests are queued
+            self._reserved -= places
+            if projected > self.max_queue:
+                self._reject(503, f"Server overloaded ({depth} requests queued)")
+            if priority >= self.default_priority and projected > self.shed_queue:
+                self._reject(429, f"Too many requests queued ({depth}); retry later")
+            self._reserved += places
+            return _Reservation(count, places)
+
+    def release(self, reservation: _Reservation | None) -> None:
+        """Give back the places of requests that finished without a generation slot."""
+        if reservation is None:
+            return
+        with self._cond:
+            self._reserved -= reservation.remaining
+            reservation.remaining = 0
+            self._cond.notify_all()
+
+    @contextmanager
+    def admitted(self, priority: int, count: int = 1, places: int | None = None):
+        """Door check plus reservation for the requests run inside the block."""
+        reservation = self.admit(priority, count, places)
+        token = _reservation.set(reservation)
+        try:
+            yield
+        finally:
+            _reservation.reset(token)
+            self.release(reservation)
+
+    def _reject(self, status_code: int, detail: str) -> None:
+        REJECTED.inc(status=str(status_code))
+        raise Overloaded(status_code, detail, self.retry_after())
+
+    # ── Slots ────────────────────────────────────────────────────────────────
+
+    @contextmanager
+    def slot(self, priority: int | None = None):
+        """Hold one generation slot for the duration of the block."""
+        if not self.enabled:
+            yield
+            return
+
+        priority = self.default_priority if priority is None else priority
+        entry = (priority, next(self._tickets))
+        reservation = _reservation.get()
+        start = time.perf_counter()
+        with self._cond:
+            reserved = reservation is not None and reservation.remaining > 0
+            if not reserved:
+                # Never checked at the door: bound the queue here instead.
+                self._unreserved += 1
+                if self._depth() > self.max_queue:
+                    self._unreserved -= 1
+                    self._reject(503, f"Server overloaded ({self._depth()} requests queued)")
+            heapq.heappush(self._waiting, entry)
+            QUEUE_DEPTH.set(len(self._waiting))
+            deadline = time.monotonic() + self.queue_timeout_s
+            while self._waiting[0] != entry or self._in_flight >= self.max_concurrency:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+                    if not reserved:
+                        self._unreserved -= 1
+                    QUEUE_DEPTH.set(len(self._waiting))
+                    self._cond.notify_all()
+                    self._reject(503, f"Timed out after {self.queue_timeout_s:.0f}s waiting for a generation slot")
+                self._cond.wait(remaining)
+            heapq.heappop(self._waiting)
+            if reserved:
+                reservation.remaining -= 1
+                reservation.pending -= 1
+                self._reserved -= 1
+            else:
+                self._unreserved -= 1
+            self._in_flight += 1
+            QUEUE_DEPTH.set(len(self._waiting))
+            IN_FLIGHT.set(self._in_flight)
+            self._cond.notify_all()  # the next waiter may also fit
+
+        waited = time.perf_counter() - start
+        QUEUE_WAIT.observe(waited, priority=str(priority))
+        record("queue_wait", waited)
+        if waited > 1.0:
+            log.info("Waited %.2fs for a generation slot (priority %d)", waited, priority)
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._cond:
+                self._in_flight -= 1
+                if reserved and reservation.pending > reservation.remaining:
+                    # Hand the place back to the batch for its next request.
+                    reservation.remaining += 1
+                    self._reserved += 1
+                self._avg_service_s = 0.8 * self._avg_service_s + 0.2 * elapsed
+                IN_FLIGHT.set(self._in_flight)
+                self._cond.notify_all()
+
+    def stats(self) -> dict:
+        """Current queue state plus wait-time summaries per priority."""
+        with self._cond:
+            state = {
+                "enabled": self.enabled,
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self._in_flight,
+                "queue_depth": len(self._waiting),
+                "reserved": self._reserved,
+                "max_queue": self.max_queue,
+                "shed_queue": self.shed_queue,
+                "avg_generation_s": round(self._avg_service_s, 3),
+            }
+        state["rejected"] = {labels[0]: int(n) for labels, n in REJECTED.samples().items()}
+        state["wait_seconds"] = {
+            labels[0]: QUEUE_WAIT.summary(priority=labels[0]) for labels in QUEUE_WAIT.samples()
+        }
+        return state
+
+
+@lru_cache(maxsize=1)
+def get_admission() -> AdmissionController:
+    """Return the process-wide admission controller."""
+    return AdmissionController()
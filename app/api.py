@@ -1,15 +1,30 @@
 # app/api.py
 
-from app.schemas import QueryRequest, QueryResponse, SourceChunk
-from fastapi import FastAPI
+from app.schemas import (
+    BatchQueryRequest, BatchQueryResponse, BatchRetrieveRequest, BatchRetrieveResponse, QueryOptions,
+    QueryRequest, QueryResponse, QueryTimings, RetrievalOptions, RetrieveRequest, RetrieveResponse, SourceChunk,
+)
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
 from langchain_core.messages import HumanMessage, AIMessage
+import asyncio
+import time
 import uuid
-from .graph import graph
+from collections import defaultdict
+from contextlib import asynccontextmanager
+import logging
+from . import clients, metrics, readiness, timings
+from .admission import Overloaded, get_admission, priority_for
+from .graph import get_graph, retrieve_many, search_many
+from . import model_router
 from .models import ContextEntry
 from .config import (
+    BATCH_CONCURRENCY,
     CHROMA_TARGET,
     EMBEDDING_MODEL,
     EMBEDDING_PROVIDER,
+    LLM_ALLOWED_MODELS,
+    LLM_MAX_TOKENS_LIMIT,
     LLM_MODEL,
     LLM_PROVIDER,
     MLFLOW_ENABLED,
@@ -32,13 +47,35 @@ _TAGS = [
 ]
 
 # ── MLflow tracing setup ──────────────────────────────────────────────────────
-if MLFLOW_ENABLED:
+# Runs at startup rather than import: mlflow alone takes most of a second to import.
+def _setup_tracing() -> None:
+    if not MLFLOW_ENABLED:
+        return
     import mlflow
     if MLFLOW_TRACKING_URI:
         mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
     mlflow.set_experiment(MLFLOW_EXPERIMENT_NAME)
     mlflow.langchain.autolog()
 
+log = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    # Tracing, the shared Chroma / provider clients and the compiled graph are
+    # built here (not at import) and the client pools are closed on exit.
+    # A dependency that is down at startup must not stop the process: /ready
+    # reports it, and the clients / graph are built on first use once it is back.
+    _setup_tracing()
+    try:
+        await asyncio.to_thread(clients.startup)
+        await asyncio.to_thread(get_graph)
+    except Exception as exc:
+        log.warning("Startup warm-up failed, continuing lazily: %s", exc)
+    yield
+    clients.shutdown()
+
+
 app = FastAPI(
     title="LangChain RAG API",
     description=(
@@ -58,8 +95,156 @@ app = FastAPI(
     license_info={
         "name": "MIT",
     },
+    lifespan=_lifespan,
 )
 
+REQUESTS = metrics.counter("rag_http_requests_total", "HTTP requests by route and status.", ["method", "route", "status"])
+REQUEST_LATENCY = metrics.histogram("rag_http_request_seconds", "HTTP request latency by route.", ["method", "route"])
+
+
+@app.middleware("http")
+async def _record_request(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template (/query/batch), not raw path, to keep cardinality bounded.
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        REQUEST_LATENCY.observe(time.perf_counter() - start, method=request.method, route=route)
+        REQUESTS.inc(method=request.method, route=route, status=str(status))
+
+
+@app.exception_handler(Overloaded)
+async def _overloaded(request: Request, exc: Overloaded):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _priority(req: QueryRequest) -> int:
+    return priority_for(req.meta.clientId if req.meta else None)
+
+
+def _retrieval_overrides(options: RetrievalOptions | None) -> dict:
+    """Map request-level retrieval options onto RAGRetriever field names."""
+    if options is None:
+        return {}
+    overrides = {
+        "mode": options.mode,
+        "k": options.k,
+        "fetch_k": options.fetchK,
+        "mmr_fetch_k": options.fetchK,
+        "mmr_lambda": options.mmrLambda,
+        "per_source_cap": options.perSourceCap,
+        "score_threshold": options.scoreThreshold,
+        "adaptive": options.adaptiveK,
+        "token_budget": options.tokenBudget,
+    }
+    return {key: value for key, value in overrides.items() if value is not None}
+
+
+def _llm_options(options: QueryOptions | None) -> dict:
+    """Validate request-level generation options and map them onto get_llm() arguments."""
+    options = options or QueryOptions()
+    if options.model and LLM_ALLOWED_MODELS and options.model not in LLM_ALLOWED_MODELS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Model {options.model!r} is not allowed. Choose from: {LLM_ALLOWED_MODELS}",
+        )
+    max_tokens = options.maxTokens
+    if LLM_MAX_TOKENS_LIMIT and (max_tokens is None or max_tokens > LLM_MAX_TOKENS_LIMIT):
+        max_tokens = LLM_MAX_TOKENS_LIMIT
+    overrides = {"model": options.model, "max_tokens": max_tokens, "temperature": options.temperature}
+    return {key: value for key, value in overrides.items() if value is not None}
+
+
+def _source_chunk(entry: ContextEntry) -> SourceChunk:
+    return SourceChunk(
+        content=entry.content or "",
+        metadata={
+            **(entry.metadata or {}),
+            "source": entry.name or "",
+            **({"score": entry.score} if entry.score is not None else {}),
+        },
+    )
+
+
+def _thread_id(req: QueryRequest) -> str:
+    return req.conversation.id if req.conversation and req.conversation.id else str(uuid.uuid4())
+
+
+def _run_query(
+    req: QueryRequest, thread_id: str, llm: dict, retrieved: list[ContextEntry] | None = None
+) -> QueryResponse:
+    """Run the graph for one request with its validated *llm* options (see
+    `_llm_options`); *retrieved* skips the graph's own retrieval."""
+    config = {
+        "configurable": {
+            "thread_id": thread_id,
+            "retrieval": _retrieval_overrides(req.retrieval),
+            "llm": llm,
+            "prefetched": retrieved is not None,
+            "priority": _priority(req),
+        }
+    }
+
+    context_entries = req.context.entries if req.context else []
+
+    with timings.collect() as timed:
+        result = get_graph().invoke(
+            # `queries` is reset so no stage of this turn sees the previous turn's rewrite.
+            {"messages": [HumanMessage(content=req.message)], "context": context_entries,
+             "retrieved": retrieved or [], "queries": []},
+            config=config,
+        )
+
+    # Extract the answer from the last AIMessage in the returned messages
+    answer = ""
+    for m in reversed(result["messages"]):
+        if isinstance(m, AIMessage):
+            answer = m.content
+            break
+
+    sources = [_source_chunk(entry) for entry in result.get("retrieved", [])]
+    breakdown = QueryTimings(**timed.as_dict()) if req.options and req.options.timings else None
+    return QueryResponse(
+        thread_id=thread_id, answer=answer, model=result.get("model"), sources=sources, timings=breakdown
+    )
+
+
+def _grouped(search, texts: list[str], options: list[RetrievalOptions | None]) -> list[list[ContextEntry]]:
+    """Run *search* once per distinct set of retrieval options, keeping input order."""
+    groups: dict[tuple, list[int]] = defaultdict(list)
+    for i, opts in enumerate(options):
+        groups[tuple(sorted(_retrieval_overrides(opts).items()))].append(i)
+
+    results: list[list[ContextEntry]] = [[] for _ in texts]
+    for key, indices in groups.items():
+        for i, entries in zip(indices, search([texts[i] for i in indices], dict(key))):
+            results[i] = entries
+    return results
+
+
+def _prefetch(queries: list[QueryRequest]) -> list[list[ContextEntry]]:
+    """Retrieve for a whole batch of queries ahead of generation."""
+    return _grouped(retrieve_many, [q.message for q in queries], [q.retrieval for q in queries])
+
+
+def _search(requests: list[RetrieveRequest]) -> tuple[list[list[ContextEntry]], float]:
+    t = time.perf_counter()
+    results = _grouped(search_many, [r.query for r in requests], [r.retrieval for r in requests])
+    return results, (time.perf_counter() - t) * 1000
+
+
 # ---------------------------------------------------------------------------
 # Routes
 # ---------------------------------------------------------------------------
@@ -68,13 +253,35 @@ app = FastAPI(
     "/health",
     tags=["system"],
     summary="Health check",
-    description="Returns `{\"status\": \"ok\"}` when the API process is running.",
+    description=(
+        "Liveness: returns `{\"status\": \"ok\"}` when the API process is running. "
+        "Does not check dependencies — use `/ready` for that."
+    ),
     response_description="Service is healthy.",
 )
 async def health():
     return {"status": "ok"}
 
 
+@app.get(
+    "/ready",
+    tags=["system"],
+    summary="Readiness check",
+    description=(
+        "Probes Chroma (heartbeat), the collection (document count), the embedding "
+        "provider (one round trip) and the LLM (model available) concurrently, with "
+        "`READY_PROBE_TIMEOUT_S` per probe. Returns **200** when every check passes "
+        "and **503** otherwise, with per-dependency latency and errors. Results are "
+        "cached for `READY_CACHE_TTL_S` seconds."
+    ),
+    response_description="Overall readiness and per-dependency checks.",
+    responses={503: {"description": "At least one dependency check failed."}},
+)
+async def ready():
+    result = await asyncio.to_thread(readiness.readiness)
+    return JSONResponse(status_code=200 if result["ready"] else 503, content=result)
+
+
 @app.get(
     "/config",
     tags=["system"],
@@ -95,6 +302,52 @@ async def config():
     }
 
 
+@app.get(
+    "/admission",
+    tags=["system"],
+    summary="Admission queue state",
+    description=(
+        "Generation slots in use, queue depth, rejections by status code and "
+        "queue-wait summaries (seconds) per priority."
+    ),
+    response_description="Admission controller statistics.",
+)
+async def admission():
+    return get_admission().stats()
+
+
+@app.get(
+    "/metrics",
+    tags=["system"],
+    summary="Prometheus metrics",
+    description=(
+        "All pipeline metrics in the Prometheus text format: latency histograms for "
+        "embedding, retrieval stages, rerank, prompt build, generation and the "
+        "checkpointer; generation token counts; cache hits / misses; admission and "
+        "embedding-batcher queue depths; node and HTTP error counts. Labelled by "
+        "provider / model where it applies."
+    ),
+    response_class=PlainTextResponse,
+    response_description="Prometheus text exposition format (0.0.4).",
+)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get(
+    "/router",
+    tags=["system"],
+    summary="Model routing statistics",
+    description=(
+        "Fast / strong model names, how many questions each route received and "
+        "generation latency summaries (seconds) per route."
+    ),
+    response_description="Route distribution and latency.",
+)
+async def router():
+    return model_router.stats()
+
+
 @app.post(
     "/query",
     response_model=QueryResponse,
@@ -106,38 +359,101 @@ async def config():
         "for multi-turn dialogue, or pre-retrieved context chunks (`context.entries`) "
         "to inject external documents directly into the prompt.\n\n"
         "The pipeline retrieves relevant chunks from ChromaDB, augments the prompt, "
-        "and returns an answer together with the source chunks used."
+        "and returns an answer together with the source chunks used.\n\n"
+        "With admission control enabled, requests are shed with **429** / **503** "
+        "and a `Retry-After` header when the generation queue is too deep.\n\n"
+        "Set `options.timings` to get a per-stage `timings` block and a "
+        "`Server-Timing` header."
     ),
     response_description="Generated answer and supporting source chunks.",
 )
-async def query(req: QueryRequest):
-    thread_id = req.conversation.id if req.conversation and req.conversation.id else str(uuid.uuid4())
+async def query(req: QueryRequest, response: Response):
+    llm = _llm_options(req.options)
+    # Shed before doing any work; admitted requests hold a queue place until they generate.
+    with get_admission().admitted(_priority(req)):
+        # The graph is synchronous; run it off the event loop so concurrent
+        # requests overlap (and their query embeddings can be batched).
+        result = await asyncio.to_thread(_run_query, req, _thread_id(req), llm)
+    if result.timings:
+        response.headers["Server-Timing"] = timings.server_timing(result.timings.model_dump())
+    return result
 
-    messages = [HumanMessage(content=req.message)]
-    config = {"configurable": {"thread_id": thread_id}}
 
-    context_entries = req.context.entries if req.context else []
+@app.post(
+    "/query/batch",
+    response_model=BatchQueryResponse,
+    tags=["rag"],
+    summary="Ask many questions",
+    description=(
+        "Answer a batch of independent `/query` requests. All questions are embedded "
+        "in one batched call and searched with a single multi-query vector search; "
+        "answers are then generated with bounded concurrency (`BATCH_CONCURRENCY`). "
+        "Results are returned in request order. Requests that share a "
+        "`conversation.id` are answered one after another."
+    ),
+    response_description="One answer (with sources) per request, in order.",
+)
+async def query_batch(batch: BatchQueryRequest):
+    queries = batch.queries
+    # Reject a bad item before any retrieval, generation or checkpoint write.
+    llm = [_llm_options(req.options) for req in queries]
+    thread_ids = [_thread_id(req) for req in queries]
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    thread_locks: dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    # Items are answered BATCH_CONCURRENCY at a time, so the batch never holds
+    # more queue places than that.
+    priority = min(_priority(req) for req in queries)
+    with get_admission().admitted(priority, count=len(queries), places=BATCH_CONCURRENCY):
+        retrieved = await asyncio.to_thread(_prefetch, queries)
+
+        async def answer(i: int) -> QueryResponse:
+            async with thread_locks[thread_ids[i]], semaphore:
+                return await asyncio.to_thread(_run_query, queries[i], thread_ids[i], llm[i], retrieved[i])
 
-    result = graph.invoke(
-        {"messages": messages, "context": context_entries, "retrieved": []},
-        config=config,
+        results = await asyncio.gather(*(answer(i) for i in range(len(queries))))
+    return BatchQueryResponse(results=list(results))
+
+
+@app.post(
+    "/retrieve",
+    response_model=RetrieveResponse,
+    tags=["rag"],
+    summary="Search chunks (no generation)",
+    description=(
+        "Return the ranked chunks the `/query` pipeline would put in the prompt — "
+        "same retriever, retrieval options and rerank stage — without calling the "
+        "LLM. Each chunk carries its score and metadata."
+    ),
+    response_description="Ranked chunks with scores and metadata.",
+)
+async def retrieve(req: RetrieveRequest):
+    results, took_ms = await asyncio.to_thread(_search, [req])
+    return RetrieveResponse(
+        query=req.query,
+        chunks=[_source_chunk(entry) for entry in results[0]],
+        took_ms=round(took_ms, 2),
     )
 
-    # Extract the answer from the last AIMessage in the returned messages
-    answer = ""
-    for m in reversed(result["messages"]):
-        if isinstance(m, AIMessage):
-            answer = m.content
-            break
 
-    sources = [
-        SourceChunk(
-            content=entry.content or "",
-            metadata={
-                "source": entry.name or "",
-                **({"score": entry.score} if entry.score is not None else {}),
-            },
-        )
-        for entry in result.get("retrieved", [])
-    ]
-    return QueryResponse(thread_id=thread_id, answer=answer, sources=sources)
+@app.post(
+    "/retrieve/batch",
+    response_model=BatchRetrieveResponse,
+    tags=["rag"],
+    summary="Search chunks for many queries",
+    description=(
+        "Batched `/retrieve`: all queries are embedded in one call and searched with "
+        "a single multi-query vector search. Results are returned in request order."
+    ),
+    response_description="Ranked chunks per query, in order.",
+)
+async def retrieve_batch(batch: BatchRetrieveRequest):
+    results, took_ms = await asyncio.to_thread(_search, batch.queries)
+    return BatchRetrieveResponse(
+        results=[
+            RetrieveResponse(query=req.query, chunks=[_source_chunk(entry) for entry in entries])
+            for req, entries in zip(batch.queries, results)
+        ],
+        took_ms=round(took_ms, 2),
+    )
@@ -0,0 +1,226 @@
+# app/bm25.py
+"""
+Local BM25 keyword index over the ingested chunks.
+
+Pure embedding search struggles with exact identifiers (`mlflow.log_metric`,
+`QuantumCircuit`, `transpile`).  This module keeps a classic inverted index
+built from the SAME chunks and chunk IDs that live in the Chroma collection,
+so keyword hits can be fused with vector hits by ID (see retriever.py).
+
+Storage
+───────
+  The index is persisted as JSON under LOCAL_INDEX_DIR (one file per
+  collection): chunk ids, texts, metadata, document lengths and per-term
+  postings of (doc index, term frequency).
+
+Speed
+─────
+  On load, every posting is converted into a precomputed BM25 *impact*
+  (idf × saturated tf) stored as NumPy arrays.  A query is then just a handful
+  of vectorised scatter-adds plus an argpartition — well under a millisecond
+  per query for tens of thousands of chunks.
+
+Usage
+─────
+  # Rebuild the index from the current Chroma collection
+  python -m app.bm25
+"""
+
+import json
+import logging
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents import Document
+
+from .config import BM25_INDEX_PATH
+
+log = logging.getLogger(__name__)
+
+# Identifiers keep their dots (mlflow.log_metric) so exact API names match as
+# one token; their parts are indexed too so partial queries still hit.
+_TOKEN_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*|\d+(?:\.\d+)*")
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it of on or "
+    "should so that the this to was what when where which who why will with "
+    "you your".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercase BM25 terms, expanding identifiers into their parts."""
+    tokens: list[str] = []
+    for raw in _TOKEN_RE.findall(text):
+        lowered = raw.lower()
+        if lowered not in _STOPWORDS:
+            tokens.append(lowered)
+        # mlflow.log_metric → mlflow, log_metric, log, metric
+        dotted = [p for p in raw.split(".") if p] if "." in raw else []
+        parts = [p for p in re.split(r"[._]", raw) if p]
+        for part in dict.fromkeys(dotted + (parts if len(parts) > 1 else [])):
+            if part.lower() not in _STOPWORDS:
+                tokens.append(part.lower())
+        for part in parts:
+            camel = _CAMEL_RE.findall(part)
+            if len(camel) > 1:
+                tokens.extend(c.lower() for c in camel if c.lower() not in _STOPWORDS)
+    return tokens
+
+
+class BM25Index:
+    """Inverted-index BM25 (Okapi) over a fixed set of chunks."""
+
+    def __init__(
+        self,
+        ids: list[str],
+        texts: list[str],
+        metadatas: list[dict],
+        doc_lengths: list[int],
+        postings: dict[str, tuple[list[int], list[int]]],
+        k1: float = 1.5,
+        b: float = 0.75,
+    ):
+        self.ids = ids
+        self.texts = texts
+        self.metadatas = metadatas
+        self.doc_lengths = doc_lengths
+        self.postings = postings
+        self.k1 = k1
+        self.b = b
+        self._impacts = self._compute_impacts()
+
+    # ── Build / persist ──────────────────────────────────────────────────────
+
+    @classmethod
+    def build(
+        cls,
+        ids: list[str],
+        texts: list[str],
+        metadatas: list[dict] | None = None,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ) -> "BM25Index":
+        postings: dict[str, tuple[list[int], list[int]]] = {}
+        doc_lengths: list[int] = []
+        for doc_idx, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                docs, tfs = postings.setdefault(term, ([], []))
+                docs.append(doc_idx)
+                tfs.append(tf)
+        return cls(ids, texts, metadatas or [{} for _ in ids], doc_lengths, postings, k1, b)
+
+    def save(self, path: str | Path = BM25_INDEX_PATH) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "k1": self.k1,
+            "b": self.b,
+            "ids": self.ids,
+            "texts": self.texts,
+            "metadatas": self.metadatas,
+            "doc_lengths": self.doc_lengths,
+            "postings": {term: [docs, tfs] for term, (docs, tfs) in self.postings.items()},
+        }
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps(payload), encoding="utf-8")
+        tmp.replace(path)  # atomic swap so readers never see a half-written file
+
+    @classmethod
+    def load(cls, path: str | Path = BM25_INDEX_PATH) -> "BM25Index":
+        payload = json.loads(Path(path).read_text(encoding="utf-8"))
+        postings = {term: (pair[0], pair[1]) for term, pair in payload["postings"].items()}
+        return cls(
+            payload["ids"], payload["texts"], payload["metadatas"],
+            payload["doc_lengths"], postings, payload["k1"], payload["b"],
+        )
+
+    # ── Scoring ──────────────────────────────────────────────────────────────
+
+    def _compute_impacts(self) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+        n_docs = len(self.doc_lengths)
+        if not n_docs:
+            return {}
+        lengths = np.asarray(self.doc_lengths, dtype=np.float32)
+        norm = self.k1 * (1 - self.b + self.b * lengths / max(lengths.mean(), 1.0))
+        impacts = {}
+        for term, (docs, tfs) in self.postings.items():
+            idx = np.asarray(docs, dtype=np.int32)
+            tf = np.asarray(tfs, dtype=np.float32)
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            impacts[term] = (idx, (idf * tf * (self.k1 + 1) / (tf + norm[idx])).astype(np.float32))
+        return impacts
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query: str, k: int) -> list[tuple[int, float]]:
+        """Return up to *k* ``(doc index, score)`` pairs, best first."""
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for term in set(tokenize(query)):
+            hit = self._impacts.get(term)
+            if hit is not None:
+                idx, impact = hit
+                scores[idx] += impact  # a term's postings hold each doc once
+
+        k = min(k, int(np.count_nonzero(scores)))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def search_documents(self, query: str, k: int) -> list[Document]:
+        """Like :meth:`search` but returns LangChain Documents carrying the chunk id."""
+        return [
+            Document(
+                id=self.ids[i],
+                page_content=self.texts[i],
+                metadata={**self.metadatas[i], "bm25_score": score},
+            )
+            for i, score in self.search(query, k)
+        ]
+
+
+@lru_cache(maxsize=1)
+def _load_cached(path: str, mtime: float) -> BM25Index:
+    log.info("Loading BM25 index from %s", path)
+    return BM25Index.load(path)
+
+
+def get_bm25_index(path: str = BM25_INDEX_PATH) -> BM25Index | None:
+    """Return the persisted index (reloaded when the file changes), or None if missing."""
+    p = Path(path)
+    if not p.exists():
+        return None
+    return _load_cached(str(p), p.stat().st_mtime)
+
+
+def build_bm25_index(path: str = BM25_INDEX_PATH) -> BM25Index:
+    """Build the index from every chunk in the Chroma collection and persist it."""
+    from .vectorstore import get_vectorstore, iter_collection
+
+    ids: list[str] = []
+    texts: list[str] = []
+    metadatas: list[dict] = []
+    for batch in iter_collection(get_vectorstore()._collection, include=["documents", "metadatas"]):
+        ids.extend(batch["ids"])
+        texts.extend(batch["documents"])
+        metadatas.extend(m or {} for m in batch["metadatas"])
+
+    index = BM25Index.build(ids, texts, metadatas)
+    index.save(path)
+    return index
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    built = build_bm25_index()
+    print(f"BM25 index: {len(built):,} chunks, {len(built.postings):,} terms → {BM25_INDEX_PATH}")
@@ -0,0 +1,113 @@
+# app/clients.py
+"""
+Process-wide registry of network clients.
+
+Every `chromadb.HttpClient(...)` runs tenant/database pre-flight requests,
+and every new provider client opens its own connection pool — so building
+them per call pays TCP (and TLS) setup again and leaves sockets cold.  This
+module owns ONE Chroma client and ONE pooled `httpx.Client` per process;
+`get_vectorstore()`, `get_embeddings()` and `get_cached_llm()` reuse them.
+
+Pool sizes, keep-alive and timeouts come from the HTTP_* settings.  The API
+calls `startup()` / `shutdown()` from its FastAPI lifespan, so connections
+are opened before the first request and closed on exit; scripts (ingest,
+benchmarks) simply create clients on first use.
+"""
+
+import logging
+import time
+from functools import lru_cache
+
+import httpx
+
+from .config import (
+    CHROMA_HOST,
+    CHROMA_PORT,
+    CHROMA_SSL,
+    HTTP_CONNECT_TIMEOUT_S,
+    HTTP_KEEPALIVE_S,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE,
+    HTTP_READ_TIMEOUT_S,
+)
+
+log = logging.getLogger(__name__)
+
+
+def http_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_S,
+    )
+
+
+def http_timeout() -> httpx.Timeout:
+    return httpx.Timeout(HTTP_READ_TIMEOUT_S, connect=HTTP_CONNECT_TIMEOUT_S)
+
+
+@lru_cache(maxsize=1)
+def get_http_client() -> httpx.Client:
+    """Shared keep-alive pool for provider SDKs that accept an ``http_client`` (OpenAI)."""
+    return httpx.Client(limits=http_limits(), timeout=http_timeout())
+
+
+@lru_cache(maxsize=1)
+def get_chroma_client():
+    """Return the process-wide Chroma HTTP client."""
+    import chromadb
+    from chromadb.config import Settings
+
+    client = chromadb.HttpClient(
+        host=CHROMA_HOST,
+        port=CHROMA_PORT,
+        ssl=CHROMA_SSL,
+        settings=Settings(
+            chroma_http_keepalive_secs=HTTP_KEEPALIVE_S,
+            chroma_http_max_connections=HTTP_MAX_CONNECTIONS,
+            chroma_http_max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        ),
+    )
+    # Chroma creates its session without a timeout and exposes no setting for it.
+    session = _chroma_session(client)
+    if session is not None:
+        session.timeout = http_timeout()
+    return client
+
+
+def _chroma_session(client) -> httpx.Client | None:
+    return getattr(getattr(client, "_server", None), "_session", None)
+
+
+def startup() -> None:
+    """Open the shared clients before the first request."""
+    from .factory import get_cached_llm
+    from .vectorstore import get_vectorstore
+
+    start = time.perf_counter()
+    get_vectorstore()  # Chroma client + collection lookup + embeddings client
+    get_cached_llm()
+    log.info("Clients ready in %.0f ms", (time.perf_counter() - start) * 1000)
+
+
+def shutdown() -> None:
+    """Close pooled connections and drop the cached clients, along with the
+    graph, retriever and checkpointer built on top of them."""
+    from .factory import _cached_llm, get_embeddings
+    from .graph import get_checkpointer, get_graph, get_graph_retriever
+    from .vectorstore import get_vectorstore
+
+    if get_checkpointer.cache_info().currsize:
+        get_checkpointer().conn.close()
+    if get_chroma_client.cache_info().currsize:
+        session = _chroma_session(get_chroma_client())
+        if session is not None:
+            session.close()
+    if get_http_client.cache_info().currsize:
+        get_http_client().close()
+
+    for cached in (
+        get_graph, get_graph_retriever, get_checkpointer,
+        get_vectorstore, get_embeddings, _cached_llm, get_chroma_client, get_http_client,
+    ):
+        cached.cache_clear()
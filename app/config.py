@@ -24,6 +24,29 @@ def _parse_int(name: str, default: str) -> int:
     except ValueError as exc:
         raise ValueError(f"Invalid {name}={raw!r}. Use an integer.") from exc
 
+
+def _parse_float(name: str, default: str) -> float:
+    raw = os.getenv(name, default).strip()
+    try:
+        return float(raw)
+    except ValueError as exc:
+        raise ValueError(f"Invalid {name}={raw!r}. Use a number.") from exc
+
+
+def _parse_priorities(name: str) -> dict[str, int]:
+    """Parse ``client:priority`` pairs separated by commas."""
+    priorities = {}
+    for item in os.getenv(name, "").split(","):
+        if not item.strip():
+            continue
+        client, _, raw = item.rpartition(":")
+        try:
+            priorities[client.strip()] = int(raw)
+        except ValueError as exc:
+            raise ValueError(f"Invalid {name} entry {item.strip()!r}. Use client:priority.") from exc
+    return priorities
+
+
 # ── Independent provider switches ─────────────────────────────────────────────
 # Set these in .env.  They are fully independent — mix any combination.
 # LLM_PROVIDER       controls which service answers questions.
@@ -52,6 +75,15 @@ CHROMA_HOST: str = os.getenv("CHROMA_HOST", "localhost").strip()
 CHROMA_PORT: int = _parse_int("CHROMA_PORT", "8001")
 CHROMA_SSL: bool = _parse_bool("CHROMA_SSL", "false")
 
+# ── HTTP connection pools (app/clients.py) ───────────────────────────────────
+# Shared by the Chroma client and the provider clients (Ollama, OpenAI).
+# Read timeout is generous because a cold Ollama model can take a while to answer.
+HTTP_MAX_CONNECTIONS: int = _parse_int("HTTP_MAX_CONNECTIONS", "32")
+HTTP_MAX_KEEPALIVE: int = _parse_int("HTTP_MAX_KEEPALIVE", "16")
+HTTP_KEEPALIVE_S: float = _parse_float("HTTP_KEEPALIVE_S", "60")
+HTTP_CONNECT_TIMEOUT_S: float = _parse_float("HTTP_CONNECT_TIMEOUT_S", "5")
+HTTP_READ_TIMEOUT_S: float = _parse_float("HTTP_READ_TIMEOUT_S", "300")
+
 # ── LLM defaults — keyed by LLM_PROVIDER ─────────────────────────────────────
 _LLM_DEFAULTS: dict = {
     "ollama": {
@@ -77,6 +109,12 @@ _LLM_DEFAULTS: dict = {
     },
 }
 
+# How long Ollama keeps the generation model resident after a request
+# (e.g. "30m", "-1" = forever).  A resident model also keeps its KV cache, so
+# follow-up prompts sharing the static prefix skip re-processing it.
+_keep_alive = os.getenv("OLLAMA_KEEP_ALIVE", "30m").strip()
+OLLAMA_KEEP_ALIVE: str | int = int(_keep_alive) if _keep_alive.lstrip("-").isdigit() else _keep_alive
+
 # ── Embedding defaults — keyed by EMBEDDING_PROVIDER ─────────────────────────
 _EMBEDDING_DEFAULTS: dict = {
     "ollama": {
@@ -102,6 +140,42 @@ LLM_MODEL:    str       = _llm["model"]
 LLM_API_KEY:  str | None = _llm["api_key"]
 LLM_BASE_URL: str | None = _llm["base_url"]
 
+# Per-request generation overrides (QueryOptions.model / maxTokens / temperature).
+# LLM_ALLOWED_MODELS restricts which models callers may pick (comma-separated;
+# empty = any).  LLM_MAX_TOKENS_LIMIT caps maxTokens (0 = no cap).  Clients are
+# cached per (provider, model, params), at most LLM_CLIENT_CACHE_SIZE of them.
+LLM_ALLOWED_MODELS:    list[str] = [m.strip() for m in os.getenv("LLM_ALLOWED_MODELS", "").split(",") if m.strip()]
+LLM_MAX_TOKENS_LIMIT:  int = _parse_int("LLM_MAX_TOKENS_LIMIT", "0")
+LLM_CLIENT_CACHE_SIZE: int = _parse_int("LLM_CLIENT_CACHE_SIZE", "16")
+
+# Graph layout: with GRAPH_PARALLEL_ENABLED, LLM warm-up / prompt preparation,
+# vector search and keyword search run as concurrent branches before `fuse`.
+# The warm-up pings Ollama at most once per LLM_WARMUP_INTERVAL_S per model
+# (0 = never).  Both are opt-in.
+GRAPH_PARALLEL_ENABLED: bool  = _parse_bool("GRAPH_PARALLEL_ENABLED", "false")
+LLM_WARMUP_INTERVAL_S:  float = _parse_float("LLM_WARMUP_INTERVAL_S", "0")
+
+# Query rewriting (app/query_rewriter.py): turn follow-ups into a standalone
+# query plus QUERY_REWRITE_PARAPHRASES alternatives, retrieve for all of them
+# and fuse with RRF.  First turns are already standalone and are only
+# rewritten with QUERY_REWRITE_FIRST_TURN.  QUERY_REWRITE_MODEL defaults to
+# LLM_MODEL; rewrites are cached per history state.
+QUERY_REWRITE_ENABLED:          bool = _parse_bool("QUERY_REWRITE_ENABLED", "false")
+QUERY_REWRITE_MODEL:            str  = os.getenv("QUERY_REWRITE_MODEL", "").strip()
+QUERY_REWRITE_PARAPHRASES:      int  = _parse_int("QUERY_REWRITE_PARAPHRASES", "2")
+QUERY_REWRITE_FIRST_TURN:       bool = _parse_bool("QUERY_REWRITE_FIRST_TURN", "false")
+QUERY_REWRITE_HISTORY_MESSAGES: int  = _parse_int("QUERY_REWRITE_HISTORY_MESSAGES", "6")
+QUERY_REWRITE_MAX_TOKENS:       int  = _parse_int("QUERY_REWRITE_MAX_TOKENS", "128")
+QUERY_REWRITE_CACHE_SIZE:       int  = _parse_int("QUERY_REWRITE_CACHE_SIZE", "256")
+
+# Difficulty routing (app/model_router.py): questions scoring below
+# ROUTER_THRESHOLD (0–1) go to ROUTER_FAST_MODEL, the rest to ROUTER_STRONG_MODEL.
+# Both default to LLM_MODEL; an explicit options.model always wins.
+ROUTER_ENABLED:      bool  = _parse_bool("ROUTER_ENABLED", "false")
+ROUTER_FAST_MODEL:   str   = os.getenv("ROUTER_FAST_MODEL", "").strip() or LLM_MODEL
+ROUTER_STRONG_MODEL: str   = os.getenv("ROUTER_STRONG_MODEL", "").strip() or LLM_MODEL
+ROUTER_THRESHOLD:    float = _parse_float("ROUTER_THRESHOLD", "0.5")
+
 # ── Resolved Embedding values ─────────────────────────────────────────────────
 _emb = _EMBEDDING_DEFAULTS[EMBEDDING_PROVIDER]
 EMBEDDING_MODEL:    str       = _emb["model"]
@@ -134,6 +208,31 @@ CONVERSATIONS_DB: str = os.getenv("CONVERSATIONS_DB", "./conversations.db")
 scheme = "https" if CHROMA_SSL else "http"
 CHROMA_TARGET: str = f"{scheme}://{CHROMA_HOST}:{CHROMA_PORT}"
 
+# Local on-disk indexes derived from the Chroma collection (BM25, …).
+# Rebuilt at the end of every ingest; one file per collection.
+LOCAL_INDEX_DIR: str = os.getenv("LOCAL_INDEX_DIR", "./local_index")
+BM25_INDEX_PATH: str = os.path.join(LOCAL_INDEX_DIR, f"bm25_{COLLECTION_NAME}.json")
+
+# In-process read replica of the collection's embeddings (app/local_index.py).
+# When enabled, vector search runs locally and only falls back to Chroma if the
+# replica is missing or out of date.
+LOCAL_INDEX_ENABLED:      bool = _parse_bool("LOCAL_INDEX_ENABLED", "false")
+LOCAL_INDEX_VECTORS_PATH: str  = os.path.join(LOCAL_INDEX_DIR, f"vectors_{COLLECTION_NAME}.npy")
+LOCAL_INDEX_META_PATH:    str  = os.path.join(LOCAL_INDEX_DIR, f"vectors_{COLLECTION_NAME}.json")
+
+# Scan compressed codes instead of float32 vectors, then rescore the best
+# LOCAL_INDEX_RESCORE_K candidates exactly:  none | int8 (4× smaller) |
+# pq (product quantisation, LOCAL_INDEX_PQ_M bytes per vector; needs faiss).
+_VALID_QUANTIZATIONS = ("none", "int8", "pq")
+LOCAL_INDEX_QUANTIZATION: str = os.getenv("LOCAL_INDEX_QUANTIZATION", "none").strip().lower()
+if LOCAL_INDEX_QUANTIZATION not in _VALID_QUANTIZATIONS:
+    raise ValueError(
+        f"Unknown LOCAL_INDEX_QUANTIZATION={LOCAL_INDEX_QUANTIZATION!r}. "
+        f"Choose from: {list(_VALID_QUANTIZATIONS)}"
+    )
+LOCAL_INDEX_RESCORE_K: int = _parse_int("LOCAL_INDEX_RESCORE_K", "50")
+LOCAL_INDEX_PQ_M:      int = _parse_int("LOCAL_INDEX_PQ_M", "96")   # must divide the embedding dim
+
 # ── MLflow tracing ───────────────────────────────────────────────────────────
 # Set MLFLOW_ENABLED=true in .env to activate automatic LangChain tracing.
 # MLFLOW_TRACKING_USERNAME / MLFLOW_TRACKING_PASSWORD are read natively by the
@@ -142,6 +241,17 @@ MLFLOW_ENABLED:         bool = _parse_bool("MLFLOW_ENABLED", "false")
 MLFLOW_TRACKING_URI:    str  = os.getenv("MLFLOW_TRACKING_URI",    "")
 MLFLOW_EXPERIMENT_NAME: str  = os.getenv("MLFLOW_EXPERIMENT_NAME", "langchain-rag")
 
+# ── Evaluation runs (evaluation/ragas) ────────────────────────────────────────
+# RAG calls and judge-metric calls run concurrently; EVAL_JUDGE_RPS > 0 also
+# spaces judge calls to at most that many starts per second (provider rate limits).
+EVAL_RAG_CONCURRENCY:   int   = _parse_int("EVAL_RAG_CONCURRENCY", "4")
+EVAL_JUDGE_CONCURRENCY: int   = _parse_int("EVAL_JUDGE_CONCURRENCY", "8")
+EVAL_JUDGE_RPS:         float = _parse_float("EVAL_JUDGE_RPS", "0")
+# Judge results are cached on disk keyed by (metric, judge model, inputs), so
+# re-runs only re-judge samples whose answers or contexts changed.
+EVAL_JUDGE_CACHE:       bool  = _parse_bool("EVAL_JUDGE_CACHE", "true")
+EVAL_JUDGE_CACHE_PATH:  str   = os.getenv("EVAL_JUDGE_CACHE_PATH", "./evaluation/.judge_cache.db")
+
 # ── Chunking ──────────────────────────────────────────────────────────────────
 # ~500 tokens at ~4 chars/token with ~50-token overlap — standard middle ground.
 # Finer → more precise retrieval but loses surrounding context.
@@ -149,6 +259,82 @@ MLFLOW_EXPERIMENT_NAME: str  = os.getenv("MLFLOW_EXPERIMENT_NAME", "langchain-ra
 CHUNK_SIZE:    int = 2000
 CHUNK_OVERLAP: int = 200
 
+# ── Retrieval ─────────────────────────────────────────────────────────────────
+RETRIEVER_K: int = _parse_int("RETRIEVER_K", "4")   # chunks passed to the LLM
+
+# similarity — pure vector search in Chroma.
+# hybrid     — vector + local BM25 keyword search, fused with reciprocal rank
+#              fusion (RRF).  Each side contributes HYBRID_FETCH_K candidates.
+# mmr        — maximal marginal relevance over MMR_FETCH_K vector candidates,
+#              to avoid near-duplicate chunks from the same file.
+_VALID_RETRIEVER_MODES = ("similarity", "hybrid", "mmr")
+RETRIEVER_MODE: str = os.getenv("RETRIEVER_MODE", "similarity").strip().lower()
+if RETRIEVER_MODE not in _VALID_RETRIEVER_MODES:
+    raise ValueError(f"Unknown RETRIEVER_MODE={RETRIEVER_MODE!r}. Choose from: {list(_VALID_RETRIEVER_MODES)}")
+HYBRID_FETCH_K: int = _parse_int("HYBRID_FETCH_K", "20")
+RRF_K:          int = _parse_int("RRF_K", "60")   # RRF damping constant (60 is the usual default)
+# Drop vector hits whose relevance score (cosine-like, 1 = identical) is below
+# this value.  Empty = keep everything.
+_threshold = os.getenv("RETRIEVER_SCORE_THRESHOLD", "").strip()
+RETRIEVER_SCORE_THRESHOLD: float | None = _parse_float("RETRIEVER_SCORE_THRESHOLD", _threshold) if _threshold else None
+
+# Adaptive k: fetch ADAPTIVE_MAX_K candidates once, then keep chunks (at least
+# ADAPTIVE_MIN_K) while their score stays within ADAPTIVE_MIN_SCORE_RATIO of
+# the top score and the running total stays within ADAPTIVE_TOKEN_BUDGET
+# (~4 chars/token).  Easy questions get fewer chunks, hard ones more.
+ADAPTIVE_K_ENABLED:        bool  = _parse_bool("ADAPTIVE_K_ENABLED", "false")
+ADAPTIVE_MIN_K:            int   = _parse_int("ADAPTIVE_MIN_K", "1")
+ADAPTIVE_MAX_K:            int   = _parse_int("ADAPTIVE_MAX_K", "10")
+ADAPTIVE_MIN_SCORE_RATIO:  float = _parse_float("ADAPTIVE_MIN_SCORE_RATIO", "0.85")
+ADAPTIVE_TOKEN_BUDGET:     int   = _parse_int("ADAPTIVE_TOKEN_BUDGET", "1500")
+
+MMR_FETCH_K:        int   = _parse_int("MMR_FETCH_K", "20")
+MMR_LAMBDA:         float = _parse_float("MMR_LAMBDA", "0.5")    # 1 = relevance only, 0 = diversity only
+MMR_PER_SOURCE_CAP: int   = _parse_int("MMR_PER_SOURCE_CAP", "2") # max chunks per source file (0 = no cap)
+
+# Optional cross-encoder rerank stage: over-fetch RERANK_FETCH_K candidates from
+# the vector store, score each (query, chunk) pair on CPU and keep RERANK_TOP_N.
+RERANK_ENABLED:    bool = _parse_bool("RERANK_ENABLED", "false")
+RERANK_MODEL:      str  = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_FETCH_K:    int  = _parse_int("RERANK_FETCH_K", "40")
+RERANK_TOP_N:      int  = _parse_int("RERANK_TOP_N", "4")
+RERANK_BATCH_SIZE: int  = _parse_int("RERANK_BATCH_SIZE", "16")
+
+# ── Admission control (app/admission.py) ──────────────────────────────────────
+# At most ADMISSION_MAX_CONCURRENCY generations run at once; the rest wait in
+# a priority queue (lower = sooner).  Non-prioritised requests are shed with
+# 429 once ADMISSION_SHED_QUEUE are waiting; everyone gets 503 beyond
+# ADMISSION_MAX_QUEUE or after ADMISSION_QUEUE_TIMEOUT_S in the queue.
+# ADMISSION_CLIENT_PRIORITIES maps QueryMeta.clientId → priority, e.g.
+# "streamlit:0,vscode-ext:0,nightly-faq:2".
+ADMISSION_ENABLED:          bool  = _parse_bool("ADMISSION_ENABLED", "false")
+ADMISSION_MAX_CONCURRENCY:  int   = _parse_int("ADMISSION_MAX_CONCURRENCY", "2")
+ADMISSION_MAX_QUEUE:        int   = _parse_int("ADMISSION_MAX_QUEUE", "32")
+ADMISSION_SHED_QUEUE:       int   = _parse_int("ADMISSION_SHED_QUEUE", "16")
+ADMISSION_QUEUE_TIMEOUT_S:  float = _parse_float("ADMISSION_QUEUE_TIMEOUT_S", "60")
+ADMISSION_DEFAULT_PRIORITY: int   = _parse_int("ADMISSION_DEFAULT_PRIORITY", "1")
+ADMISSION_CLIENT_PRIORITIES: dict[str, int] = _parse_priorities("ADMISSION_CLIENT_PRIORITIES")
+
+# ── Query embedding micro-batching ────────────────────────────────────────────
+# Coalesce concurrent single-query embeddings: wait up to EMBED_BATCH_WAIT_MS
+# for more queries (at most EMBED_BATCH_MAX_SIZE) and embed them in one call.
+EMBED_BATCHING_ENABLED: bool  = _parse_bool("EMBED_BATCHING_ENABLED", "false")
+EMBED_BATCH_MAX_SIZE:   int   = _parse_int("EMBED_BATCH_MAX_SIZE", "32")
+EMBED_BATCH_WAIT_MS:    float = _parse_float("EMBED_BATCH_WAIT_MS", "5")
+
+# ── Batch queries (POST /query/batch) ─────────────────────────────────────────
+# Retrieval for a batch runs as one embedding call + one vector search; answers
+# are then generated with at most BATCH_CONCURRENCY graph runs in flight.
+BATCH_MAX_QUERIES: int = _parse_int("BATCH_MAX_QUERIES", "64")
+BATCH_CONCURRENCY: int = _parse_int("BATCH_CONCURRENCY", "4")
+
+# ── Readiness probes (GET /ready, app/readiness.py) ───────────────────────────
+# Each dependency probe gets READY_PROBE_TIMEOUT_S; results are reused for
+# READY_CACHE_TTL_S so frequent orchestrator polls don't hit Chroma / the LLM.
+READY_CACHE_TTL_S:       float = _parse_float("READY_CACHE_TTL_S", "5")
+READY_PROBE_TIMEOUT_S:   float = _parse_float("READY_PROBE_TIMEOUT_S", "2")
+READY_REQUIRE_DOCUMENTS: bool  = _parse_bool("READY_REQUIRE_DOCUMENTS", "true")
+
 # ── Ingestion ─────────────────────────────────────────────────────────────────
 BATCH_SIZE: int = 25   # chunks per Chroma add_documents call
 DATA_ROOT:   str = os.getenv("DATA_ROOT",   "./refined-content") # Ingestion data path
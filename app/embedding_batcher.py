@@ -0,0 +1,123 @@
+# app/embedding_batcher.py
+"""
+Micro-batching of concurrent query embeddings.
+
+Every `/query` embeds its question with a single-string `embed_query` call —
+one HTTP round trip to the embedding provider per request.  Under concurrent
+load those calls queue up behind each other even though every provider
+accepts a list of texts in one request.
+
+`BatchingEmbeddings` wraps the client returned by `get_embeddings()`.  Each
+`embed_query` call is put on a queue; a background worker takes the first
+waiting query, collects whatever else arrives within EMBED_BATCH_WAIT_MS (up
+to EMBED_BATCH_MAX_SIZE texts), sends them as ONE `embed_documents` call and
+hands each caller its own vector.  A lone request pays at most the wait
+window; under load, N requests cost one round trip instead of N.
+
+`embed_documents` (ingestion, batch endpoints) is passed straight through.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from langchain_core.embeddings import Embeddings
+
+from .config import EMBED_BATCH_MAX_SIZE, EMBED_BATCH_WAIT_MS
+from .metrics import gauge, histogram
+
+log = logging.getLogger(__name__)
+
+QUEUE_DEPTH = gauge("rag_embed_batch_queue_depth", "Query embeddings waiting for the batcher.")
+BATCH_SIZE = histogram(
+    "rag_embed_batch_size", "Queries per batched embedding call.", buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+
+
+class BatchingEmbeddings(Embeddings):
+    """Coalesce concurrent ``embed_query`` calls into batched ``embed_documents`` calls.
+
+    *query_kwargs* are passed to the inner ``embed_documents`` for batched
+    queries (e.g. Gemini's ``task_type="retrieval_query"``), so a batched
+    vector matches what ``embed_query`` would have returned.
+    """
+
+    def __init__(
+        self,
+        inner: Embeddings,
+        max_batch_size: int = EMBED_BATCH_MAX_SIZE,
+        max_wait_ms: float = EMBED_BATCH_WAIT_MS,
+        query_kwargs: dict | None = None,
+    ):
+        self.inner = inner
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.query_kwargs = query_kwargs or {}
+        self._queue: queue.Queue[tuple[str, Future]] = queue.Queue()
+        self._worker: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # Expose the wrapped client's attributes (model, base_url, …).
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    # ── Embeddings interface ─────────────────────────────────────────────────
+
+    def embed_documents(self, texts: list[str], **kwargs) -> list[list[float]]:
+        return self.inner.embed_documents(texts, **kwargs)
+
+    def embed_query(self, text: str) -> list[float]:
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((text, future))
+        QUEUE_DEPTH.set(self._queue.qsize())
+        return future.result()
+
+    # ── Worker ───────────────────────────────────────────────────────────────
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def _collect(self) -> list[tuple[str, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            QUEUE_DEPTH.set(self._queue.qsize())
+            BATCH_SIZE.observe(len(batch))
+            texts = list(dict.fromkeys(text for text, _ in batch))  # identical questions embed once
+            try:
+                if len(texts) == 1:
+                    vectors = [self.inner.embed_query(texts[0])]
+                else:
+                    vectors = self.inner.embed_documents(texts, **self.query_kwargs)
+            except Exception as exc:
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+
+            by_text = dict(zip(texts, vectors))
+            for text, future in batch:
+                future.set_result(by_text[text])
+            if len(batch) > 1:
+                log.debug("Embedded %d queries (%d unique) in one call", len(batch), len(texts))
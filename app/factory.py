@@ -9,43 +9,126 @@ changes here and in config.py.
 LLM and Embedding providers are fully independent — any combination works.
 """
 
+from functools import lru_cache
+
 from .config import (
     JUDGE_LLM_MODEL, JUDGE_PROVIDER, LLM_PROVIDER, LLM_MODEL, LLM_API_KEY, LLM_BASE_URL,
-    EMBEDDING_PROVIDER, EMBEDDING_MODEL, EMBEDDING_API_KEY, EMBEDDING_BASE_URL
+    OLLAMA_KEEP_ALIVE, EMBEDDING_PROVIDER, EMBEDDING_MODEL, EMBEDDING_API_KEY, EMBEDDING_BASE_URL,
+    EMBED_BATCHING_ENABLED, LLM_CLIENT_CACHE_SIZE,
 )
+from .clients import get_http_client, http_limits, http_timeout
+from .metrics import track_cache
+
 
+def get_llm(model: str | None = None, max_tokens: int | None = None, temperature: float | None = None):
+    """Return an LLM instance for the configured LLM_PROVIDER.
 
-def get_llm():
-    """Return an LLM instance for the configured LLM_PROVIDER."""
+    *model* defaults to LLM_MODEL; *max_tokens* caps the answer length and
+    *temperature* overrides the provider default (None = leave unset).
+    """
+    model = model or LLM_MODEL
 
     if LLM_PROVIDER == "ollama":
         from langchain_ollama import OllamaLLM
-        return OllamaLLM(model=LLM_MODEL, base_url=LLM_BASE_URL)
+        return OllamaLLM(
+            model=model,
+            base_url=LLM_BASE_URL,
+            keep_alive=OLLAMA_KEEP_ALIVE,
+            num_predict=max_tokens,
+            temperature=temperature,
+            client_kwargs=_ollama_client_kwargs(),
+        )
 
     if LLM_PROVIDER == "openai":
         from langchain_openai import ChatOpenAI
-        kwargs: dict = {"model": LLM_MODEL, "api_key": LLM_API_KEY}
+        kwargs: dict = {"model": model, "api_key": LLM_API_KEY, "http_client": get_http_client()}
         if LLM_BASE_URL:
             kwargs["base_url"] = LLM_BASE_URL
+        if max_tokens is not None:
+            kwargs["max_tokens"] = max_tokens
+        if temperature is not None:
+            kwargs["temperature"] = temperature
         return ChatOpenAI(**kwargs)
 
     if LLM_PROVIDER == "gemini":
         from langchain_google_genai import ChatGoogleGenerativeAI
-        return ChatGoogleGenerativeAI(model=LLM_MODEL, google_api_key=LLM_API_KEY)
+        kwargs = {"model": model, "google_api_key": LLM_API_KEY}
+        if max_tokens is not None:
+            kwargs["max_output_tokens"] = max_tokens
+        if temperature is not None:
+            kwargs["temperature"] = temperature
+        return ChatGoogleGenerativeAI(**kwargs)
 
     raise ValueError(f"Unsupported LLM_PROVIDER: {LLM_PROVIDER!r}")
 
 
+def _ollama_client_kwargs() -> dict:
+    # The ollama SDK builds its own httpx.Client per instance; give it the shared
+    # pool limits and timeouts (instances themselves are cached, see below).
+    return {"limits": http_limits(), "timeout": http_timeout()}
+
+
+@lru_cache(maxsize=LLM_CLIENT_CACHE_SIZE)
+def _cached_llm(provider: str, model: str, max_tokens: int | None, temperature: float | None):
+    return get_llm(model, max_tokens, temperature)
+
+
+track_cache("llm_client", _cached_llm)
+
+
+def get_cached_llm(model: str | None = None, max_tokens: int | None = None, temperature: float | None = None):
+    """Like :func:`get_llm`, but reuse one client per (provider, model, params).
+
+    Per-request overrides then cost a dict lookup instead of a new client
+    (and a new HTTP connection pool) on every call.
+    """
+    return _cached_llm(LLM_PROVIDER, model or LLM_MODEL, max_tokens, temperature)
+
+
+def warm_llm(model: str | None = None) -> None:
+    """Load *model* ahead of the first generation.
+
+    Only Ollama needs this: an empty prompt loads the model into memory and
+    refreshes its keep_alive timer.  Hosted providers have nothing to load.
+    """
+    if LLM_PROVIDER != "ollama":
+        return
+    _ollama_client().generate(model=model or LLM_MODEL, prompt="", keep_alive=OLLAMA_KEEP_ALIVE)
+
+
+@lru_cache(maxsize=1)
+def _ollama_client():
+    from ollama import Client
+    return Client(host=LLM_BASE_URL, **_ollama_client_kwargs())
+
+
+@lru_cache(maxsize=1)
 def get_embeddings():
-    """Return an Embeddings instance for the configured EMBEDDING_PROVIDER."""
+    """Return the shared Embeddings instance for the configured EMBEDDING_PROVIDER.
+
+    With EMBED_BATCHING_ENABLED, concurrent query embeddings are coalesced
+    into batched calls (see app/embedding_batcher.py).
+    """
+    embeddings = _provider_embeddings()
+    if not EMBED_BATCHING_ENABLED:
+        return embeddings
 
+    from .embedding_batcher import BatchingEmbeddings
+    # Gemini embeds documents and queries with different task types.
+    query_kwargs = {"task_type": "retrieval_query"} if EMBEDDING_PROVIDER == "gemini" else {}
+    return BatchingEmbeddings(embeddings, query_kwargs=query_kwargs)
+
+
+def _provider_embeddings():
     if EMBEDDING_PROVIDER == "ollama":
         from langchain_ollama import OllamaEmbeddings
-        return OllamaEmbeddings(model=EMBEDDING_MODEL, base_url=EMBEDDING_BASE_URL)
+        return OllamaEmbeddings(
+            model=EMBEDDING_MODEL, base_url=EMBEDDING_BASE_URL, client_kwargs=_ollama_client_kwargs()
+        )
 
     if EMBEDDING_PROVIDER == "openai":
         from langchain_openai import OpenAIEmbeddings
-        kwargs: dict = {"model": EMBEDDING_MODEL, "api_key": EMBEDDING_API_KEY}
+        kwargs: dict = {"model": EMBEDDING_MODEL, "api_key": EMBEDDING_API_KEY, "http_client": get_http_client()}
         if EMBEDDING_BASE_URL:
             kwargs["base_url"] = EMBEDDING_BASE_URL
         return OpenAIEmbeddings(**kwargs)
@@ -2,22 +2,34 @@
 
 import logging
 import sqlite3
+import threading
 import time
+from functools import lru_cache
 from typing import Annotated, TypedDict, List
 
 from langchain_core.documents import Document
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
 from langchain_core.output_parsers import StrOutputParser
-from langgraph.graph import StateGraph, END
+from langchain_core.runnables import RunnableConfig
+from langgraph.channels import UntrackedValue
+from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
-from langgraph.checkpoint.sqlite import SqliteSaver
-import mlflow
-from mlflow.entities import SpanType 
 
-from .retriever import get_retriever
-from .config import LLM_PROVIDER, LLM_MODEL, CONVERSATIONS_DB
-from .factory import get_llm
+from .retriever import get_retriever, multi_query_fusion
+from .config import (
+    LLM_PROVIDER, LLM_MODEL, CONVERSATIONS_DB, GRAPH_PARALLEL_ENABLED, LLM_WARMUP_INTERVAL_S,
+    QUERY_REWRITE_ENABLED, QUERY_REWRITE_FIRST_TURN,
+    RERANK_ENABLED, ROUTER_ENABLED, ROUTER_FAST_MODEL, RERANK_FETCH_K, RERANK_MODEL, RERANK_TOP_N, RETRIEVER_K,
+)
+from .admission import Overloaded, get_admission
+from .factory import get_cached_llm, warm_llm
+from .metrics import counter, histogram
+from . import timings
+from .model_router import ROUTE_LATENCY, route_question
 from .models import ContextEntry
+from .reranker import rerank as rerank_entries
+from .query_rewriter import rewrite_query
+from .prompts import build_prompt, estimate_tokens, format_retrieved_context, format_user_context, prefix_messages
 
 logging.basicConfig(
     level=logging.INFO,
@@ -26,10 +38,38 @@ logging.basicConfig(
 )
 log = logging.getLogger(__name__)
 
-# Keep the connection alive for the lifetime of the process.
-# SqliteSaver requires check_same_thread=False for use across async request handlers.
-_db_conn = sqlite3.connect(CONVERSATIONS_DB, check_same_thread=False)
-_checkpointer = SqliteSaver(_db_conn)
+PROMPT_BUILD = histogram("rag_prompt_build_seconds", "Prompt assembly latency.", ["model"])
+GENERATION = histogram("rag_generation_seconds", "LLM generation latency.", ["provider", "model"])
+GENERATION_TOKENS = histogram(
+    "rag_generation_tokens",
+    "Tokens per generation (provider usage when reported, else estimated).",
+    ["provider", "model", "kind"],
+    buckets=(16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384),
+)
+CHECKPOINT = histogram("rag_checkpoint_seconds", "Conversation checkpointer latency.", ["op"])
+ERRORS = counter("rag_errors_total", "Graph node failures.", ["node"])
+
+# Nothing below touches SQLite, Chroma or a provider at import time: the
+# checkpointer, retriever and compiled graph are built on first use (the API
+# builds them at startup), so importing app.api / app.graph stays cheap.
+
+@lru_cache(maxsize=1)
+def get_checkpointer():
+    from langgraph.checkpoint.sqlite import SqliteSaver
+    # Keep the connection alive for the lifetime of the process.
+    # SqliteSaver requires check_same_thread=False for use across async request handlers.
+    saver = SqliteSaver(sqlite3.connect(CONVERSATIONS_DB, check_same_thread=False))
+    # Time the calls the graph makes per run (load state, save state, save writes).
+    for op, stage in (("get_tuple", "checkpoint_load"), ("put", "checkpoint_save"), ("put_writes", "checkpoint_save")):
+        setattr(saver, op, _timed_checkpoint(op, stage, getattr(saver, op)))
+    return saver
+
+
+def _timed_checkpoint(op: str, stage: str, method):
+    def timed(*args, **kwargs):
+        with timings.stage(stage), CHECKPOINT.time(op=op):
+            return method(*args, **kwargs)
+    return timed
 
 class RAGState(TypedDict):
     # --- from API request ---
@@ -37,105 +77,332 @@ class RAGState(TypedDict):
     context:   list[ContextEntry]                          # entries forwarded from the API request
 
     # --- internal graph state ---
+    queries:   list[str]                                   # retrieval queries (standalone + paraphrases) set by `rewrite`
     retrieved: list[ContextEntry]                          # chunks fetched by the retriever
+    # Parallel-branch candidates, only read by `fuse`: untracked, so they are never
+    # written to the thread's checkpoints.
+    vector_docs:  Annotated[list[list[Document]], UntrackedValue(list)]          # vector hits, one list per query
+    keyword_docs: Annotated[list[list[Document]] | None, UntrackedValue(list)]   # BM25 hits (hybrid mode only)
+    route:     str                                         # "fast" | "strong" (set by `route` when ROUTER_ENABLED)
+    model:     str                                         # generation model (picked by `route`, or the default / override)
 
 
-retriever = get_retriever()
-log.info("Using %s LLM: %s", LLM_PROVIDER, LLM_MODEL)
-llm = get_llm() | StrOutputParser()
+@lru_cache(maxsize=1)
+def get_graph_retriever():
+    # With reranking on, over-fetch candidates and let the cross-encoder pick the
+    # best; adaptive-k would trim the candidate pool, so it only applies without it.
+    if RERANK_ENABLED:
+        return get_retriever(k=RERANK_FETCH_K, adaptive=False)
+    return get_retriever(k=RETRIEVER_K)
 
-# @mlflow.trace(span_type=SpanType.RETRIEVER)
-def retrieve(state: RAGState):
+
+_parser = StrOutputParser()
+
+def _latest_query(state: RAGState) -> str:
     # Use the latest HumanMessage as the retrieval query
-    query = next(
+    return next(
         (m.content for m in reversed(state["messages"]) if isinstance(m, HumanMessage)),
         "",
     )
-    t = time.perf_counter()
-    docs = retriever.invoke(query)
-    log.info("Retrieved %d chunks in %.2fs", len(docs), time.perf_counter() - t)
-    retrieved = [
-        ContextEntry(
-            type="snippet",
-            name=doc.metadata.get("source"),
-            content=doc.page_content,
-            source="retriever",
-            score=doc.metadata.get("score"),
-        )
-        for doc in docs
-    ]
-    return {"retrieved": retrieved}
 
-def build_messages(state: RAGState) -> list[BaseMessage]:
-    # Retrieved chunks → string block
-    rag_context = "\n\n".join(
-        e.content for e in state.get("retrieved", []) if e.content
+
+def _retrieval_queries(state: RAGState) -> list[str]:
+    # Queries produced by `rewrite` for this turn, else the latest question.
+    if QUERY_REWRITE_ENABLED and state.get("queries"):
+        return state["queries"]
+    return [_latest_query(state)]
+
+
+def _to_entry(doc: Document) -> ContextEntry:
+    # Parsers store the path under `source_file`; keep every other chunk field
+    # (section, page, symbol, corpus, distance, …) as entry metadata.
+    metadata = {k: v for k, v in doc.metadata.items() if k not in ("score", "source_file")}
+    if doc.id:
+        metadata["chunk_id"] = doc.id
+    return ContextEntry(
+        type="snippet",
+        name=doc.metadata.get("source_file") or doc.metadata.get("source"),
+        content=doc.page_content,
+        source="retriever",
+        score=doc.metadata.get("score"),
+        metadata=metadata,
     )
 
-    # User-provided context entries → string block
-    user_context_parts = []
-    for entry in state.get("context", []):
-        header = f"[{entry.type}]"
-        if entry.name:
-            header += f" {entry.name}"
-        if entry.mimeType:
-            header += f" ({entry.mimeType})"
-        if entry.score is not None:
-            header += f" score={entry.score:.2f}"
-        if entry.content:
-            user_context_parts.append(f"{header}\n{entry.content}")
-    user_context = "\n\n".join(user_context_parts)
-
-    BASE_PROMPT = """You are an AI assistant for an experiment tracking system built around MLflow,
-repurposed to track experiments in quantum software development.
-
-Your role is to help users understand how to use experiment tracking concepts
-and how to apply them using mlflow by using it's sdks in quantum software experiments.
-
-Provide clear, concise answers based on the context provided. But don't mention
-this to the user when you answer. If the context doesn't contain the information
-needed to answer the question, say you don't know."""
-
-    system_parts = [BASE_PROMPT]
-    if user_context:
-        system_parts.append(f"User-provided context:\n{user_context}")
-    if rag_context:
-        system_parts.append(f"Retrieved context:\n{rag_context}")
-
-    system_content = "\n\n".join(system_parts)
-
-    # Gemma models do not support SystemMessage — fold it into a human/ai pair instead
-    if "gemma" in LLM_MODEL.lower():
-        messages: list[BaseMessage] = [
-            HumanMessage(content=system_content),
-            AIMessage(content="Understood."),
-        ]
-    else:
-        messages = [SystemMessage(content=system_content)]
 
-    messages.extend(state["messages"])  # full history: past turns + latest HumanMessage
-    return messages
+def _retrieval_overrides(config: RunnableConfig) -> dict:
+    return dict((config or {}).get("configurable", {}).get("retrieval") or {})
+
+
+def _prefetched(config: RunnableConfig) -> bool:
+    return bool((config or {}).get("configurable", {}).get("prefetched"))
+
+
+def _llm_options(config: RunnableConfig) -> dict:
+    # Per-request overrides: model, max_tokens, temperature (see api._llm_options).
+    return dict((config or {}).get("configurable", {}).get("llm") or {})
+
+
+def _active_retriever(overrides: dict):
+    retriever = get_graph_retriever()
+    overrides = dict(overrides)
+    if RERANK_ENABLED:
+        overrides.pop("k", None)  # keep over-fetching; the rerank node applies k
+        overrides.pop("adaptive", None)
+    return retriever.model_copy(update=overrides) if overrides else retriever
+
+
+def retrieve_many(queries: list[str], overrides: dict | None = None) -> list[list[ContextEntry]]:
+    """Run the `retrieve` step for many queries at once (one embed call, one search).
+
+    Pass each result as the `retrieved` input with ``configurable["prefetched"]``
+    set, and the graph skips its own retrieval for that invocation.
+    """
+    t = time.perf_counter()
+    results = _active_retriever(overrides or {}).retrieve_many(queries)
+    log.info("Retrieved chunks for %d queries in %.2fs", len(queries), time.perf_counter() - t)
+    return [[_to_entry(doc) for doc in docs] for docs in results]
+
+
+# @mlflow.trace(span_type=SpanType.RETRIEVER)
+def retrieve(state: RAGState, config: RunnableConfig):
+    if _prefetched(config):
+        return {}  # chunks were fetched up front (batch endpoint)
+
+    queries = _retrieval_queries(state)
+    active = _active_retriever(_retrieval_overrides(config))
+    t = time.perf_counter()
+    docs = multi_query_fusion(active.retrieve_many(queries), active.rrf_k)
+    log.info("Retrieved %d chunks for %d queries in %.2fs", len(docs), len(queries), time.perf_counter() - t)
+    return {"retrieved": [_to_entry(doc) for doc in docs]}
+
+
+def rewrite(state: RAGState, config: RunnableConfig):
+    *history, _ = state["messages"]
+    question = _latest_query(state)
+    if _prefetched(config):
+        return {"queries": [question]}  # retrieval already ran; later stages still need this turn's query
+    if not history and not QUERY_REWRITE_FIRST_TURN:
+        return {"queries": [question]}  # a first question is already standalone
+    t = time.perf_counter()
+    with timings.stage("rewrite"):
+        queries = rewrite_query(history, question)
+    log.info("Rewrote query into %d queries in %.2fs: %s", len(queries), time.perf_counter() - t, queries[0])
+    return {"queries": queries}
+
 
+# ── Parallel branches ───────────────────────────────────────────────────────
+# `prepare` starts at START; `retrieve_vector` and `retrieve_keyword` start
+# at START (or after `rewrite`).  They run concurrently and `fuse` waits for
+# all three.
 
-def generate(state: RAGState):
-    messages = build_messages(state)
+_warmed_at: dict[str, float] = {}
+_warm_lock = threading.Lock()
+
+
+def prepare(state: RAGState, config: RunnableConfig):
+    # Warm what generation needs while retrieval is in flight: the LLM client,
+    # the static prompt prefix and — for Ollama — the model itself.
+    options = _llm_options(config)
+    model = options.get("model") or (ROUTER_FAST_MODEL if ROUTER_ENABLED else LLM_MODEL)
+    get_cached_llm(model, options.get("max_tokens"), options.get("temperature"))
+    prefix_messages(model)
+
+    if LLM_WARMUP_INTERVAL_S <= 0:
+        return {}
+    with _warm_lock:
+        due = time.monotonic() - _warmed_at.get(model, float("-inf")) >= LLM_WARMUP_INTERVAL_S
+        if due:
+            _warmed_at[model] = time.monotonic()
+    if due:
+        t = time.perf_counter()
+        try:
+            with timings.stage("warmup"):
+                warm_llm(model)
+            log.info("Warmed %s in %.2fs", model, time.perf_counter() - t)
+        except Exception as exc:
+            log.warning("LLM warm-up failed for %s: %s", model, exc)
+    return {}
+
+
+def retrieve_vector(state: RAGState, config: RunnableConfig):
+    if _prefetched(config):
+        return {}
     t = time.perf_counter()
-    answer = llm.invoke(messages)
-    log.info("Generated answer in %.2fs", time.perf_counter() - t)
-    return {"messages": [AIMessage(content=answer)]}
+    hits = _active_retriever(_retrieval_overrides(config)).vector_ranked(_retrieval_queries(state))
+    log.info("Vector search: %d queries in %.2fs", len(hits), time.perf_counter() - t)
+    return {"vector_docs": hits}
+
+
+def retrieve_keyword(state: RAGState, config: RunnableConfig):
+    if _prefetched(config):
+        return {}
+    t = time.perf_counter()
+    hits = _active_retriever(_retrieval_overrides(config)).keyword_ranked(_retrieval_queries(state))
+    if hits is not None:
+        log.info("Keyword search: %d queries in %.2fs", len(hits), time.perf_counter() - t)
+    return {"keyword_docs": hits}
+
+
+def fuse(state: RAGState, config: RunnableConfig):
+    if _prefetched(config):
+        return {}  # chunks were fetched up front (batch endpoint)
+    active = _active_retriever(_retrieval_overrides(config))
+    per_query = active.fuse(state.get("vector_docs") or [[]], state.get("keyword_docs"))
+    docs = multi_query_fusion(per_query, active.rrf_k)
+    return {"retrieved": [_to_entry(doc) for doc in docs]}
+
+
+def rerank(state: RAGState, config: RunnableConfig):
+    candidates = state.get("retrieved", [])
+    top_n = _retrieval_overrides(config).get("k", RERANK_TOP_N)
+    t = time.perf_counter()
+    # `queries` is reset every turn, so an empty list means no rewrite ran this turn.
+    query = (state.get("queries") or [_latest_query(state)])[0]
+    reranked = rerank_entries(query, candidates, top_n=top_n)
+    log.info(
+        "Reranked %d → %d chunks with %s in %.2fs",
+        len(candidates), len(reranked), RERANK_MODEL, time.perf_counter() - t,
+    )
+    return {"retrieved": reranked}
+
+def search_many(queries: list[str], overrides: dict | None = None) -> list[list[ContextEntry]]:
+    """Retrieval without generation: the graph's retriever and rerank stage only."""
+    results = retrieve_many(queries, overrides)
+    if RERANK_ENABLED:
+        top_n = (overrides or {}).get("k", RERANK_TOP_N)
+        results = [rerank_entries(q, entries, top_n=top_n) for q, entries in zip(queries, results)]
+    return results
+
+
+def build_messages(state: RAGState, model: str = LLM_MODEL) -> list[BaseMessage]:
+    # Static prefix first, then history, then the per-request context blocks
+    # (see app/prompts.py for why the ordering matters for prompt caching).
+    return build_prompt(
+        model,
+        state["messages"],  # full history: past turns + latest HumanMessage
+        user_context=format_user_context(state.get("context", [])),
+        rag_context=format_retrieved_context(state.get("retrieved", [])),
+    )
+
+
+def route(state: RAGState, config: RunnableConfig):
+    if _llm_options(config).get("model"):
+        return {}  # the caller picked a model explicitly
+    history_turns = sum(isinstance(m, HumanMessage) for m in state["messages"]) - 1
+    # The router's features assume retriever relevance, not cross-encoder logits.
+    scores = [
+        (e.metadata or {}).get("retrieval_score", e.score) for e in state.get("retrieved", [])
+    ]
+    scores = [score for score in scores if score is not None]
+    decision = route_question(_latest_query(state), history_turns, scores)
+    log.info("Routed to %s model %s (difficulty %.2f)", decision.route, decision.model, decision.difficulty)
+    return {"route": decision.route, "model": decision.model}
+
+
+def generate(state: RAGState, config: RunnableConfig):
+    options = _llm_options(config)
+    routed = ROUTER_ENABLED and not options.get("model")
+    model = options.get("model") or (state.get("model") if routed else None) or LLM_MODEL
+    llm = get_cached_llm(model, options.get("max_tokens"), options.get("temperature"))
+    with timings.stage("prompt_build"), PROMPT_BUILD.time(model=model):
+        messages = build_messages(state, model)
+    priority = (config or {}).get("configurable", {}).get("priority")
+    with get_admission().slot(priority):
+        t = time.perf_counter()
+        output = llm.invoke(messages)
+    elapsed = time.perf_counter() - t
+    answer = _parser.invoke(output)
+    timings.record("generation", elapsed)
+    GENERATION.observe(elapsed, provider=LLM_PROVIDER, model=model)
+    _observe_tokens(model, messages, output, answer)
+    if routed:
+        ROUTE_LATENCY.observe(elapsed, route=state.get("route", "fast"), model=model)
+    log.info("Generated answer with %s in %.2fs", model, elapsed)
+    return {"messages": [AIMessage(content=answer)], "model": model}
+
+
+def _observe_tokens(model: str, messages: list[BaseMessage], output, answer: str) -> None:
+    # Chat models report usage; Ollama's completion LLM returns a bare string.
+    usage = getattr(output, "usage_metadata", None) or {}
+    prompt = usage.get("input_tokens") or sum(estimate_tokens(str(m.content)) for m in messages)
+    completion = usage.get("output_tokens") or estimate_tokens(answer)
+    GENERATION_TOKENS.observe(prompt, provider=LLM_PROVIDER, model=model, kind="prompt")
+    GENERATION_TOKENS.observe(completion, provider=LLM_PROVIDER, model=model, kind="completion")
+    timings.record_tokens(prompt, completion, estimated=not usage)
+
+
+def _counting_errors(name: str, node):
+    # Every node takes (state, config); keep that signature so LangGraph passes config.
+    def run(state: RAGState, config: RunnableConfig):
+        try:
+            return node(state, config)
+        except Overloaded:
+            raise  # load shedding, already counted in rag_admission_rejected_total
+        except Exception:
+            ERRORS.inc(node=name)
+            raise
+    run.__name__ = node.__name__
+    return run
+
+
+def _add_node(builder: StateGraph, name: str, node) -> None:
+    builder.add_node(name, _counting_errors(name, node))
 
 
 def build_graph():
     builder = StateGraph(RAGState)
+    _add_node(builder, "generate", generate)
+
+    # Optional `rewrite` step in front of retrieval.
+    entry = START
+    if QUERY_REWRITE_ENABLED:
+        _add_node(builder, "rewrite", rewrite)
+        builder.add_edge(START, "rewrite")
+        entry = "rewrite"
 
-    builder.add_node("retrieve", retrieve)
-    builder.add_node("generate", generate)
+    if GRAPH_PARALLEL_ENABLED:
+        _add_node(builder, "prepare", prepare)
+        _add_node(builder, "retrieve_vector", retrieve_vector)
+        _add_node(builder, "retrieve_keyword", retrieve_keyword)
+        _add_node(builder, "fuse", fuse)
+        builder.add_edge(START, "prepare")  # warm-up overlaps the rewrite as well
+        builder.add_edge(entry, "retrieve_vector")
+        builder.add_edge(entry, "retrieve_keyword")
+        builder.add_edge(["prepare", "retrieve_vector", "retrieve_keyword"], "fuse")
+        last = "fuse"
+    else:
+        _add_node(builder, "retrieve", retrieve)
+        builder.add_edge(entry, "retrieve")
+        last = "retrieve"
 
-    builder.set_entry_point("retrieve")
-    builder.add_edge("retrieve", "generate")
+    if RERANK_ENABLED:
+        _add_node(builder, "rerank", rerank)
+        builder.add_edge(last, "rerank")
+        last = "rerank"
+    if ROUTER_ENABLED:
+        _add_node(builder, "route", route)
+        builder.add_edge(last, "route")
+        last = "route"
+    builder.add_edge(last, "generate")
     builder.add_edge("generate", END)
 
-    return builder.compile(checkpointer=_checkpointer)
+    return builder.compile(checkpointer=get_checkpointer())
+
+
+@lru_cache(maxsize=1)
+def get_graph():
+    """Return the compiled RAG graph, building it (and its retriever) on first call."""
+    t = time.perf_counter()
+    get_graph_retriever()
+    compiled = build_graph()
+    log.info("Built graph in %.2fs (%s LLM: %s)", time.perf_counter() - t, LLM_PROVIDER, LLM_MODEL)
+    return compiled
 
 
-graph = build_graph()
+def __getattr__(name: str):
+    # `from app.graph import graph` (evaluation scripts) still works; it builds on access.
+    if name == "graph":
+        return get_graph()
+    if name == "retriever":
+        return get_graph_retriever()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
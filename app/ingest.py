@@ -12,6 +12,10 @@ Pipeline summary
   Stage 4 — Embed:   Add chunks to ChromaDB in batches.
                      ChromaDB persists to a local SQLite file (chroma.sqlite3)
                      inside CHROMA_PATH — no external service needed.
+  Stage 5 — Index:   Rebuild the local indexes from the collection (same chunk
+                     IDs): BM25 keyword index when RETRIEVER_MODE=hybrid and
+                     the in-process vector replica when LOCAL_INDEX_ENABLED.
+                     A failure here is logged; the chunks are already in Chroma.
 
 Usage
 ─────
@@ -34,10 +38,13 @@ from tqdm import tqdm
 
 from app.ingest_pipeline.chunker import chunk_documents
 from app.config  import (
-    BATCH_SIZE, CHROMA_TARGET, CHUNK_OVERLAP, CHUNK_SIZE,
+    BATCH_SIZE, BM25_INDEX_PATH, CHROMA_TARGET, CHUNK_OVERLAP, CHUNK_SIZE,
     COLLECTION_NAME, DATA_ROOT, EMBEDDING_MODEL, EMBEDDING_PROVIDER,
+    LOCAL_INDEX_ENABLED, LOCAL_INDEX_QUANTIZATION, LOCAL_INDEX_VECTORS_PATH, RETRIEVER_MODE,
 )
+from app.bm25 import build_bm25_index
 from app.factory import get_embeddings
+from app.local_index import build_local_index
 from app.ingest_pipeline.router  import route_file, walk_data_root
 
 LOG_FILE = "ingest_pipeline.log"
@@ -78,11 +85,11 @@ def ingest() -> None:
 
     # ── Stage 1: Walk ─────────────────────────────────────────────────────────
     all_files = walk_data_root(data_root)
-    print(f"\n[1/4] Discovered {len(all_files):,} files under '{data_root}'")
+    print(f"\n[1/5] Discovered {len(all_files):,} files under '{data_root}'")
     log.info(f"DATA_ROOT={data_root!r}  total_files={len(all_files)}")
 
     # ── Stage 2: Parse ────────────────────────────────────────────────────────
-    print("[2/4] Parsing files (routing by extension) ...")
+    print("[2/5] Parsing files (routing by extension) ...")
     raw_docs = []
     skipped_count = 0
     format_counter: Counter = Counter()
@@ -107,7 +114,7 @@ def ingest() -> None:
         return
 
     # ── Stage 3: Chunk ────────────────────────────────────────────────────────
-    print(f"[3/4] Chunking (size={CHUNK_SIZE} chars, overlap={CHUNK_OVERLAP} chars) ...")
+    print(f"[3/5] Chunking (size={CHUNK_SIZE} chars, overlap={CHUNK_OVERLAP} chars) ...")
     chunks = chunk_documents(raw_docs)
 
     content_type_counter: Counter = Counter(
@@ -147,7 +154,7 @@ def ingest() -> None:
     #     • Each collection can use the best embedding model for its content type
     #       (e.g. nomic-embed-code for code, nomic-embed-text for prose).
 
-    print(f"[4/4] Embedding chunks (this is the slow part) ...")
+    print(f"[4/5] Embedding chunks (this is the slow part) ...")
     log.info(
         f"Starting embedding: provider={EMBEDDING_PROVIDER!r} model={EMBEDDING_MODEL!r} "
         f"collection={COLLECTION_NAME!r} chroma_target={CHROMA_TARGET!r}"
@@ -218,6 +225,35 @@ def ingest() -> None:
             )
             pbar.update(len(batch))
 
+    # ── Stage 5: Local indexes ────────────────────────────────────────────────
+    # Built from the collection rather than `chunks` so the index also covers
+    # chunks from earlier runs and always shares Chroma's IDs.
+    print("[5/5] Rebuilding local indexes ...")
+    t_index = time.time()
+    bm25_count = 0
+    if RETRIEVER_MODE == "hybrid":
+        try:
+            bm25 = build_bm25_index()
+            bm25_count = len(bm25)
+            print(f"    → BM25:    {bm25_count:,} chunks, {len(bm25.postings):,} terms → {BM25_INDEX_PATH}")
+        except Exception as exc:
+            log.exception(f"BM25 index build failed; hybrid retrieval will use vector results only. error={exc!r}")
+            print(f"    ✗ BM25 index build failed ({exc!r}) — run `python -m app.bm25` to retry")
+    else:
+        print("    → BM25:    skipped (RETRIEVER_MODE is not hybrid; `python -m app.bm25` builds it)")
+    replica_count = 0
+    if LOCAL_INDEX_ENABLED:
+        try:
+            replica_count = build_local_index()
+            print(f"    → Vectors: {replica_count:,} chunks ({LOCAL_INDEX_QUANTIZATION}) → {LOCAL_INDEX_VECTORS_PATH}")
+        except Exception as exc:
+            log.exception(f"Local vector replica build failed; retrieval will query Chroma. error={exc!r}")
+            print(f"    ✗ Vector replica build failed ({exc!r}) — run `python -m app.local_index` to retry")
+    else:
+        print("    → Vectors: skipped (LOCAL_INDEX_ENABLED is false; `python -m app.local_index` builds it)")
+    log.info(f"Local indexes rebuilt: bm25={bm25_count} vectors={replica_count} "
+             f"in {time.time() - t_index:.1f}s")
+
     total_time = time.time() - t_start
     summary = (
         f"Ingestion complete: {len(chunks):,} chunks from "
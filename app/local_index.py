@@ -0,0 +1,359 @@
+# app/local_index.py
+"""
+In-process read replica of the Chroma collection for low-latency vector search.
+
+Every Chroma query is an HTTP round trip plus JSON (de)serialisation.  At our
+corpus size a brute-force inner-product scan over a memory-mapped float32
+matrix takes a few milliseconds, so serving retrieval from a local copy
+removes the network hop entirely.
+
+Files (under LOCAL_INDEX_DIR, one set per collection)
+─────────────────────────────────────────────────────
+  vectors_<collection>.npy             — L2-normalised float32 embeddings
+                                         (N × dim), opened with mmap so only
+                                         touched pages load.
+  vectors_<collection>.json            — chunk ids, texts, metadata and a
+                                         manifest (count, dim, build time).
+  vectors_<collection>.int8.npy        — int8 scalar-quantised codes
+  vectors_<collection>.int8_scale.npy    + per-dimension scales.
+  vectors_<collection>.pq.faiss        — FAISS product-quantised index
+                                         (only written when faiss is installed).
+
+Quantisation (LOCAL_INDEX_QUANTIZATION)
+───────────────────────────────────────
+  none — scan the memory-mapped float32 vectors with NumPy (no second copy;
+         the pages live in the OS page cache).  N × dim × 4 bytes scanned.
+  int8 — scan int8 codes (N × dim bytes, 4× smaller), then rescore.
+  pq   — scan PQ codes (N × LOCAL_INDEX_PQ_M bytes, e.g. 96 B per vector),
+         then rescore.
+
+  Quantised scans are approximate, so the best LOCAL_INDEX_RESCORE_K
+  candidates are re-scored exactly against the float32 rows.  The float32
+  file stays memory-mapped: only those few rows are paged in per query.
+  When the quantised files are missing (PQ is skipped without faiss, below
+  256 chunks, or when PQ_M does not divide the dimension) the replica scans
+  the float32 vectors instead, with a single warning.
+
+With LOCAL_INDEX_ENABLED the replica is rebuilt at the end of every ingest
+(see app/ingest.py); otherwise build it with `python -m app.local_index`
+(`--all` also writes the artifacts of every quantisation).  Scores are cosine similarities (higher = more
+relevant).  If the files are missing, or their chunk count no longer matches
+the live collection, callers fall back to querying Chroma.
+"""
+
+import json
+import logging
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents import Document
+
+from .config import (
+    LOCAL_INDEX_META_PATH,
+    LOCAL_INDEX_PQ_M,
+    LOCAL_INDEX_QUANTIZATION,
+    LOCAL_INDEX_RESCORE_K,
+    LOCAL_INDEX_VECTORS_PATH,
+)
+
+log = logging.getLogger(__name__)
+
+_SCAN_BLOCK = 8192  # rows per block when scanning int8 codes (bounds temp memory)
+
+
+def _normalise(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def _sibling(vectors_path: str | Path, suffix: str) -> Path:
+    """vectors_x.npy → vectors_x<suffix>"""
+    path = Path(vectors_path)
+    return path.with_name(path.stem + suffix)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def quantize_int8(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-dimension int8 quantisation → ``(codes, scale)``."""
+    scale = np.abs(vectors).max(axis=0) / 127.0
+    scale[scale == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scale), -127, 127).astype(np.int8)
+    return codes, scale.astype(np.float32)
+
+
+def train_pq(vectors: np.ndarray, m: int = LOCAL_INDEX_PQ_M):
+    """Train a FAISS product quantiser (m sub-vectors × 8 bits) and encode *vectors*."""
+    import faiss
+
+    index = faiss.IndexPQ(vectors.shape[1], m, 8, faiss.METRIC_INNER_PRODUCT)
+    index.train(np.ascontiguousarray(vectors, dtype=np.float32))
+    index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+    return index
+
+
+class LocalVectorIndex:
+    """Cosine search over a memory-mapped embedding matrix, optionally quantised."""
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        ids: list[str],
+        texts: list[str],
+        metadatas: list[dict],
+        quantization: str = "none",
+        int8_codes: np.ndarray | None = None,
+        int8_scale: np.ndarray | None = None,
+        pq_index=None,
+        rescore_k: int = LOCAL_INDEX_RESCORE_K,
+    ):
+        self.vectors = vectors
+        self.ids = ids
+        self.texts = texts
+        self.metadatas = metadatas
+        self.quantization = quantization
+        self.int8_codes = int8_codes
+        self.int8_scale = int8_scale
+        self.pq_index = pq_index
+        self.rescore_k = rescore_k
+
+    # ── Build / persist ──────────────────────────────────────────────────────
+
+    @staticmethod
+    def export(
+        collection,
+        vectors_path: str | Path = LOCAL_INDEX_VECTORS_PATH,
+        meta_path: str | Path = LOCAL_INDEX_META_PATH,
+        pq_m: int = LOCAL_INDEX_PQ_M,
+        quantizations: tuple[str, ...] = ("int8", "pq"),
+    ) -> int:
+        """Copy every embedding of a Chroma *collection* to disk; return the chunk count.
+
+        Writes the float32 matrix plus, for the requested *quantizations*, the
+        int8 codes and — when faiss is installed and the dimension divides
+        into *pq_m* sub-vectors — a trained PQ index.
+        """
+        from .vectorstore import iter_collection
+
+        ids: list[str] = []
+        texts: list[str] = []
+        metadatas: list[dict] = []
+        blocks: list[np.ndarray] = []
+        for batch in iter_collection(collection, include=["embeddings", "documents", "metadatas"]):
+            ids.extend(batch["ids"])
+            texts.extend(batch["documents"])
+            metadatas.extend(m or {} for m in batch["metadatas"])
+            blocks.append(np.asarray(batch["embeddings"], dtype=np.float32))
+
+        vectors = _normalise(np.vstack(blocks)).astype(np.float32) if blocks else np.zeros((0, 0), np.float32)
+
+        vectors_path, meta_path = Path(vectors_path), Path(meta_path)
+        vectors_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write everything to temp files and swap at the end so a running API
+        # never maps a partial file.  The manifest goes last: its mtime is what
+        # readers use to detect a rebuild.
+        staged: list[tuple[Path, Path]] = []
+
+        def stage(final: Path) -> Path:
+            tmp = final.with_name(final.name + ".tmp")
+            staged.append((tmp, final))
+            return tmp
+
+        with open(stage(vectors_path), "wb") as f:
+            np.save(f, vectors)
+
+        if len(vectors) and "int8" in quantizations:
+            codes, scale = quantize_int8(vectors)
+            with open(stage(_sibling(vectors_path, ".int8.npy")), "wb") as f:
+                np.save(f, codes)
+            with open(stage(_sibling(vectors_path, ".int8_scale.npy")), "wb") as f:
+                np.save(f, scale)
+
+        if len(vectors) and "pq" in quantizations:
+            # PQ needs enough training points for 256 centroids per sub-quantiser
+            if vectors.shape[1] % pq_m == 0 and len(vectors) >= 256:
+                try:
+                    import faiss
+                    faiss.write_index(train_pq(vectors, pq_m), str(stage(_sibling(vectors_path, ".pq.faiss"))))
+                except ImportError:
+                    log.info("faiss not installed — skipping PQ export")
+
+        stage(meta_path).write_text(json.dumps({
+            "count": len(ids),
+            "dim": int(vectors.shape[1]) if vectors.size else 0,
+            "built_at": time.time(),
+            "ids": ids,
+            "texts": texts,
+            "metadatas": metadatas,
+        }), encoding="utf-8")
+
+        for tmp, final in staged:
+            tmp.replace(final)
+        return len(ids)
+
+    @classmethod
+    def load(
+        cls,
+        vectors_path: str | Path = LOCAL_INDEX_VECTORS_PATH,
+        meta_path: str | Path = LOCAL_INDEX_META_PATH,
+        quantization: str = LOCAL_INDEX_QUANTIZATION,
+        rescore_k: int = LOCAL_INDEX_RESCORE_K,
+    ) -> "LocalVectorIndex":
+        meta = json.loads(Path(meta_path).read_text(encoding="utf-8"))
+        vectors = np.load(vectors_path, mmap_mode="r")
+        if vectors.shape[0] != meta["count"]:
+            raise ValueError(f"{vectors_path} holds {vectors.shape[0]} vectors, manifest says {meta['count']}")
+
+        kwargs: dict = {}
+        try:
+            if quantization == "int8":
+                kwargs["int8_codes"] = np.load(_sibling(vectors_path, ".int8.npy"))
+                kwargs["int8_scale"] = np.load(_sibling(vectors_path, ".int8_scale.npy"))
+            elif quantization == "pq":
+                import faiss
+                kwargs["pq_index"] = faiss.read_index(str(_sibling(vectors_path, ".pq.faiss")))
+        except (OSError, ImportError, RuntimeError) as exc:
+            # export() skips PQ without faiss, below 256 chunks or when PQ_M does not
+            # divide the dimension; scan the float32 vectors rather than fail.
+            log.warning("No usable %s artifacts for %s (%s) — scanning float32 vectors", quantization, vectors_path, exc)
+            quantization, kwargs = "none", {}
+
+        return cls(
+            vectors, meta["ids"], meta["texts"], meta["metadatas"],
+            quantization=quantization, rescore_k=rescore_k, **kwargs,
+        )
+
+    # ── Search ───────────────────────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def memory_bytes(self) -> int:
+        """Approximate resident size of the structure scanned per query."""
+        if self.quantization == "int8":
+            return self.int8_codes.nbytes + self.int8_scale.nbytes
+        if self.quantization == "pq":
+            return self.pq_index.sa_code_size() * len(self.ids)
+        return len(self.ids) * self.vectors.shape[1] * 4
+
+    def _scan_exact(self, query: np.ndarray, k: int) -> list[tuple[int, float]]:
+        # Straight off the mmap: a FAISS flat index would hold a second copy.
+        sims = self.vectors @ query
+        return [(int(r), float(sims[r])) for r in _top_k(sims, k)]
+
+    def _scan_int8(self, query: np.ndarray, k: int) -> np.ndarray:
+        # codes·(q∘scale) == dequantised vectors·q, without materialising floats
+        weighted = (query * self.int8_scale).astype(np.float32)
+        approx = np.empty(len(self.ids), dtype=np.float32)
+        for start in range(0, len(self.ids), _SCAN_BLOCK):
+            block = self.int8_codes[start : start + _SCAN_BLOCK]
+            approx[start : start + len(block)] = block.astype(np.float32) @ weighted
+        return _top_k(approx, k)
+
+    def _scan_pq(self, query: np.ndarray, k: int) -> np.ndarray:
+        _, rows = self.pq_index.search(query.reshape(1, -1), k)
+        return rows[0][rows[0] >= 0]
+
+    def _rescore(self, query: np.ndarray, candidates: np.ndarray, k: int) -> list[tuple[int, float]]:
+        rows = np.sort(candidates)  # sorted reads are friendlier to the mmap
+        exact = np.asarray(self.vectors[rows], dtype=np.float32) @ query
+        order = np.argsort(-exact)[:k]
+        return [(int(rows[i]), float(exact[i])) for i in order]
+
+    def search(self, query_vector, k: int, rescore_k: int | None = None) -> list[tuple[int, float]]:
+        """Return up to *k* ``(row, cosine similarity)`` pairs, best first."""
+        k = min(k, len(self.ids))
+        if k <= 0:
+            return []
+        query = _normalise(np.asarray(query_vector, dtype=np.float32).reshape(-1))
+
+        if self.quantization == "none":
+            return self._scan_exact(query, k)
+
+        n_candidates = max(k, rescore_k or self.rescore_k)
+        if self.quantization == "int8":
+            candidates = self._scan_int8(query, n_candidates)
+        else:
+            candidates = self._scan_pq(query, n_candidates)
+        return self._rescore(query, candidates, k)
+
+    def document(self, row: int, score: float) -> Document:
+        return Document(
+            id=self.ids[row],
+            page_content=self.texts[row],
+            metadata={
+                **self.metadatas[row],
+                "score": score,
+                "distance": 1.0 - score,
+                "distance_metric": "cosine",
+            },
+        )
+
+    def similarity_search_by_vector(self, query_vector, k: int) -> list[Document]:
+        return [self.document(row, score) for row, score in self.search(query_vector, k)]
+
+
+@lru_cache(maxsize=1)
+def _load_cached(vectors_path: str, meta_path: str, mtime: float) -> LocalVectorIndex | None:
+    # Failures are cached too (per file mtime): a broken replica is reported once,
+    # not re-read and logged on every query.
+    try:
+        index = LocalVectorIndex.load(vectors_path, meta_path)
+    except Exception as exc:
+        log.warning("Local index %s could not be loaded (%s) — using Chroma until it is rebuilt", vectors_path, exc)
+        return None
+
+    from .vectorstore import get_vectorstore
+    live = get_vectorstore()._collection.count()
+    if live != len(index):
+        log.warning(
+            "Local index is stale (%d chunks, collection has %d) — using Chroma until "
+            "it is rebuilt with `python -m app.local_index`", len(index), live,
+        )
+        return None
+    log.info(
+        "Loaded local vector index: %d chunks from %s (quantization=%s, %.1f MB scanned)",
+        len(index), vectors_path, index.quantization, index.memory_bytes() / 1e6,
+    )
+    return index
+
+
+def get_local_index(
+    vectors_path: str = LOCAL_INDEX_VECTORS_PATH,
+    meta_path: str = LOCAL_INDEX_META_PATH,
+) -> LocalVectorIndex | None:
+    """Return the on-disk replica (reloaded when rebuilt), or None if missing / stale."""
+    vp, mp = Path(vectors_path), Path(meta_path)
+    if not (vp.exists() and mp.exists()):
+        return None
+    return _load_cached(str(vp), str(mp), mp.stat().st_mtime)
+
+
+def build_local_index(quantizations: tuple[str, ...] = (LOCAL_INDEX_QUANTIZATION,)) -> int:
+    """Export the live Chroma collection to the local replica; return the chunk count.
+
+    Only the quantised artifacts in *quantizations* are written (by default
+    the configured LOCAL_INDEX_QUANTIZATION's, so PQ is only trained when used).
+    """
+    from .vectorstore import get_vectorstore
+    return LocalVectorIndex.export(get_vectorstore()._collection, quantizations=quantizations)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rebuild the local vector replica.")
+    parser.add_argument("--all", action="store_true",
+                        help="write int8 and PQ artifacts too (for benchmarks.quantization)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    count = build_local_index(("int8", "pq") if args.all else (LOCAL_INDEX_QUANTIZATION,))
+    print(f"Local vector index: {count:,} chunks → {LOCAL_INDEX_VECTORS_PATH}")
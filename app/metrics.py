@@ -0,0 +1,255 @@
+# app/metrics.py
+"""
+Minimal in-process metrics (counters, gauges, histograms with labels).
+
+Kept dependency-free on purpose: the API needs a handful of thread-safe
+measurements (queue depth, wait time, rejections), not a metrics stack.
+Metrics are registered by name once and shared process-wide:
+
+    WAIT = histogram("rag_admission_wait_seconds", "Time spent queued", ["priority"])
+    WAIT.observe(0.12, priority="1")
+    with WAIT.time(priority="1"):
+        ...
+
+`render()` returns every metric in the Prometheus text exposition format
+(served at `GET /metrics`).  Values that live elsewhere — e.g. the hit
+counts of an `lru_cache` — are copied in at scrape time by callbacks
+registered with `on_collect()` / `track_cache()`.
+"""
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_REGISTRY: dict[str, "_Metric"] = {}
+_REGISTRY_LOCK = threading.Lock()
+_COLLECTORS: list = []
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> dict[tuple[str, ...], object]:
+        """Return a copy of the current values keyed by label values."""
+        with self._lock:
+            return dict(self._values)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set(self, value: float, **labels) -> None:
+        """Mirror a count kept elsewhere (only from `on_collect` callbacks)."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class _HistogramValue:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, n_buckets: int):
+        self.counts = [0] * n_buckets  # non-cumulative; last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            hist = self._values.get(key)
+            if hist is None:
+                hist = self._values[key] = _HistogramValue(len(self.buckets) + 1)
+            hist.counts[bisect.bisect_left(self.buckets, value)] += 1
+            hist.sum += value
+            hist.count += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the block in seconds (also when it raises)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def quantile(self, q: float, **labels) -> float | None:
+        """Estimate the *q* quantile (0–1) from the buckets (upper bound of the hit bucket)."""
+        with self._lock:
+            hist = self._values.get(self._key(labels))
+            if hist is None or not hist.count:
+                return None
+            rank, seen = q * hist.count, 0
+            for bound, n in zip(self.buckets + (float("inf"),), hist.counts):
+                seen += n
+                if seen >= rank:
+                    return bound
+        return float("inf")
+
+    def summary(self, **labels) -> dict:
+        """``{count, sum, mean, p50, p95}`` for one label set (empty if never observed)."""
+        with self._lock:
+            hist = self._values.get(self._key(labels))
+            if hist is None or not hist.count:
+                return {"count": 0}
+            count, total = hist.count, hist.sum
+        return {
+            "count": count,
+            "sum": total,
+            "mean": total / count,
+            "p50": self.quantile(0.5, **labels),
+            "p95": self.quantile(0.95, **labels),
+        }
+
+
+def _register(cls, name: str, help: str, labelnames=(), **kwargs):
+    with _REGISTRY_LOCK:
+        metric = _REGISTRY.get(name)
+        if metric is None:
+            metric = _REGISTRY[name] = cls(name, help, tuple(labelnames), **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"Metric {name!r} already registered as {metric.kind}")
+        return metric
+
+
+def counter(name: str, help: str, labelnames=()) -> Counter:
+    return _register(Counter, name, help, labelnames)
+
+
+def gauge(name: str, help: str, labelnames=()) -> Gauge:
+    return _register(Gauge, name, help, labelnames)
+
+
+def histogram(name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+    return _register(Histogram, name, help, labelnames, buckets=buckets)
+
+
+def registered() -> list[_Metric]:
+    """All registered metrics, sorted by name."""
+    with _REGISTRY_LOCK:
+        return [_REGISTRY[name] for name in sorted(_REGISTRY)]
+
+
+# ── Scrape-time collection ───────────────────────────────────────────────────
+
+CACHE_HITS = counter("rag_cache_hits_total", "Cache hits.", ["cache"])
+CACHE_MISSES = counter("rag_cache_misses_total", "Cache misses.", ["cache"])
+CACHE_ENTRIES = gauge("rag_cache_entries", "Entries currently cached.", ["cache"])
+
+
+def on_collect(callback):
+    """Run *callback* before every `render()`; usable as a decorator."""
+    with _REGISTRY_LOCK:
+        _COLLECTORS.append(callback)
+    return callback
+
+
+def track_cache(name: str, cached_fn) -> None:
+    """Export hits / misses / size of a `functools.lru_cache`-wrapped function."""
+    def collect() -> None:
+        info = cached_fn.cache_info()
+        CACHE_HITS.set(info.hits, cache=name)
+        CACHE_MISSES.set(info.misses, cache=name)
+        CACHE_ENTRIES.set(info.currsize, cache=name)
+    on_collect(collect)
+
+
+def record_cache(name: str, hit: bool) -> None:
+    """Count one lookup of a hand-rolled cache."""
+    (CACHE_HITS if hit else CACHE_MISSES).inc(cache=name)
+
+
+# ── Prometheus text format ───────────────────────────────────────────────────
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text exposition format (0.0.4)."""
+    with _REGISTRY_LOCK:
+        collectors = list(_COLLECTORS)
+    for collect in collectors:
+        collect()
+
+    lines = []
+    for metric in registered():
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        with metric._lock:
+            items = sorted(metric._values.items())
+            if isinstance(metric, Histogram):
+                items = [(key, (list(h.counts), h.sum, h.count)) for key, h in items]
+        for key, value in items:
+            if not isinstance(metric, Histogram):
+                lines.append(f"{metric.name}{_labels(metric.labelnames, key)} {_number(value)}")
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, n in zip(metric.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{metric.name}_bucket{_labels(metric.labelnames, key, le)} {cumulative}")
+            lines.append(f"{metric.name}_sum{_labels(metric.labelnames, key)} {_number(total)}")
+            lines.append(f"{metric.name}_count{_labels(metric.labelnames, key)} {count}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,69 @@
+# app/mmr.py
+"""
+Maximal marginal relevance (MMR) selection.
+
+Plain top-k often returns several near-identical chunks from one file.  MMR
+picks chunks greedily, trading relevance to the query against similarity to
+what has already been picked:
+
+    mmr(d) = λ · sim(q, d) − (1 − λ) · max_{s ∈ selected} sim(d, s)
+
+λ = 1 is plain relevance ranking; lower values favour diversity.  An optional
+per-source cap additionally limits how many chunks may come from one file.
+
+Everything is vectorised: one (fetch_k × fetch_k) similarity matrix up front,
+then a running max per candidate — each greedy step is O(fetch_k).
+"""
+
+import numpy as np
+
+
+def mmr_select(
+    query_vector,
+    candidate_vectors,
+    k: int,
+    lambda_mult: float = 0.5,
+    sources: list[str] | None = None,
+    per_source_cap: int = 0,
+) -> list[int]:
+    """Return the indices of up to *k* candidates in MMR order.
+
+    *sources* (one key per candidate) and *per_source_cap* > 0 stop more than
+    that many picks sharing a source.
+    """
+    cands = np.asarray(candidate_vectors, dtype=np.float32)
+    n = len(cands)
+    if n == 0 or k <= 0:
+        return []
+
+    cands = cands / np.maximum(np.linalg.norm(cands, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    relevance = cands @ query
+    pairwise = cands @ cands.T
+    redundancy = np.zeros(n, dtype=np.float32)  # max similarity to anything selected
+    available = np.ones(n, dtype=bool)
+
+    if sources is not None and per_source_cap > 0:
+        _, source_ids = np.unique(np.asarray(sources, dtype=object).astype(str), return_inverse=True)
+        source_counts = np.zeros(source_ids.max() + 1, dtype=np.int32)
+    else:
+        source_ids = None
+
+    selected: list[int] = []
+    while len(selected) < k and available.any():
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, pairwise[best])
+
+        if source_ids is not None:
+            source_counts[source_ids[best]] += 1
+            if source_counts[source_ids[best]] >= per_source_cap:
+                available &= source_ids != source_ids[best]
+
+    return selected
@@ -0,0 +1,102 @@
+# app/model_router.py
+"""
+Difficulty-based routing between a fast and a strong generation model.
+
+Running a large model for every question is too slow; running `tinyllama`
+for every question is too weak for the hard ones.  The graph's `route` node
+scores each question with a cheap, LLM-free classifier and sends easy ones to
+ROUTER_FAST_MODEL and hard ones to ROUTER_STRONG_MODEL.
+
+Features (each scaled to 0–1, higher = harder)
+───────────────────────────────────────────────
+  length     — words in the question (long questions tend to be compound).
+  history    — prior turns in the conversation (follow-ups lean on context).
+  retrieval  — how unsure retrieval is: no chunks, or scores with no clear
+               winner (top chunk barely ahead of the rest).
+  cues       — wording that asks for reasoning rather than lookup: "why",
+               "compare", "difference", "explain", "debug", "implement", …
+
+`difficulty = Σ weight × feature`; at or above ROUTER_THRESHOLD the strong
+model answers.  Route counts and per-route generation latency are recorded
+in app/metrics.py.
+"""
+
+import re
+from dataclasses import dataclass
+
+from .config import ROUTER_FAST_MODEL, ROUTER_STRONG_MODEL, ROUTER_THRESHOLD
+from .metrics import counter, histogram
+
+ROUTES = counter("rag_route_total", "Questions routed to each model.", ["route", "model"])
+ROUTE_LATENCY = histogram(
+    "rag_route_generation_seconds", "Generation latency per route.", ["route", "model"]
+)
+
+_WEIGHTS = {"length": 0.25, "history": 0.15, "retrieval": 0.3, "cues": 0.3}
+
+_CUES = re.compile(
+    r"\b(why|compare|comparison|difference|differences|versus|vs\.?|explain|trade-?offs?|"
+    r"design|architecture|debug|error|fails?|optimi[sz]e|step[- ]by[- ]step|implement|"
+    r"write (?:a|the|some) (?:code|script|function)|best practices?)\b",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    route: str              # "fast" | "strong"
+    model: str
+    difficulty: float
+    features: dict
+
+
+def _retrieval_uncertainty(scores: list[float]) -> float:
+    if not scores:
+        return 1.0
+    top = max(scores)
+    if top <= 0:
+        return 1.0
+    # Relative margin of the best chunk over the weakest one, on the retriever's
+    # cosine-like relevance (the graph passes the pre-rerank score when the
+    # cross-encoder has replaced it).
+    spread = (top - min(scores)) / top
+    return 1.0 - min(spread / 0.3, 1.0)
+
+
+def question_features(question: str, history_turns: int, scores: list[float]) -> dict:
+    return {
+        "length": min(len(question.split()) / 40, 1.0),
+        "history": min(history_turns / 6, 1.0),
+        "retrieval": _retrieval_uncertainty(scores),
+        "cues": 1.0 if _CUES.search(question) else 0.0,
+    }
+
+
+def route_question(
+    question: str,
+    history_turns: int = 0,
+    scores: list[float] | None = None,
+    threshold: float = ROUTER_THRESHOLD,
+) -> RouteDecision:
+    """Pick the fast or strong model for *question*."""
+    features = question_features(question, history_turns, scores or [])
+    difficulty = round(sum(_WEIGHTS[name] * value for name, value in features.items()), 3)
+    if difficulty >= threshold:
+        decision = RouteDecision("strong", ROUTER_STRONG_MODEL, difficulty, features)
+    else:
+        decision = RouteDecision("fast", ROUTER_FAST_MODEL, difficulty, features)
+    ROUTES.inc(route=decision.route, model=decision.model)
+    return decision
+
+
+def stats() -> dict:
+    """Route distribution and per-route generation latency summaries."""
+    return {
+        "threshold": ROUTER_THRESHOLD,
+        "models": {"fast": ROUTER_FAST_MODEL, "strong": ROUTER_STRONG_MODEL},
+        "routes": {labels[0]: int(n) for labels, n in ROUTES.samples().items()},
+        "generation_seconds": {
+            labels[0]: ROUTE_LATENCY.summary(route=labels[0], model=labels[1])
+            for labels in ROUTE_LATENCY.samples()
+        },
+    }
@@ -48,3 +48,11 @@ class ContextEntry(BaseModel):
         description="Origin of this entry, e.g. `\"retriever\"` for ChromaDB results.",
         examples=["retriever"],
     )
+    metadata: dict | None = Field(
+        None,
+        description=(
+            "Extra chunk metadata for retriever entries: `chunk_id`, `distance`, "
+            "`distance_metric`, `section`, `page`, `symbol`, `source_corpus`, …"
+        ),
+        examples=[{"chunk_id": "3f2a…", "distance": 0.26, "distance_metric": "l2", "section": "Guides > Logging"}],
+    )
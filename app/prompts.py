@@ -0,0 +1,118 @@
+# app/prompts.py
+#
+# Prompt construction for the generation step.
+#
+# Layout (stable → volatile)
+# ──────────────────────────
+#   1. Static prefix    — BASE_PROMPT, built once at import.  Byte-identical
+#                         across every request for a given model.
+#   2. History          — prior turns restored by the checkpointer.  Only ever
+#                         appended to, so it extends the cached prefix turn by turn.
+#   3. Variable segment — user-provided context, retrieved context and the
+#                         latest question, folded into the final HumanMessage.
+#
+# Keeping everything that changes per request at the very end lets provider-
+# side prompt caches reuse the longest possible prefix:
+#   • OpenAI / Gemini apply automatic prefix caching to identical leading tokens.
+#   • Ollama reuses the KV cache of the loaded model when the new prompt shares
+#     a prefix with the previous one — provided the model stays resident
+#     (see OLLAMA_KEEP_ALIVE in config.py).
+
+from functools import lru_cache
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+from .metrics import track_cache
+from .models import ContextEntry
+
+BASE_PROMPT = """You are an AI assistant for an experiment tracking system built around MLflow,
+repurposed to track experiments in quantum software development.
+
+Your role is to help users understand how to use experiment tracking concepts
+and how to apply them using mlflow by using it's sdks in quantum software experiments.
+
+Provide clear, concise answers based on the context provided in the latest message.
+But don't mention this to the user when you answer. If the context doesn't contain
+the information needed to answer the question, say you don't know."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token, as assumed for CHUNK_SIZE)."""
+    return (len(text) + 3) // 4
+
+
+def _supports_system_message(model: str) -> bool:
+    # Gemma models do not support SystemMessage
+    return "gemma" not in model.lower()
+
+
+@lru_cache(maxsize=None)
+def _prefix_messages(model: str) -> tuple[BaseMessage, ...]:
+    if _supports_system_message(model):
+        return (SystemMessage(content=BASE_PROMPT),)
+    # Fold the system prompt into a human/ai pair instead
+    return (
+        HumanMessage(content=BASE_PROMPT),
+        AIMessage(content="Understood."),
+    )
+
+
+track_cache("prompt_prefix", _prefix_messages)
+
+
+def prefix_messages(model: str) -> list[BaseMessage]:
+    """Return the static, cacheable prompt prefix for *model*."""
+    return list(_prefix_messages(model))
+
+
+def format_user_context(entries: list[ContextEntry]) -> str:
+    """Render user-provided context entries as a single text block."""
+    parts = []
+    for entry in entries:
+        header = f"[{entry.type}]"
+        if entry.name:
+            header += f" {entry.name}"
+        if entry.mimeType:
+            header += f" ({entry.mimeType})"
+        if entry.score is not None:
+            header += f" score={entry.score:.2f}"
+        if entry.content:
+            parts.append(f"{header}\n{entry.content}")
+    return "\n\n".join(parts)
+
+
+def format_retrieved_context(entries: list[ContextEntry]) -> str:
+    """Render retrieved chunks as a single text block."""
+    return "\n\n".join(e.content for e in entries if e.content)
+
+
+def build_prompt(
+    model: str,
+    history: list[BaseMessage],
+    user_context: str = "",
+    rag_context: str = "",
+) -> list[BaseMessage]:
+    """Assemble ``prefix + history + variable segment`` for one generation call.
+
+    *history* is the full conversation including the latest HumanMessage.
+    Context blocks are attached to that latest turn only, so earlier turns
+    stay byte-identical to what was sent on previous requests.
+    """
+    messages = prefix_messages(model)
+    if not history:
+        return messages
+
+    *past, latest = history
+    messages.extend(past)
+
+    segments = []
+    if user_context:
+        segments.append(f"User-provided context:\n{user_context}")
+    if rag_context:
+        segments.append(f"Retrieved context:\n{rag_context}")
+
+    if segments and isinstance(latest, HumanMessage):
+        segments.append(f"Question:\n{latest.content}")
+        latest = HumanMessage(content="\n\n".join(segments))
+    messages.append(latest)
+    return messages
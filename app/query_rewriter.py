@@ -0,0 +1,122 @@
+# app/query_rewriter.py
+"""
+Standalone-query rewriting and multi-query expansion for follow-up questions.
+
+"How do I log it?" retrieves badly on its own — "it" only makes sense with
+the conversation.  The graph's `rewrite` node asks the LLM for a standalone
+version of the latest question plus QUERY_REWRITE_PARAPHRASES alternative
+phrasings, retrieves for all of them in one batched search and fuses the
+rankings with RRF (see `multi_query_fusion` in retriever.py).
+
+Rewrites are cached per (model, paraphrase count, recent history, question),
+so re-asking from an identical history state — retries, regenerations,
+evaluation reruns — skips the LLM call.
+"""
+
+import logging
+import re
+import threading
+from collections import OrderedDict
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.output_parsers import StrOutputParser
+
+from .config import (
+    LLM_MODEL,
+    QUERY_REWRITE_CACHE_SIZE,
+    QUERY_REWRITE_HISTORY_MESSAGES,
+    QUERY_REWRITE_MAX_TOKENS,
+    QUERY_REWRITE_MODEL,
+    QUERY_REWRITE_PARAPHRASES,
+)
+from .factory import get_cached_llm
+from .metrics import counter, record_cache
+
+log = logging.getLogger(__name__)
+
+REWRITES = counter("rag_query_rewrite_total", "Query rewrites by outcome.", ["result"])
+
+_PROMPT = """Rewrite the user's latest question as a standalone search query for a
+documentation search engine about MLflow experiment tracking and quantum
+software (Qiskit).  Resolve pronouns and references using the conversation.
+Then write {n} alternative phrasings of the same query.
+
+Output one query per line: the standalone query first, then the alternatives.
+No numbering, no explanations.
+
+Conversation:
+{history}
+
+Latest question: {question}"""
+
+_LIST_MARKER = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+_MAX_TURN_CHARS = 500
+
+_cache: "OrderedDict[tuple, tuple[str, ...]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _history_key(history: list[BaseMessage]) -> tuple[tuple[str, str], ...]:
+    window = history[-QUERY_REWRITE_HISTORY_MESSAGES:] if QUERY_REWRITE_HISTORY_MESSAGES > 0 else []
+    return tuple(
+        ("user" if isinstance(m, HumanMessage) else "assistant", str(m.content)[:_MAX_TURN_CHARS])
+        for m in window
+        if isinstance(m, (HumanMessage, AIMessage))
+    )
+
+
+def parse_queries(text: str, question: str, limit: int) -> list[str]:
+    """Clean the LLM's line-per-query output; falls back to *question* if nothing usable."""
+    queries: list[str] = []
+    seen: set[str] = set()
+    for line in text.splitlines():
+        query = _LIST_MARKER.sub("", line).strip().strip('"').strip()
+        if query and query.lower() not in seen:
+            seen.add(query.lower())
+            queries.append(query)
+    return queries[:limit] or [question]
+
+
+def rewrite_query(
+    history: list[BaseMessage],
+    question: str,
+    paraphrases: int = QUERY_REWRITE_PARAPHRASES,
+    model: str | None = None,
+) -> list[str]:
+    """Return ``[standalone query, *paraphrases]`` for *question* given prior *history*.
+
+    *history* excludes the latest question.  On any LLM failure the original
+    question is returned alone, so retrieval never breaks because of a rewrite.
+    """
+    model = model or QUERY_REWRITE_MODEL or LLM_MODEL
+    turns = _history_key(history)
+    key = (model, paraphrases, turns, question)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+    record_cache("query_rewrite", hit=cached is not None)
+    if cached is not None:
+        REWRITES.inc(result="hit")
+        return list(cached)
+
+    prompt = _PROMPT.format(
+        n=paraphrases,
+        history="\n".join(f"{role}: {text}" for role, text in turns) or "(none)",
+        question=question,
+    )
+    try:
+        llm = get_cached_llm(model, QUERY_REWRITE_MAX_TOKENS, 0.0)
+        output = (llm | StrOutputParser()).invoke(prompt)
+    except Exception as exc:
+        REWRITES.inc(result="error")
+        log.warning("Query rewrite failed, using the original question: %s", exc)
+        return [question]
+
+    queries = parse_queries(output, question, limit=1 + paraphrases)
+    REWRITES.inc(result="miss")
+    with _cache_lock:
+        _cache[key] = tuple(queries)
+        while len(_cache) > QUERY_REWRITE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return queries
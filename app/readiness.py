@@ -0,0 +1,167 @@
+# app/readiness.py
+"""
+Dependency probes behind `GET /ready`.
+
+`/health` only says the process is up.  A pod whose Chroma connection is
+dead, whose collection is empty, or whose embedding / LLM endpoint is
+unreachable should not receive traffic, so `/ready` probes each dependency:
+
+  chroma      — Chroma heartbeat.
+  collection  — document count of the collection (0 fails when
+                READY_REQUIRE_DOCUMENTS is on: nothing to retrieve yet).
+  embeddings  — one embedding round trip through the shared client.
+  llm         — the generation model is available: Ollama `show` (plus
+                whether it is already loaded in memory, from `ps`), OpenAI
+                `models.retrieve`.  Gemini is not probed.  The router's and
+                the query rewriter's models are checked too when enabled.
+
+Probes run concurrently, each bounded by READY_PROBE_TIMEOUT_S, and the
+combined result is cached for READY_CACHE_TTL_S — concurrent callers share
+one probe run.  Probe latency is recorded in app/metrics.py.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+from .config import (
+    LLM_API_KEY,
+    LLM_BASE_URL,
+    LLM_MODEL,
+    LLM_PROVIDER,
+    QUERY_REWRITE_ENABLED,
+    QUERY_REWRITE_MODEL,
+    READY_CACHE_TTL_S,
+    READY_PROBE_TIMEOUT_S,
+    READY_REQUIRE_DOCUMENTS,
+    ROUTER_ENABLED,
+    ROUTER_FAST_MODEL,
+    ROUTER_STRONG_MODEL,
+)
+from .metrics import histogram
+
+log = logging.getLogger(__name__)
+
+PROBE_LATENCY = histogram("rag_ready_probe_seconds", "Readiness probe latency.", ["dependency", "ok"])
+
+_lock = threading.Lock()
+_running: dict[str, Future] = {}
+_cached: dict | None = None
+_cached_at = float("-inf")
+
+
+def _probe_chroma() -> dict:
+    from .clients import get_chroma_client
+    get_chroma_client().heartbeat()
+    return {}
+
+
+def _probe_collection() -> dict:
+    from .vectorstore import get_vectorstore
+    count = get_vectorstore()._collection.count()
+    if READY_REQUIRE_DOCUMENTS and count == 0:
+        raise RuntimeError("collection is empty; run the ingest")
+    return {"documents": count}
+
+
+def _probe_embeddings() -> dict:
+    from .factory import get_embeddings
+    return {"dimensions": len(get_embeddings().embed_query("readiness probe"))}
+
+
+def _generation_models() -> list[str]:
+    """Every model a query may be answered or rewritten with, LLM_MODEL first."""
+    models = [LLM_MODEL]
+    if ROUTER_ENABLED:
+        models += [ROUTER_FAST_MODEL, ROUTER_STRONG_MODEL]
+    if QUERY_REWRITE_ENABLED:
+        models.append(QUERY_REWRITE_MODEL or LLM_MODEL)
+    return list(dict.fromkeys(models))
+
+
+def _ollama_name(model: str) -> str:
+    # Ollama reports pulled models with their tag: `tinyllama` is `tinyllama:latest`.
+    return model if ":" in model.rsplit("/", 1)[-1] else f"{model}:latest"
+
+
+def _probe_llm() -> dict:
+    models = _generation_models()
+    if LLM_PROVIDER == "ollama":
+        from .factory import _ollama_client
+        client = _ollama_client()
+        for model in models:
+            client.show(model)  # raises if the model has not been pulled
+        running = {_ollama_name(name) for m in client.ps().models for name in (m.model, m.name) if name}
+        return {"model": LLM_MODEL, "loaded": _ollama_name(LLM_MODEL) in running, "models": models}
+
+    if LLM_PROVIDER == "openai":
+        from openai import OpenAI
+        from .clients import get_http_client
+        client = OpenAI(api_key=LLM_API_KEY, base_url=LLM_BASE_URL or None, http_client=get_http_client(),
+                        timeout=READY_PROBE_TIMEOUT_S, max_retries=0)
+        for model in models:
+            client.models.retrieve(model)
+        return {"model": LLM_MODEL, "models": models}
+
+    return {"model": LLM_MODEL, "probed": False}
+
+
+PROBES = {
+    "chroma": _probe_chroma,
+    "collection": _probe_collection,
+    "embeddings": _probe_embeddings,
+    "llm": _probe_llm,
+}
+
+
+def _timed(name: str, probe) -> dict:
+    start = time.perf_counter()
+    try:
+        result = {"ok": True, **probe()}
+    except Exception as exc:
+        result = {"ok": False, "error": str(exc) or type(exc).__name__}
+    elapsed = time.perf_counter() - start
+    PROBE_LATENCY.observe(elapsed, dependency=name, ok=str(result["ok"]).lower())
+    return {"latency_ms": round(elapsed * 1000, 1), **result}
+
+
+def _start(name: str, probe) -> Future:
+    # A probe stuck on a hung dependency keeps running in its (daemon) thread;
+    # later runs wait on that same probe instead of piling up new threads.
+    future = _running.get(name)
+    if future is None or future.done():
+        future = _running[name] = Future()
+        threading.Thread(
+            target=lambda: future.set_result(_timed(name, probe)), name=f"ready-{name}", daemon=True
+        ).start()
+    return future
+
+
+def run_probes(timeout_s: float = READY_PROBE_TIMEOUT_S) -> dict:
+    """Run every probe concurrently; a probe still running after *timeout_s* fails."""
+    futures = {name: _start(name, probe) for name, probe in PROBES.items()}
+    deadline = time.monotonic() + timeout_s
+    checks = {}
+    for name, future in futures.items():
+        try:
+            checks[name] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except TimeoutError:
+            PROBE_LATENCY.observe(timeout_s, dependency=name, ok="false")
+            checks[name] = {"latency_ms": round(timeout_s * 1000, 1), "ok": False,
+                            "error": f"timed out after {timeout_s:g}s"}
+    ready = all(check["ok"] for check in checks.values())
+    if not ready:
+        failed = {name: check["error"] for name, check in checks.items() if not check["ok"]}
+        log.warning("Not ready: %s", failed)
+    return {"ready": ready, "checks": checks}
+
+
+def readiness() -> dict:
+    """Cached probe results: ``{ready, checks, checked_at, age_s}``."""
+    global _cached, _cached_at
+    with _lock:  # one probe run at a time; waiters reuse its result
+        if _cached is None or time.monotonic() - _cached_at >= READY_CACHE_TTL_S:
+            _cached = {**run_probes(), "checked_at": time.time()}
+            _cached_at = time.monotonic()
+        return {**_cached, "age_s": round(time.monotonic() - _cached_at, 2)}
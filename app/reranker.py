@@ -0,0 +1,66 @@
+# app/reranker.py
+"""
+Cross-encoder reranking for retrieved chunks.
+
+The bi-encoder (embedding) search is fast but coarse; a cross-encoder reads
+the query and chunk together and scores relevance much more precisely.  It is
+too slow to run over the whole collection, so the graph over-fetches
+RERANK_FETCH_K candidates from Chroma and this module keeps the best
+RERANK_TOP_N.
+
+The model is loaded lazily on first use and cached for the process lifetime;
+inference runs on CPU in batches of RERANK_BATCH_SIZE pairs.
+"""
+
+from functools import lru_cache
+
+from .config import RERANK_BATCH_SIZE, RERANK_MODEL, RERANK_TOP_N
+from .metrics import histogram
+from .models import ContextEntry
+from .timings import stage
+
+RERANK_LATENCY = histogram("rag_rerank_seconds", "Cross-encoder rerank latency per query.", ["model"])
+
+
+@lru_cache(maxsize=None)
+def get_cross_encoder(model_name: str = RERANK_MODEL):
+    """Return a cached CPU CrossEncoder (imported lazily — sentence-transformers is heavy)."""
+    from sentence_transformers import CrossEncoder
+    return CrossEncoder(model_name, device="cpu")
+
+
+def score_pairs(query: str, texts: list[str], batch_size: int = RERANK_BATCH_SIZE) -> list[float]:
+    """Score each (query, text) pair with the cross-encoder."""
+    if not texts:
+        return []
+    scores = get_cross_encoder().predict(
+        [(query, text) for text in texts],
+        batch_size=batch_size,
+        show_progress_bar=False,
+    )
+    return [float(s) for s in scores]
+
+
+def rerank(
+    query: str,
+    entries: list[ContextEntry],
+    top_n: int = RERANK_TOP_N,
+    batch_size: int = RERANK_BATCH_SIZE,
+) -> list[ContextEntry]:
+    """Return the *top_n* entries ordered by cross-encoder score.
+
+    The cross-encoder score (an unbounded logit, higher = more relevant)
+    replaces the retriever score on the returned entries; the retriever's
+    relevance is kept as ``metadata["retrieval_score"]``.
+    """
+    candidates = [e for e in entries if e.content]
+    with stage("rerank"), RERANK_LATENCY.time(model=RERANK_MODEL):
+        scores = score_pairs(query, [e.content for e in candidates], batch_size=batch_size)
+    ranked = sorted(zip(scores, candidates), key=lambda pair: pair[0], reverse=True)
+    return [
+        entry.model_copy(update={
+            "score": score,
+            "metadata": {**(entry.metadata or {}), "retrieval_score": entry.score},
+        })
+        for score, entry in ranked[:top_n]
+    ]
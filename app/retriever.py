@@ -1,8 +1,368 @@
 # app/retriever.py
 
-from .vectorstore import get_vectorstore
+import hashlib
+import logging
 
+import numpy as np
 
-def get_retriever():
-    vectorstore = get_vectorstore()
-    return vectorstore.as_retriever(search_kwargs={"k": 4})
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+
+from .bm25 import get_bm25_index
+from .config import (
+    ADAPTIVE_K_ENABLED, ADAPTIVE_MAX_K, ADAPTIVE_MIN_K, ADAPTIVE_MIN_SCORE_RATIO, ADAPTIVE_TOKEN_BUDGET,
+    EMBEDDING_MODEL, EMBEDDING_PROVIDER, HYBRID_FETCH_K, LOCAL_INDEX_ENABLED, MMR_FETCH_K, MMR_LAMBDA, MMR_PER_SOURCE_CAP,
+    RETRIEVER_K, RETRIEVER_MODE, RETRIEVER_SCORE_THRESHOLD, RRF_K,
+)
+from .local_index import get_local_index
+from .metrics import histogram
+from .mmr import mmr_select
+from .prompts import estimate_tokens
+from .timings import stage
+
+log = logging.getLogger(__name__)
+
+EMBED_LATENCY = histogram(
+    "rag_embedding_seconds", "Query embedding latency (one provider call).", ["provider", "model"]
+)
+RETRIEVAL_LATENCY = histogram(
+    "rag_retrieval_seconds", "Retrieval stage latency: vector search, keyword search, fuse.", ["stage", "mode"]
+)
+
+
+def chunk_key(doc: Document) -> str:
+    """Stable identity of a chunk — its Chroma ID, or the ingest-time content hash."""
+    return doc.id or hashlib.md5(doc.page_content.encode("utf-8")).hexdigest()
+
+
+def distance_metric(collection) -> str:
+    """Return the collection's HNSW distance function: ``l2`` (Chroma default), ``cosine`` or ``ip``."""
+    space = (collection.metadata or {}).get("hnsw:space")
+    if not space:
+        config = getattr(collection, "configuration_json", None) or {}
+        space = (config.get("hnsw") or {}).get("space")
+    return space or "l2"
+
+
+def relevance_from_distance(distance: float, metric: str) -> float:
+    """Map a Chroma distance onto a cosine-like relevance score (higher = better).
+
+    Chroma's ``l2`` is the *squared* Euclidean distance, which for unit-length
+    embeddings equals ``2 − 2·cos``; ``cosine`` and ``ip`` distances are
+    ``1 − cos`` / ``1 − dot``.  Either way the result lines up with the cosine
+    scores of the local replica.
+    """
+    if metric == "l2":
+        return 1.0 - distance / 2.0
+    return 1.0 - distance
+
+
+def _with_score(doc: Document, distance: float, metric: str) -> Document:
+    return Document(
+        id=doc.id,
+        page_content=doc.page_content,
+        metadata={
+            **doc.metadata,
+            "score": relevance_from_distance(distance, metric),
+            "distance": distance,
+            "distance_metric": metric,
+        },
+    )
+
+
+def reciprocal_rank_fusion(ranked_lists: list[list[Document]], k: int = RRF_K) -> list[Document]:
+    """Fuse ranked result lists with RRF: ``score(d) = Σ 1 / (k + rank_i(d))``.
+
+    Documents are matched across lists by :func:`chunk_key`; the first copy
+    seen is kept (vector hits first, so their ``distance`` survives).  The
+    fused value only orders the result and is stored as ``rrf_score``;
+    ``score`` stays the best vector relevance among the copies, and is
+    absent for chunks only the keyword side found.
+    """
+    scores: dict[str, float] = {}
+    relevance: dict[str, float] = {}
+    docs: dict[str, Document] = {}
+    for ranked in ranked_lists:
+        for rank, doc in enumerate(ranked, start=1):
+            key = chunk_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            docs.setdefault(key, doc)
+            if doc.metadata.get("score") is not None:
+                score = doc.metadata["score"]
+                relevance[key] = max(relevance.get(key, score), score)
+
+    fused = sorted(scores, key=scores.__getitem__, reverse=True)
+    results = []
+    for key in fused:
+        metadata = {name: value for name, value in docs[key].metadata.items() if name != "score"}
+        if key in relevance:
+            metadata["score"] = relevance[key]
+        metadata["rrf_score"] = scores[key]
+        results.append(Document(id=key, page_content=docs[key].page_content, metadata=metadata))
+    return results
+
+
+def multi_query_fusion(ranked_lists: list[list[Document]], rrf_k: int = RRF_K) -> list[Document]:
+    """Fuse the rankings retrieved for several phrasings of one question.
+
+    Keeps as many chunks as the longest input list, so k / adaptive k decided
+    per phrasing still bounds the prompt.
+    """
+    if len(ranked_lists) == 1:
+        return ranked_lists[0]
+    depth = max((len(ranked) for ranked in ranked_lists), default=0)
+    return reciprocal_rank_fusion(ranked_lists, k=rrf_k)[:depth]
+
+
+def adaptive_cutoff(
+    docs: list[Document],
+    min_k: int = ADAPTIVE_MIN_K,
+    min_score_ratio: float = ADAPTIVE_MIN_SCORE_RATIO,
+    token_budget: int = ADAPTIVE_TOKEN_BUDGET,
+) -> list[Document]:
+    """Trim a ranked, scored list to the chunks worth putting in the prompt.
+
+    Keeps chunks in rank order until one scores below ``min_score_ratio`` ×
+    the top score (a relevance drop-off) or would push the cumulative size
+    past ``token_budget``.  The first ``min_k`` chunks are always kept;
+    unscored chunks (keyword-only hybrid hits) are only bounded by the budget.
+    """
+    if not docs:
+        return docs
+    # After RRF the best-scored chunk need not rank first.
+    scored = [d.metadata["score"] for d in docs if d.metadata.get("score") is not None]
+    top_score = max(scored, default=None)
+    kept: list[Document] = []
+    tokens = 0
+    for doc in docs:
+        doc_tokens = estimate_tokens(doc.page_content)
+        if len(kept) >= min_k:
+            score = doc.metadata.get("score")
+            if top_score and top_score > 0 and score is not None and score < min_score_ratio * top_score:
+                break
+            if tokens + doc_tokens > token_budget:
+                break
+        kept.append(doc)
+        tokens += doc_tokens
+    return kept
+
+
+def embed_queries(vectorstore: VectorStore, queries: list[str]) -> np.ndarray:
+    """Embed *queries* with one provider call → ``(len(queries), dim)`` float32."""
+    embeddings = vectorstore.embeddings
+    with stage("embed"), EMBED_LATENCY.time(provider=EMBEDDING_PROVIDER, model=EMBEDDING_MODEL):
+        if len(queries) == 1:
+            vectors = [embeddings.embed_query(queries[0])]
+        elif EMBEDDING_PROVIDER == "gemini":
+            # Gemini embeds documents and queries with different task types.
+            vectors = embeddings.embed_documents(queries, task_type="retrieval_query")
+        else:
+            vectors = embeddings.embed_documents(queries)
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def search_by_vectors(
+    vectorstore: VectorStore,
+    query_vectors: np.ndarray,
+    k: int,
+    score_threshold: float | None = None,
+    with_vectors: bool = False,
+) -> list[tuple[list[Document], np.ndarray | None]]:
+    """Scored nearest neighbours for several query vectors at once.
+
+    Served from the local replica when enabled, otherwise with a single
+    multi-query ``collection.query`` call (also the fallback when the replica
+    is missing, stale, or fails).  Every returned Document carries ``score``
+    (cosine-like relevance), ``distance`` and ``distance_metric`` next to the
+    chunk metadata stored at ingest; chunks scoring below *score_threshold*
+    are dropped.
+
+    Returns one ``(docs, doc_vectors)`` pair per query.  ``doc_vectors`` (the
+    candidates' embeddings, needed by MMR) is None unless *with_vectors* is set.
+    """
+    if LOCAL_INDEX_ENABLED:
+        try:
+            index = get_local_index()
+            if index is not None:
+                results = []
+                for query_vector in query_vectors:
+                    hits = [
+                        (row, score) for row, score in index.search(query_vector, k)
+                        if score_threshold is None or score >= score_threshold
+                    ]
+                    rows = [row for row, _ in hits]
+                    docs = [index.document(row, score) for row, score in hits]
+                    vectors = np.asarray(index.vectors[rows], dtype=np.float32) if with_vectors else None
+                    results.append((docs, vectors))
+                return results
+        except Exception:
+            log.exception("Local index search failed — falling back to Chroma")
+
+    collection = vectorstore._collection
+    metric = distance_metric(collection)
+    include = ["documents", "metadatas", "distances"] + (["embeddings"] if with_vectors else [])
+    result = collection.query(query_embeddings=query_vectors.tolist(), n_results=k, include=include)
+
+    results = []
+    for i in range(len(query_vectors)):
+        embeddings = result["embeddings"][i] if with_vectors else [None] * len(result["ids"][i])
+        docs, vectors = [], []
+        for doc_id, text, meta, distance, vector in zip(
+            result["ids"][i], result["documents"][i], result["metadatas"][i],
+            result["distances"][i], embeddings,
+        ):
+            doc = _with_score(Document(id=doc_id, page_content=text or "", metadata=meta or {}), distance, metric)
+            if score_threshold is None or doc.metadata["score"] >= score_threshold:
+                docs.append(doc)
+                vectors.append(vector)
+        results.append((docs, np.asarray(vectors, dtype=np.float32) if with_vectors else None))
+    return results
+
+
+class RAGRetriever(BaseRetriever):
+    """Retriever behind the graph's `retrieve` node.
+
+    Modes
+    ─────
+      similarity — vector search (local replica or Chroma).
+      hybrid     — vector + local BM25 keyword search fused with RRF.  Falls
+                   back to vector-only results when the BM25 index has not
+                   been built yet (run an ingest or ``python -m app.bm25``).
+      mmr        — maximal marginal relevance over ``mmr_fetch_k`` vector
+                   candidates, with at most ``per_source_cap`` chunks per file.
+
+    Vector candidates whose relevance score is below ``score_threshold`` are
+    skipped in every mode, so weak matches never reach the prompt (fewer
+    chunks may be returned than ``k``).
+
+    With ``adaptive`` set, ``k`` is replaced by an adaptive cut-off: up to
+    ``adaptive_max_k`` chunks are ranked once and trimmed by
+    :func:`adaptive_cutoff` (score drop-off / token budget).  MMR output is
+    in diversity order, so there the drop-off sizes the selection on the
+    score-sorted candidates and only the token budget trims the picks.
+
+    Every field can be overridden per request (see ``RetrievalOptions``).
+    """
+
+    vectorstore: VectorStore
+    k: int = RETRIEVER_K
+    mode: str = RETRIEVER_MODE
+    fetch_k: int = HYBRID_FETCH_K
+    rrf_k: int = RRF_K
+    mmr_fetch_k: int = MMR_FETCH_K
+    mmr_lambda: float = MMR_LAMBDA
+    per_source_cap: int = MMR_PER_SOURCE_CAP
+    score_threshold: float | None = RETRIEVER_SCORE_THRESHOLD
+    adaptive: bool = ADAPTIVE_K_ENABLED
+    adaptive_min_k: int = ADAPTIVE_MIN_K
+    adaptive_max_k: int = ADAPTIVE_MAX_K
+    adaptive_min_score_ratio: float = ADAPTIVE_MIN_SCORE_RATIO
+    token_budget: int = ADAPTIVE_TOKEN_BUDGET
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        return self.retrieve_many([query])[0]
+
+    def retrieve_many(self, queries: list[str]) -> list[list[Document]]:
+        """Retrieve for several queries with one embedding call and one vector search."""
+        if not queries:
+            return []
+        return self.fuse(self.vector_ranked(queries), self.keyword_ranked(queries))
+
+    # The three stages below are also run as parallel graph branches
+    # (vector and keyword search concurrently, then `fuse`).
+
+    def _depth(self) -> int:
+        return self.adaptive_max_k if self.adaptive else self.k
+
+    def vector_ranked(self, queries: list[str]) -> list[list[Document]]:
+        """Vector stage: top chunks (MMR-selected in ``mmr`` mode) per query."""
+        k = self._depth()
+        query_vectors = embed_queries(self.vectorstore, queries)
+        with stage("vector_search"), RETRIEVAL_LATENCY.time(stage="vector", mode=self.mode):
+            if self.mode == "mmr":
+                return self._mmr(query_vectors, k)
+            fetch_k = max(self.fetch_k, k) if self.mode == "hybrid" else k
+            hits = search_by_vectors(self.vectorstore, query_vectors, fetch_k, self.score_threshold)
+        return [docs for docs, _ in hits]
+
+    def keyword_ranked(self, queries: list[str]) -> list[list[Document]] | None:
+        """Keyword stage: BM25 hits per query in ``hybrid`` mode, else None."""
+        if self.mode != "hybrid":
+            return None
+        bm25 = get_bm25_index()
+        if bm25 is None:
+            log.warning("BM25 index not found — hybrid retrieval is using vector results only")
+            return None
+        fetch_k = max(self.fetch_k, self._depth())
+        with stage("keyword_search"), RETRIEVAL_LATENCY.time(stage="keyword", mode=self.mode):
+            return [bm25.search_documents(query, fetch_k) for query in queries]
+
+    def fuse(
+        self, vector_lists: list[list[Document]], keyword_lists: list[list[Document]] | None = None
+    ) -> list[list[Document]]:
+        """Final stage: RRF-fuse both sides (if any keyword hits), cut to k / adaptive k."""
+        with stage("fuse"), RETRIEVAL_LATENCY.time(stage="fuse", mode=self.mode):
+            return self._fuse(vector_lists, keyword_lists)
+
+    def _fuse(
+        self, vector_lists: list[list[Document]], keyword_lists: list[list[Document]] | None
+    ) -> list[list[Document]]:
+        k = self._depth()
+        if keyword_lists is None:
+            ranked = [docs[:k] for docs in vector_lists]
+        else:
+            ranked = [
+                reciprocal_rank_fusion([vector_docs, keyword_docs], k=self.rrf_k)[:k]
+                for vector_docs, keyword_docs in zip(vector_lists, keyword_lists)
+            ]
+        if not self.adaptive:
+            return ranked
+        # MMR picks are not sorted by score: `_mmr` already applied the drop-off.
+        ratio = 0.0 if self.mode == "mmr" else self.adaptive_min_score_ratio
+        return [
+            adaptive_cutoff(
+                docs,
+                min_k=self.adaptive_min_k,
+                min_score_ratio=ratio,
+                token_budget=self.token_budget,
+            )
+            for docs in ranked
+        ]
+
+    def _mmr(self, query_vectors: np.ndarray, k: int) -> list[list[Document]]:
+        hits = search_by_vectors(
+            self.vectorstore, query_vectors, max(self.mmr_fetch_k, k), self.score_threshold,
+            with_vectors=True,
+        )
+        results = []
+        for query_vector, (docs, doc_vectors) in zip(query_vectors, hits):
+            n = k
+            if self.adaptive:
+                # Size the selection by the drop-off over the candidates, which
+                # arrive sorted by score; MMR then decides which chunks fill it.
+                n = len(adaptive_cutoff(
+                    docs[:k],
+                    min_k=self.adaptive_min_k,
+                    min_score_ratio=self.adaptive_min_score_ratio,
+                    token_budget=self.token_budget,
+                ))
+            picked = mmr_select(
+                query_vector,
+                doc_vectors,
+                n,
+                lambda_mult=self.mmr_lambda,
+                sources=[d.metadata.get("source_file", d.id) for d in docs],
+                per_source_cap=self.per_source_cap,
+            )
+            results.append([docs[i] for i in picked])
+        return results
+
+
+def get_retriever(k: int = RETRIEVER_K, mode: str = RETRIEVER_MODE, **overrides) -> RAGRetriever:
+    """Return the retriever; *overrides* set any other RAGRetriever field."""
+    from .vectorstore import get_vectorstore  # chromadb is slow to import; only load it when needed
+    return RAGRetriever(vectorstore=get_vectorstore(), k=k, mode=mode, **overrides)
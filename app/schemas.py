@@ -1,3 +1,6 @@
+from typing import Literal
+
+from app.config import BATCH_MAX_QUERIES
 from app.models import ContextEntry
 from pydantic import BaseModel, Field
 
@@ -52,7 +55,10 @@ class QueryOptions(BaseModel):
 
     model: str | None = Field(
         None,
-        description="Override the default LLM model name for this request.",
+        description=(
+            "Override the default LLM model name for this request "
+            "(must be listed in `LLM_ALLOWED_MODELS` when that is set)."
+        ),
         examples=["gpt-4o"],
     )
     stream: bool = Field(
@@ -61,14 +67,71 @@ class QueryOptions(BaseModel):
     )
     maxTokens: int | None = Field(
         None,
-        description="Maximum tokens in the generated answer.",
+        ge=1,
+        description="Maximum tokens in the generated answer (capped by `LLM_MAX_TOKENS_LIMIT`).",
         examples=[512],
     )
     temperature: float | None = Field(
         None,
+        ge=0.0,
+        le=2.0,
         description="Sampling temperature (0 = deterministic, 1 = creative).",
         examples=[0.2],
     )
+    timings: bool = Field(
+        False,
+        description=(
+            "Return a per-stage `timings` block in the response and a `Server-Timing` "
+            "header (`/query` only)."
+        ),
+    )
+
+
+class RetrievalOptions(BaseModel):
+    """Optional per-request retrieval overrides (defaults come from `.env`)."""
+
+    mode: Literal["similarity", "hybrid", "mmr"] | None = Field(
+        None,
+        description=(
+            "`similarity` (vector search), `hybrid` (vector + BM25 keyword search) "
+            "or `mmr` (maximal marginal relevance, for diverse chunks)."
+        ),
+        examples=["mmr"],
+    )
+    k: int | None = Field(None, ge=1, le=50, description="Number of chunks passed to the LLM.", examples=[4])
+    fetchK: int | None = Field(
+        None, ge=1, le=200,
+        description="Candidates fetched before fusion (`hybrid`) or MMR selection (`mmr`).",
+        examples=[20],
+    )
+    mmrLambda: float | None = Field(
+        None, ge=0.0, le=1.0,
+        description="MMR trade-off: 1 = relevance only, 0 = diversity only.",
+        examples=[0.5],
+    )
+    perSourceCap: int | None = Field(
+        None, ge=0,
+        description="MMR only: maximum chunks from the same source file (0 = no cap).",
+        examples=[2],
+    )
+    scoreThreshold: float | None = Field(
+        None,
+        description="Skip chunks whose relevance score (cosine-like, 1 = identical) is below this value.",
+        examples=[0.35],
+    )
+    adaptiveK: bool | None = Field(
+        None,
+        description=(
+            "Pick the number of chunks per question: keep chunks until the score drops "
+            "off or `tokenBudget` is reached (`k` is ignored)."
+        ),
+        examples=[True],
+    )
+    tokenBudget: int | None = Field(
+        None, ge=1,
+        description="Adaptive k only: maximum estimated tokens of retrieved context.",
+        examples=[1500],
+    )
 
 
 class QueryMeta(BaseModel):
@@ -113,12 +176,55 @@ class QueryRequest(BaseModel):
         None,
         description="Optional LLM tuning parameters.",
     )
+    retrieval: RetrievalOptions | None = Field(
+        None,
+        description="Optional retrieval overrides (mode, k, MMR settings).",
+    )
     meta: QueryMeta | None = Field(
         None,
         description="Optional caller metadata (logging / routing).",
     )
 
 
+class BatchQueryRequest(BaseModel):
+    """Request body for `POST /query/batch`."""
+
+    queries: list[QueryRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=BATCH_MAX_QUERIES,
+        description=(
+            "Independent `/query` requests. Retrieval for all of them runs as one "
+            "batched embedding call and one vector search."
+        ),
+    )
+
+
+class RetrieveRequest(BaseModel):
+    """Request body for `POST /retrieve`."""
+
+    query: str = Field(
+        ...,
+        description="Text to search the indexed chunks for.",
+        examples=["How do I log a metric with mlflow?"],
+    )
+    retrieval: RetrievalOptions | None = Field(
+        None,
+        description="Optional retrieval overrides (mode, k, MMR settings, score threshold).",
+    )
+
+
+class BatchRetrieveRequest(BaseModel):
+    """Request body for `POST /retrieve/batch`."""
+
+    queries: list[RetrieveRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=BATCH_MAX_QUERIES,
+        description="Independent searches, embedded in one batched call.",
+    )
+
+
 # ---------------------------------------------------------------------------
 # Response models
 # ---------------------------------------------------------------------------
@@ -129,8 +235,42 @@ class SourceChunk(BaseModel):
     content: str = Field(..., description="Raw text of the retrieved chunk.")
     metadata: dict = Field(
         ...,
-        description="Chunk metadata: `source` (file path), optional `score`.",
-        examples=[{"source": "data/paper.pdf", "score": 0.87}],
+        description=(
+            "Chunk metadata: `source` (file path), `score` (relevance, higher = better), "
+            "`distance` / `distance_metric` from the vector search, `chunk_id`, and the "
+            "ingest-time fields such as `section`, `page`, `symbol`, `source_corpus`."
+        ),
+        examples=[{
+            "source": "data/paper.pdf",
+            "score": 0.87,
+            "distance": 0.26,
+            "distance_metric": "l2",
+            "chunk_id": "3f2a9c…",
+            "page": 4,
+            "source_corpus": "qiskit",
+        }],
+    )
+
+
+class QueryTimings(BaseModel):
+    """Where the time went for one request (requested with `options.timings`)."""
+
+    total_ms: float = Field(..., description="Wall time of the graph run.")
+    stages: dict[str, float] = Field(
+        ...,
+        description=(
+            "Milliseconds per stage, in pipeline order: `checkpoint_load`, `warmup`, `rewrite`, `embed`, "
+            "`vector_search`, `keyword_search`, `fuse`, `rerank`, `prompt_build`, `queue_wait`, "
+            "`generation`, `checkpoint_save`. Only stages that ran are listed; repeated stages "
+            "are summed, and parallel branches overlap, so stages can add up to more than `total_ms`."
+        ),
+        examples=[{"checkpoint_load": 0.4, "embed": 21.3, "vector_search": 8.9, "fuse": 0.1,
+                   "prompt_build": 0.2, "generation": 1830.5, "checkpoint_save": 2.7}],
+    )
+    prompt_tokens: int | None = Field(None, description="Tokens sent to the LLM.")
+    completion_tokens: int | None = Field(None, description="Tokens generated by the LLM.")
+    tokens_estimated: bool = Field(
+        False, description="True when the provider reported no usage and counts are estimated (~4 chars/token)."
     )
 
 
@@ -139,8 +279,40 @@ class QueryResponse(BaseModel):
 
     thread_id: str | None = Field(None, description="Conversation thread identifier. Pass this back on subsequent turns to continue the conversation.")
     answer: str = Field(..., description="LLM-generated answer grounded in the retrieved chunks.")
+    model: str | None = Field(None, description="Generation model that produced the answer (see difficulty routing).")
     sources: list[SourceChunk] = Field(
         ...,
         description="Document chunks retrieved from ChromaDB that were used to produce the answer.",
     )
+    timings: QueryTimings | None = Field(None, description="Per-stage timings, when `options.timings` is set.")
+
+
+
+class BatchQueryResponse(BaseModel):
+    """Response body from `POST /query/batch`."""
+
+    results: list[QueryResponse] = Field(
+        ...,
+        description="One response per request, in the same order as `queries`.",
+    )
+
 
+class RetrieveResponse(BaseModel):
+    """Response body from `POST /retrieve`."""
+
+    query: str = Field(..., description="The query that was searched.")
+    chunks: list[SourceChunk] = Field(
+        ...,
+        description="Ranked chunks (best first) with score and metadata.",
+    )
+    took_ms: float | None = Field(None, description="Server-side retrieval time in milliseconds.")
+
+
+class BatchRetrieveResponse(BaseModel):
+    """Response body from `POST /retrieve/batch`."""
+
+    results: list[RetrieveResponse] = Field(
+        ...,
+        description="One result per query, in the same order as `queries`.",
+    )
+    took_ms: float | None = Field(None, description="Server-side retrieval time for the whole batch in milliseconds.")
@@ -0,0 +1,108 @@
+# app/timings.py
+"""
+Per-request stage timings (opt-in `timings` block on `/query`).
+
+`/metrics` shows where time goes in aggregate; this answers "why was THIS
+answer slow?".  The API opens a collector around one graph run and the
+instrumented stages add their durations to it:
+
+    with collect() as timings:
+        graph.invoke(...)
+    timings.as_dict()  # {"total_ms": …, "stages": {"embed": 12.1, …}, …}
+
+The collector travels in a context variable, which LangGraph and
+`asyncio.to_thread` copy into their worker threads, so stages running on
+parallel branches record into the same request.  Outside a collector,
+`stage()` / `record()` cost a context-variable lookup.
+
+Stages repeated within a run (e.g. several checkpoint saves) are summed.
+Parallel branches overlap, so stage durations can add up to more than
+`total_ms`.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Reported in pipeline order.
+STAGES = (
+    "checkpoint_load", "warmup", "rewrite", "embed", "vector_search", "keyword_search", "fuse",
+    "rerank", "prompt_build", "queue_wait", "generation", "checkpoint_save",
+)
+
+
+class Timings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total_s: float | None = None
+        self.stages: dict[str, float] = {}
+        self.prompt_tokens: int | None = None
+        self.completion_tokens: int | None = None
+        self.tokens_estimated = False
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def as_dict(self) -> dict:
+        total = self.total_s if self.total_s is not None else time.perf_counter() - self.started
+        order = {name: i for i, name in enumerate(STAGES)}
+        with self._lock:
+            stages = sorted(self.stages.items(), key=lambda item: order.get(item[0], len(STAGES)))
+        return {
+            "total_ms": round(total * 1000, 1),
+            "stages": {name: round(seconds * 1000, 1) for name, seconds in stages},
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tokens_estimated": self.tokens_estimated,
+        }
+
+
+def server_timing(timings: dict) -> str:
+    """Render an `as_dict()` result as a `Server-Timing` header value (durations in ms)."""
+    entries = [f"{name};dur={ms}" for name, ms in timings["stages"].items()]
+    entries.append(f"total;dur={timings['total_ms']}")
+    return ", ".join(entries)
+
+
+_current: ContextVar[Timings | None] = ContextVar("rag_timings", default=None)
+
+
+@contextmanager
+def collect():
+    """Collect stage timings for everything run inside the block."""
+    timings = Timings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        timings.total_s = time.perf_counter() - timings.started
+        _current.reset(token)
+
+
+def record(name: str, seconds: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.record(name, seconds)
+
+
+@contextmanager
+def stage(name: str):
+    """Add the wall time of the block to stage *name* of the current request."""
+    if _current.get() is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def record_tokens(prompt: int, completion: int, estimated: bool) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.prompt_tokens, timings.completion_tokens = prompt, completion
+        timings.tokens_estimated = estimated
@@ -1,20 +1,28 @@
-import chromadb
+from functools import lru_cache
+
 from langchain_chroma import Chroma
 
-from .config import (
-    CHROMA_HOST,
-    CHROMA_PORT,
-    CHROMA_SSL,
-    COLLECTION_NAME,
-)
+from .clients import get_chroma_client
+from .config import COLLECTION_NAME
 from .factory import get_embeddings
 
 
+@lru_cache(maxsize=1)
 def get_vectorstore() -> Chroma:
-    client = chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT, ssl=CHROMA_SSL)
-
+    """Return the shared Chroma vector store (one client and collection handle per process)."""
     return Chroma(
-        client=client,
+        client=get_chroma_client(),
         collection_name=COLLECTION_NAME,
         embedding_function=get_embeddings(),
     )
+
+
+def iter_collection(collection, include: list[str], page_size: int = 1000):
+    """Yield ``collection.get`` pages until the whole collection has been read."""
+    offset = 0
+    while True:
+        batch = collection.get(include=include, limit=page_size, offset=offset)
+        if not batch["ids"]:
+            return
+        yield batch
+        offset += len(batch["ids"])
@@ -0,0 +1,77 @@
+# benchmarks/adaptive_k.py
+"""
+Fixed k vs adaptive k.
+
+For every question in the eval dataset the retriever ranks ADAPTIVE_MAX_K
+chunks once; the fixed-k row keeps the first k, each adaptive row applies
+`adaptive_cutoff` with the given score ratio and token budget.  Reported per
+setting: mean / max chunks kept, mean estimated context tokens, and reference
+coverage (see benchmarks/common.py) as an LLM-free quality proxy.
+
+Usage
+─────
+  python -m benchmarks.adaptive_k --k 4 --ratio 0.8 0.85 0.9 --token-budget 1500
+"""
+
+import argparse
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.config import ADAPTIVE_MAX_K, ADAPTIVE_MIN_K, ADAPTIVE_TOKEN_BUDGET
+from app.prompts import estimate_tokens
+from app.retriever import adaptive_cutoff, get_retriever
+from benchmarks.common import load_eval_items, reference_coverage
+
+
+def _row(label: str, items: list[tuple[str, str]], kept: list[list]) -> str:
+    counts = [len(docs) for docs in kept]
+    tokens = [sum(estimate_tokens(d.page_content) for d in docs) for docs in kept]
+    coverage = [
+        reference_coverage(reference, [d.page_content for d in docs])
+        for (_, reference), docs in zip(items, kept)
+    ]
+    return (
+        f"{label:<24} {statistics.mean(counts):>6.1f} {max(counts):>5} "
+        f"{statistics.mean(tokens):>8.0f} {statistics.mean(coverage):>9.3f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare fixed k with adaptive k.")
+    parser.add_argument("--k", type=int, nargs="+", default=[4])
+    parser.add_argument("--ratio", type=float, nargs="+", default=[0.8, 0.85, 0.9])
+    parser.add_argument("--token-budget", type=int, default=ADAPTIVE_TOKEN_BUDGET)
+    parser.add_argument("--max-k", type=int, default=ADAPTIVE_MAX_K)
+    parser.add_argument("--min-k", type=int, default=ADAPTIVE_MIN_K)
+    args = parser.parse_args()
+
+    items = [
+        (item["inputs"]["question"], item["expectations"]["expected_response"])
+        for item in load_eval_items()
+    ]
+    retriever = get_retriever(k=max(args.max_k, *args.k), adaptive=False)
+    ranked = [retriever.invoke(question) for question, _ in items]
+
+    print(f"Questions: {len(items)} | max_k={args.max_k} min_k={args.min_k} "
+          f"token_budget={args.token_budget}")
+    print(f"\n{'setting':<24} {'chunks':>6} {'max':>5} {'tokens':>8} {'coverage':>9}")
+    for k in args.k:
+        print(_row(f"fixed k={k}", items, [docs[:k] for docs in ranked]))
+    for ratio in args.ratio:
+        kept = [
+            adaptive_cutoff(
+                docs[: args.max_k],
+                min_k=args.min_k,
+                min_score_ratio=ratio,
+                token_budget=args.token_budget,
+            )
+            for docs in ranked
+        ]
+        print(_row(f"adaptive ratio={ratio}", items, kept))
+
+
+if __name__ == "__main__":
+    main()
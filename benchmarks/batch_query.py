@@ -0,0 +1,55 @@
+# benchmarks/batch_query.py
+"""
+Throughput of POST /query/batch versus sequential POST /query calls.
+
+Sends every eval question to a running API server twice: one request at a
+time to /query, then as a single /query/batch request.  Each question gets its
+own fresh conversation so both runs do the same work.
+
+Usage
+─────
+  # API must be running (uvicorn app.api:app)
+  python -m benchmarks.batch_query --url http://localhost:8000 --limit 32
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.common import load_questions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare sequential /query with /query/batch.")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--limit", type=int, default=32, help="number of questions (≤ BATCH_MAX_QUERIES)")
+    parser.add_argument("--timeout", type=float, default=600.0)
+    args = parser.parse_args()
+
+    questions = load_questions()[: args.limit]
+    with httpx.Client(base_url=args.url, timeout=args.timeout) as client:
+        t = time.perf_counter()
+        for question in questions:
+            client.post("/query", json={"message": question}).raise_for_status()
+        sequential = time.perf_counter() - t
+
+        t = time.perf_counter()
+        response = client.post("/query/batch", json={"queries": [{"message": q} for q in questions]})
+        response.raise_for_status()
+        batched = time.perf_counter() - t
+
+    n = len(questions)
+    print(f"Questions: {n}")
+    print(f"{'mode':<12} {'wall':>8} {'q/s':>7}")
+    print(f"{'sequential':<12} {sequential:>7.1f}s {n / sequential:>7.2f}")
+    print(f"{'batch':<12} {batched:>7.1f}s {n / batched:>7.2f}")
+    print(f"Speed-up: {sequential / batched:.1f}×")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# benchmarks/bm25.py
+"""
+Lookup latency of the local BM25 index (target: < 10 ms per query).
+
+Loads the persisted index for the active collection and times
+`BM25Index.search` for every eval question (repeated to smooth noise).
+
+Usage
+─────
+  python -m benchmarks.bm25 --k 20 --repeats 50
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.bm25 import get_bm25_index
+from app.config import BM25_INDEX_PATH
+from benchmarks.common import load_questions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure BM25 lookup latency.")
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    t = time.perf_counter()
+    index = get_bm25_index()
+    if index is None:
+        sys.exit(f"No BM25 index at {BM25_INDEX_PATH} — run `python -m app.bm25` first.")
+    print(f"Loaded {len(index):,} chunks / {len(index.postings):,} terms in "
+          f"{(time.perf_counter() - t) * 1000:.0f}ms")
+
+    questions = load_questions()
+
+    latencies = []
+    for _ in range(args.repeats):
+        for question in questions:
+            t = time.perf_counter()
+            index.search(question, args.k)
+            latencies.append((time.perf_counter() - t) * 1000)
+
+    latencies.sort()
+    print(f"queries={len(latencies)} k={args.k}  "
+          f"p50={statistics.median(latencies):.2f}ms  "
+          f"p95={latencies[int(0.95 * (len(latencies) - 1))]:.2f}ms  "
+          f"max={latencies[-1]:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# benchmarks/common.py
+"""Shared helpers for the benchmark scripts."""
+
+import json
+import os
+import re
+
+EVAL_DATASET_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "evaluation", "eval_dataset.json")
+)
+
+_WORD = re.compile(r"[a-z0-9_]{3,}")
+
+
+def load_eval_items(path: str = EVAL_DATASET_PATH) -> list[dict]:
+    """Return the raw eval dataset items (``inputs`` / ``expectations``)."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_questions(path: str = EVAL_DATASET_PATH) -> list[str]:
+    return [item["inputs"]["question"] for item in load_eval_items(path)]
+
+
+def _words(text: str) -> set[str]:
+    return set(_WORD.findall(text.lower()))
+
+
+def reference_coverage(reference: str, chunks: list[str]) -> float:
+    """Fraction of the reference answer's content words found in *chunks*.
+
+    A cheap, LLM-free proxy for "did retrieval surface what the answer needs".
+    Use it to compare settings, not as an absolute quality measure.
+    """
+    ref = _words(reference)
+    if not ref:
+        return 0.0
+    return len(ref & _words(" ".join(chunks))) / len(ref)
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0–100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
@@ -0,0 +1,68 @@
+# benchmarks/embedding_batcher.py
+"""
+Query-embedding throughput with and without micro-batching.
+
+Fires the eval questions at the embedding provider from N concurrent threads,
+once through the plain client and once through `BatchingEmbeddings`, and
+reports queries per second and per-call latency.
+
+Usage
+─────
+  python -m benchmarks.embedding_batcher --concurrency 1 8 32 --wait-ms 5
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.config import EMBEDDING_MODEL, EMBEDDING_PROVIDER
+from app.embedding_batcher import BatchingEmbeddings
+from app.factory import _provider_embeddings
+from benchmarks.common import load_questions, percentile
+
+
+def _run(embeddings, questions: list[str], concurrency: int) -> tuple[float, list[float]]:
+    def timed(question: str) -> float:
+        t = time.perf_counter()
+        embeddings.embed_query(question)
+        return time.perf_counter() - t
+
+    t = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, questions))
+    return time.perf_counter() - t, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark query-embedding micro-batching.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--wait-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=3, help="times the question set is repeated")
+    args = parser.parse_args()
+
+    # Suffix each copy so repeats are not deduplicated inside a batch.
+    questions = [f"{q} ({i})" for i in range(args.repeats) for q in load_questions()]
+    plain = _provider_embeddings()
+    batched = BatchingEmbeddings(plain, max_batch_size=args.max_batch, max_wait_ms=args.wait_ms)
+    plain.embed_query("warm-up")
+
+    print(f"Embeddings: {EMBEDDING_PROVIDER}/{EMBEDDING_MODEL} | queries: {len(questions)} | "
+          f"wait={args.wait_ms}ms max_batch={args.max_batch}")
+    print(f"\n{'client':<8} {'threads':>7} {'q/s':>8} {'p50':>9} {'p95':>9}")
+    for concurrency in args.concurrency:
+        for label, client in (("plain", plain), ("batched", batched)):
+            wall, latencies = _run(client, questions, concurrency)
+            print(
+                f"{label:<8} {concurrency:>7} {len(questions) / wall:>8.1f} "
+                f"{statistics.median(latencies) * 1000:>7.1f}ms {percentile(latencies, 95) * 1000:>7.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/import_time.py
+"""
+Cold-start cost of importing the API (what every `uvicorn --reload` cycle pays).
+
+Imports a module in N fresh interpreters and reports the wall time, then
+runs one more import under `python -X importtime` to list the slowest
+imported packages and flag heavy dependencies (mlflow, chromadb, provider
+SDKs, …) that were pulled in at import time.  With `--startup`, also times
+the work deferred to FastAPI startup (clients + graph build); that part
+needs Chroma and the providers to be reachable.
+
+Usage
+─────
+  python -m benchmarks.import_time
+  python -m benchmarks.import_time --module app.graph --runs 10 --top 15
+  python -m benchmarks.import_time --startup
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Packages that should only load on first use, not when the API module is imported.
+HEAVY = (
+    "mlflow",
+    "chromadb",
+    "langchain_chroma",
+    "langchain_ollama",
+    "langchain_openai",
+    "langchain_google_genai",
+    "langgraph.checkpoint.sqlite",
+    "sentence_transformers",
+    "torch",
+)
+
+_TIMED_IMPORT = """
+import importlib, sys, time
+t = time.perf_counter()
+importlib.import_module({module!r})
+print(time.perf_counter() - t)
+print(",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+_TIMED_STARTUP = """
+import time
+from app import clients
+from app.graph import get_graph
+t = time.perf_counter(); clients.startup(); c = time.perf_counter() - t
+t = time.perf_counter(); get_graph(); g = time.perf_counter() - t
+print(c); print(g)
+"""
+
+
+def _python(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+
+def timed_import(module: str) -> tuple[float, list[str]]:
+    out = _python(_TIMED_IMPORT.format(module=module, heavy=HEAVY)).stdout.splitlines()
+    return float(out[-2]), [m for m in out[-1].split(",") if m]
+
+
+def slowest_imports(module: str, top: int) -> list[tuple[float, str]]:
+    """``(cumulative seconds, package)`` for the *top* slowest imports, from -X importtime."""
+    stderr = _python(f"import {module}", "-X", "importtime").stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        rows.append((int(cumulative) / 1e6, name.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark API import / startup time.")
+    parser.add_argument("--module", default="app.api")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to time")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument("--startup", action="store_true", help="also time clients + graph build")
+    args = parser.parse_args()
+
+    timings, heavy = [], []
+    for _ in range(args.runs):
+        seconds, heavy = timed_import(args.module)
+        timings.append(seconds)
+
+    print(f"import {args.module}: median {statistics.median(timings) * 1000:.0f} ms, "
+          f"min {min(timings) * 1000:.0f} ms over {args.runs} runs")
+    print(f"heavy packages loaded at import: {', '.join(heavy) or 'none'}")
+
+    print(f"\n{'cumulative':>10}  package")
+    for seconds, name in slowest_imports(args.module, args.top):
+        print(f"{seconds * 1000:>8.0f}ms  {name}")
+
+    if args.startup:
+        clients_s, graph_s = (float(x) for x in _python(_TIMED_STARTUP).stdout.splitlines()[-2:])
+        print(f"\nstartup: clients {clients_s * 1000:.0f} ms, graph build {graph_s * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
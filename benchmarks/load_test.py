@@ -0,0 +1,314 @@
+# benchmarks/load_test.py
+"""
+Load test of POST /query against stubbed providers — no Ollama, no Chroma server.
+
+The real API (middleware, admission control, graph, checkpointer, retriever)
+runs in-process under uvicorn; only the external dependencies are replaced by
+deterministic local stand-ins with a fixed artificial latency:
+
+  embeddings — hash-seeded unit vectors, `--embed-ms` per provider call
+  Chroma     — an in-memory (ephemeral) Chroma collection seeded with
+               `--docs` chunks; `--search-ms` added to every query
+  LLM        — a chat model returning a fixed answer with usage metadata
+               after `--llm-ms`
+
+so a run measures the overhead of app/api.py and app/graph.py on top of known
+provider latencies.  Each concurrency level is one load stage: that many
+clients send requests back to back (a fresh conversation each) until
+`--requests` have completed.  Per stage it reports req/s, status counts and
+p50 / p95 / p99 of the client-side latency, the server's total and every
+pipeline stage from the per-request `timings` block (see app/timings.py).
+
+Pipeline settings (RETRIEVER_MODE, ADMISSION_*, GRAPH_PARALLEL_ENABLED,
+…) come from the environment as usual.  Conversations, BM25 and local-index
+files go to a temporary directory and MLflow tracing is off.  With `--url`
+the stubs are skipped and an already running server is driven instead.
+
+`--max-p95-ms` exits non-zero when any stage's client p95 exceeds it, so the
+run can gate a deploy; `--json` writes the results for comparison.
+
+Usage
+─────
+  python -m benchmarks.load_test --concurrency 1 8 32 --requests 200
+  python -m benchmarks.load_test --llm-ms 800 --embed-ms 20 --search-ms 5 --max-p95-ms 2500
+  python -m benchmarks.load_test --url http://localhost:8000 --concurrency 4 --requests 40
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from functools import lru_cache
+
+import httpx
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.common import load_questions, percentile
+
+
+# ── Stand-ins ─────────────────────────────────────────────────────────────────
+
+class StubEmbeddings(Embeddings):
+    """Deterministic unit vectors seeded by the text hash; one sleep per call."""
+
+    def __init__(self, latency_s: float, dim: int = 64):
+        self.latency_s = latency_s
+        self.dim = dim
+
+    def _vector(self, text: str) -> list[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dim)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        time.sleep(self.latency_s)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
+class StubChatModel(BaseChatModel):
+    """Fixed answer after ``latency_s``; reports token usage like hosted chat models."""
+
+    latency_s: float = 0.0
+    answer: str = "Stub answer: the retrieved context covers this question."
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency_s)
+        prompt_tokens = sum(len(str(m.content)) for m in messages) // 4
+        completion_tokens = len(self.answer) // 4
+        message = AIMessage(content=self.answer, usage_metadata={
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        })
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class _SlowCollection:
+    """Chroma collection whose ``query`` takes at least ``latency_s`` longer."""
+
+    def __init__(self, collection, latency_s: float):
+        self._wrapped = collection
+        self._latency_s = latency_s
+
+    def query(self, *args, **kwargs):
+        time.sleep(self._latency_s)
+        return self._wrapped.query(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._wrapped, name)
+
+
+class _SlowChromaClient:
+    def __init__(self, client, latency_s: float):
+        self._wrapped = client
+        self._latency_s = latency_s
+
+    def get_collection(self, *args, **kwargs):
+        return _SlowCollection(self._wrapped.get_collection(*args, **kwargs), self._latency_s)
+
+    def get_or_create_collection(self, *args, **kwargs):
+        return _SlowCollection(self._wrapped.get_or_create_collection(*args, **kwargs), self._latency_s)
+
+    def __getattr__(self, name):
+        return getattr(self._wrapped, name)
+
+
+def install_stubs(embed_s: float, search_s: float, llm_s: float) -> None:
+    """Swap the provider / Chroma factories for the stand-ins (before app.api is imported)."""
+    import chromadb
+    from chromadb.config import Settings
+
+    import app.clients as clients
+    import app.factory as factory
+
+    clients.get_chroma_client = lru_cache(maxsize=1)(lambda: _SlowChromaClient(
+        chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False)), search_s
+    ))
+    factory._provider_embeddings = lambda: StubEmbeddings(embed_s)
+    factory.get_llm = lambda model=None, max_tokens=None, temperature=None: StubChatModel(latency_s=llm_s)
+    factory.warm_llm = lambda model=None: None
+
+    import app.vectorstore as vectorstore
+    vectorstore.get_chroma_client = clients.get_chroma_client
+
+
+def seed(questions: list[str], docs: int) -> None:
+    """Fill the in-memory collection and build the BM25 / local indexes over it."""
+    from langchain_core.documents import Document
+
+    from app.bm25 import build_bm25_index
+    from app.local_index import build_local_index
+    from app.vectorstore import get_vectorstore
+
+    chunks = [
+        Document(
+            page_content=f"{questions[i % len(questions)]} Background chunk {i}.",
+            metadata={"source_file": f"data/doc{i % 20}.md", "section": f"Section {i}"},
+        )
+        for i in range(docs)
+    ]
+    get_vectorstore().add_documents(chunks, ids=[f"chunk-{i}" for i in range(docs)])
+    build_bm25_index()
+    build_local_index()
+
+
+def start_server() -> tuple[str, object]:
+    """Run app.api under uvicorn in a background thread; returns (base URL, server)."""
+    import uvicorn
+
+    from app.api import app
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, name="load-test-server", daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}", server
+
+
+# ── Load generation ───────────────────────────────────────────────────────────
+
+async def drive(url: str, questions: list[str], requests: int, concurrency: int, timeout: float):
+    """Closed loop: *concurrency* clients send requests back to back until *requests* are done."""
+    results = []
+    remaining = iter(range(requests))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        async def worker():
+            for i in remaining:
+                body = {
+                    "message": questions[i % len(questions)],
+                    "conversation": {"id": f"load-{uuid.uuid4().hex}"},
+                    "options": {"timings": True},
+                }
+                t = time.perf_counter()
+                try:
+                    response = await client.post("/query", json=body)
+                    status = response.status_code
+                    timings = response.json().get("timings") if status == 200 else None
+                except httpx.HTTPError as exc:
+                    status, timings = type(exc).__name__, None
+                results.append((status, time.perf_counter() - t, timings))
+
+        t = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - t, results
+
+
+def summarize(concurrency: int, wall: float, results: list) -> dict:
+    ok = [(latency, timings) for status, latency, timings in results if status == 200]
+    series: dict[str, list[float]] = {"client": [latency * 1000 for latency, _ in ok]}
+    for _, timings in ok:
+        if timings:
+            series.setdefault("server_total", []).append(timings["total_ms"])
+            for name, ms in timings["stages"].items():
+                series.setdefault(name, []).append(ms)
+    return {
+        "concurrency": concurrency,
+        "requests": len(results),
+        "ok": len(ok),
+        "statuses": dict(Counter(str(status) for status, _, _ in results)),
+        "rps": len(ok) / wall,
+        "latency_ms": {
+            name: {"n": len(values), "p50": percentile(values, 50),
+                   "p95": percentile(values, 95), "p99": percentile(values, 99)}
+            for name, values in series.items()
+        },
+    }
+
+
+def _print(stage: dict) -> None:
+    statuses = ", ".join(f"{status}×{n}" for status, n in sorted(stage["statuses"].items()))
+    print(f"\nconcurrency {stage['concurrency']}: {stage['rps']:.1f} req/s, "
+          f"{stage['ok']}/{stage['requests']} ok ({statuses})")
+    print(f"  {'stage':<16} {'n':>5} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name, row in stage["latency_ms"].items():
+        print(f"  {name:<16} {row['n']:>5} {row['p50']:>7.1f}ms {row['p95']:>7.1f}ms {row['p99']:>7.1f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test /query with stubbed providers.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="one load stage per value")
+    parser.add_argument("--requests", type=int, default=200, help="requests per stage")
+    parser.add_argument("--warmup", type=int, default=5, help="unrecorded requests before the first stage")
+    parser.add_argument("--embed-ms", type=float, default=20.0, help="stub embedding latency per call")
+    parser.add_argument("--search-ms", type=float, default=5.0, help="stub Chroma query latency")
+    parser.add_argument("--llm-ms", type=float, default=500.0, help="stub generation latency")
+    parser.add_argument("--docs", type=int, default=500, help="chunks seeded into the stub collection")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--url", help="drive this running server instead (no stubs)")
+    parser.add_argument("--max-p95-ms", type=float, help="exit 1 if any stage's client p95 exceeds this")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    questions = load_questions()
+    server = None
+    if args.url:
+        url = args.url
+        print(f"Target: {url}")
+    else:
+        # Before app.config is imported: keep the run's files out of the working tree.
+        workdir = tempfile.mkdtemp(prefix="rag-load-test-")
+        os.environ["CONVERSATIONS_DB"] = os.path.join(workdir, "conversations.db")
+        os.environ["LOCAL_INDEX_DIR"] = os.path.join(workdir, "local_index")
+        os.environ["MLFLOW_ENABLED"] = "false"
+        install_stubs(args.embed_ms / 1000, args.search_ms / 1000, args.llm_ms / 1000)
+        seed(questions, args.docs)
+        url, server = start_server()
+        logging.getLogger().setLevel(logging.WARNING)  # app.graph logs every request at INFO
+        print(f"Stubs: embed {args.embed_ms:g}ms, search {args.search_ms:g}ms, "
+              f"llm {args.llm_ms:g}ms | {args.docs} chunks | files in {workdir}")
+
+    if args.warmup:
+        asyncio.run(drive(url, questions, args.warmup, 1, args.timeout))
+
+    stages = []
+    for concurrency in args.concurrency:
+        wall, results = asyncio.run(drive(url, questions, args.requests, concurrency, args.timeout))
+        stages.append(summarize(concurrency, wall, results))
+        _print(stages[-1])
+
+    if server is not None:
+        server.should_exit = True
+
+    if args.json:
+        config = {key: getattr(args, key) for key in ("requests", "embed_ms", "search_ms", "llm_ms", "docs", "url")}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": config, "stages": stages}, f, indent=2)
+        print(f"\nWrote {args.json}")
+
+    if args.max_p95_ms is not None:
+        slow = [s for s in stages if s["ok"] == 0 or s["latency_ms"]["client"]["p95"] > args.max_p95_ms]
+        if slow:
+            print(f"\nFAIL: client p95 above {args.max_p95_ms:g}ms (or no successful requests) at "
+                  f"concurrency {', '.join(str(s['concurrency']) for s in slow)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
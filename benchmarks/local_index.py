@@ -0,0 +1,71 @@
+# benchmarks/local_index.py
+"""
+Vector search latency: Chroma over HTTP vs the in-process local replica.
+
+Query embeddings are computed once up front so both sides are timed on the
+search alone.  Also reports how often the two return the same top-k IDs
+(Chroma's HNSW is approximate; the replica is exact).
+
+Usage
+─────
+  python -m benchmarks.local_index --k 4 --repeats 20
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.config import LOCAL_INDEX_VECTORS_PATH
+from app.local_index import get_local_index
+from app.vectorstore import get_vectorstore
+from benchmarks.common import load_questions
+
+
+def _summary(label: str, latencies_ms: list[float]) -> str:
+    latencies_ms = sorted(latencies_ms)
+    p95 = latencies_ms[int(0.95 * (len(latencies_ms) - 1))]
+    return f"{label:<8} p50={statistics.median(latencies_ms):7.2f}ms  p95={p95:7.2f}ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare Chroma and local replica search latency.")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    vectorstore = get_vectorstore()
+    index = get_local_index()
+    if index is None:
+        sys.exit(f"No usable local index at {LOCAL_INDEX_VECTORS_PATH} — run `python -m app.local_index`.")
+
+    questions = load_questions()
+    query_vectors = vectorstore.embeddings.embed_documents(questions)
+    collection = vectorstore._collection
+
+    chroma_ms, local_ms, overlap = [], [], []
+    for _ in range(args.repeats):
+        for vector in query_vectors:
+            t = time.perf_counter()
+            remote = collection.query(query_embeddings=[vector], n_results=args.k, include=[])
+            chroma_ms.append((time.perf_counter() - t) * 1000)
+
+            t = time.perf_counter()
+            local = index.search(vector, args.k)
+            local_ms.append((time.perf_counter() - t) * 1000)
+
+            local_ids = {index.ids[row] for row, _ in local}
+            overlap.append(len(local_ids & set(remote["ids"][0])) / max(len(local_ids), 1))
+
+    print(f"Chunks: {len(index):,} | dim: {index.vectors.shape[1]} | "
+          f"quantization: {index.quantization} | k={args.k}")
+    print(_summary("chroma", chroma_ms))
+    print(_summary("local", local_ms))
+    print(f"top-{args.k} ID overlap: {statistics.mean(overlap):.3f}")
+
+
+if __name__ == "__main__":
+    main()
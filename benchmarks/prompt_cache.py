@@ -0,0 +1,105 @@
+# benchmarks/prompt_cache.py
+"""
+Time-to-first-token benchmark for the prompt prefix layout.
+
+Replays a multi-turn conversation twice against the configured LLM provider:
+
+  legacy — BASE_PROMPT + user context + retrieved context in one system
+           message that changes every turn (the pre-prefix-caching layout).
+  cached — static prefix + history + per-turn context in the final message
+           (app/prompts.py).
+
+For each turn the first streamed token is timed.  With Ollama the model is
+kept resident (OLLAMA_KEEP_ALIVE) so the cached layout reuses the KV cache for
+the shared prefix; with OpenAI / Gemini the provider's automatic prefix cache
+kicks in once the prefix is long enough.
+
+Usage
+─────
+  python -m benchmarks.prompt_cache --turns 6 --repeats 3
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+from app.config import LLM_MODEL, LLM_PROVIDER
+from app.factory import get_llm
+from app.prompts import BASE_PROMPT, build_prompt
+from app.retriever import get_retriever
+from benchmarks.common import load_questions
+
+
+def _legacy_prompt(history: list[BaseMessage], rag_context: str) -> list[BaseMessage]:
+    system = BASE_PROMPT
+    if rag_context:
+        system += f"\n\nRetrieved context:\n{rag_context}"
+    return [SystemMessage(content=system), *history]
+
+
+def _time_to_first_token(llm, messages: list[BaseMessage]) -> tuple[float, str]:
+    t = time.perf_counter()
+    ttft = None
+    parts = []
+    for chunk in llm.stream(messages):
+        if ttft is None:
+            ttft = time.perf_counter() - t
+        parts.append(chunk if isinstance(chunk, str) else chunk.content)
+    return ttft or 0.0, "".join(parts)
+
+
+def _replay(llm, layout: str, questions: list[str], contexts: list[str]) -> list[float]:
+    history: list[BaseMessage] = []
+    ttfts = []
+    for question, rag_context in zip(questions, contexts):
+        history.append(HumanMessage(content=question))
+        if layout == "legacy":
+            messages = _legacy_prompt(history, rag_context)
+        else:
+            messages = build_prompt(LLM_MODEL, history, rag_context=rag_context)
+        ttft, answer = _time_to_first_token(llm, messages)
+        ttfts.append(ttft)
+        history.append(AIMessage(content=answer))
+    return ttfts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure TTFT for legacy vs cached prompt layouts.")
+    parser.add_argument("--turns", type=int, default=6, help="Conversation turns per replay.")
+    parser.add_argument("--repeats", type=int, default=3, help="Replays per layout.")
+    args = parser.parse_args()
+
+    questions = load_questions()[: args.turns]
+
+    retriever = get_retriever()
+    contexts = [
+        "\n\n".join(doc.page_content for doc in retriever.invoke(q))
+        for q in questions
+    ]
+
+    llm = get_llm()
+    print(f"Provider: {LLM_PROVIDER} | Model: {LLM_MODEL} | Turns: {len(questions)}")
+
+    # Warm the model once so neither layout pays the initial load
+    _time_to_first_token(llm, [HumanMessage(content="hi")])
+
+    results: dict[str, list[float]] = {"legacy": [], "cached": []}
+    for _ in range(args.repeats):
+        for layout in results:
+            results[layout].extend(_replay(llm, layout, questions, contexts))
+
+    print(f"\n{'layout':<8} {'mean':>8} {'p50':>8} {'p95':>8}   (TTFT, seconds)")
+    for layout, values in results.items():
+        values = sorted(values)
+        p95 = values[min(len(values) - 1, int(0.95 * len(values)))]
+        print(f"{layout:<8} {statistics.mean(values):>8.3f} {statistics.median(values):>8.3f} {p95:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
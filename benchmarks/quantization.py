@@ -0,0 +1,93 @@
+# benchmarks/quantization.py
+"""
+Recall-vs-memory benchmark for the quantised local index.
+
+Ground truth is the exact float32 top-k.  For every quantisation mode and
+rescore depth, reports recall@k against that ground truth, the resident size
+of the scanned structure and the per-query latency.
+
+Queries are the eval questions (embedded with the configured model) plus a
+sample of perturbed corpus vectors, so the run works on the existing
+`nomic_embed_text` collection without extra labels.
+
+Usage
+─────
+  python -m app.local_index --all                 # (re)build the replica + int8/PQ first
+  python -m benchmarks.quantization --k 4 --rescore-k 0 20 50 100
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.config import COLLECTION_NAME, LOCAL_INDEX_META_PATH, LOCAL_INDEX_VECTORS_PATH
+from app.local_index import LocalVectorIndex
+from app.vectorstore import get_vectorstore
+from benchmarks.common import load_questions
+
+
+def _queries(index: LocalVectorIndex, n_sampled: int, seed: int) -> np.ndarray:
+    questions = load_questions()
+    embedded = np.asarray(get_vectorstore().embeddings.embed_documents(questions), dtype=np.float32)
+
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(index), size=min(n_sampled, len(index)), replace=False)
+    sampled = np.asarray(index.vectors[np.sort(rows)], dtype=np.float32)
+    sampled += rng.normal(scale=0.02, size=sampled.shape).astype(np.float32)
+    return np.vstack([embedded, sampled])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recall vs memory for int8 / PQ local indexes.")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--rescore-k", type=int, nargs="+", default=[0, 20, 50, 100],
+                        help="Candidates rescored exactly (0 = report the raw quantised ranking).")
+    parser.add_argument("--sampled-queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    exact = LocalVectorIndex.load(LOCAL_INDEX_VECTORS_PATH, LOCAL_INDEX_META_PATH, "none")
+    queries = _queries(exact, args.sampled_queries, args.seed)
+    truth = [{row for row, _ in exact.search(q, args.k)} for q in queries]
+
+    print(f"Collection: {COLLECTION_NAME} | chunks: {len(exact):,} | dim: {exact.vectors.shape[1]} "
+          f"| queries: {len(queries)} | k={args.k}")
+    print(f"\n{'mode':<6} {'rescore_k':>9} {'recall@k':>9} {'memory':>10} {'p50':>9}")
+
+    t = time.perf_counter()
+    for q in queries:
+        exact.search(q, args.k)
+    exact_ms = (time.perf_counter() - t) * 1000 / len(queries)
+    print(f"{'none':<6} {'-':>9} {1.0:>9.3f} {exact.memory_bytes() / 1e6:>8.1f}MB {exact_ms:>7.2f}ms")
+
+    for mode in ("int8", "pq"):
+        try:
+            index = LocalVectorIndex.load(LOCAL_INDEX_VECTORS_PATH, LOCAL_INDEX_META_PATH, mode)
+        except (ImportError, FileNotFoundError, RuntimeError) as exc:
+            print(f"{mode:<6} skipped ({exc.__class__.__name__}: {exc})")
+            continue
+
+        for rescore_k in args.rescore_k:
+            recalls, latencies = [], []
+            for q, expected in zip(queries, truth):
+                t = time.perf_counter()
+                if rescore_k:
+                    found = {row for row, _ in index.search(q, args.k, rescore_k=rescore_k)}
+                else:
+                    qn = q / np.linalg.norm(q)
+                    scan = index._scan_int8 if mode == "int8" else index._scan_pq
+                    found = {int(r) for r in scan(qn, args.k)}
+                latencies.append((time.perf_counter() - t) * 1000)
+                recalls.append(len(found & expected) / len(expected))
+            print(f"{mode:<6} {rescore_k or '-':>9} {statistics.mean(recalls):>9.3f} "
+                  f"{index.memory_bytes() / 1e6:>8.1f}MB {statistics.median(latencies):>7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
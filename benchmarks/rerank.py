@@ -0,0 +1,84 @@
+# benchmarks/rerank.py
+"""
+Latency / quality grid for the cross-encoder rerank stage.
+
+For every question in the eval dataset, the largest requested fetch_k is
+retrieved once from Chroma; each (fetch_k, top_n) cell then reranks the first
+fetch_k candidates and keeps top_n.  A `baseline` row (no rerank, plain top_n
+HNSW hits) is reported for comparison.
+
+Quality is approximated without an LLM judge as *reference coverage*: the
+fraction of content words of the expected answer that appear in the kept
+chunks.  It is a cheap proxy — use it to compare settings, not as an absolute.
+
+Usage
+─────
+  python -m benchmarks.rerank --fetch-k 10 20 40 --top-n 3 4 6
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.config import RERANK_MODEL
+from app.reranker import get_cross_encoder, score_pairs
+from app.retriever import get_retriever
+from benchmarks.common import load_eval_items, percentile, reference_coverage
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark rerank fetch_k / top_n settings.")
+    parser.add_argument("--fetch-k", type=int, nargs="+", default=[10, 20, 40])
+    parser.add_argument("--top-n", type=int, nargs="+", default=[3, 4, 6])
+    args = parser.parse_args()
+
+    items = [
+        (item["inputs"]["question"], item["expectations"]["expected_response"])
+        for item in load_eval_items()
+    ]
+
+    max_k = max(args.fetch_k)
+    retriever = get_retriever(k=max_k)
+    get_cross_encoder()  # load the model outside the timed region
+
+    candidates = []
+    retrieve_times = []
+    for question, _ in items:
+        t = time.perf_counter()
+        docs = retriever.invoke(question)
+        retrieve_times.append(time.perf_counter() - t)
+        candidates.append([d.page_content for d in docs])
+
+    print(f"Model: {RERANK_MODEL} | Questions: {len(items)} | "
+          f"retrieve k={max_k} mean {statistics.mean(retrieve_times) * 1000:.0f}ms")
+    print(f"\n{'fetch_k':>7} {'top_n':>5} {'coverage':>9} {'rerank p50':>11} {'rerank p95':>11}")
+
+    for top_n in args.top_n:
+        coverage = [
+            reference_coverage(reference, chunks[:top_n])
+            for (_, reference), chunks in zip(items, candidates)
+        ]
+        print(f"{'baseline':>7} {top_n:>5} {statistics.mean(coverage):>9.3f} {'-':>11} {'-':>11}")
+
+    for fetch_k in args.fetch_k:
+        for top_n in args.top_n:
+            coverage, latencies = [], []
+            for (question, reference), chunks in zip(items, candidates):
+                pool = chunks[:fetch_k]
+                t = time.perf_counter()
+                scores = score_pairs(question, pool)
+                latencies.append(time.perf_counter() - t)
+                kept = [c for _, c in sorted(zip(scores, pool), reverse=True)[:top_n]]
+                coverage.append(reference_coverage(reference, kept))
+            print(
+                f"{fetch_k:>7} {top_n:>5} {statistics.mean(coverage):>9.3f} "
+                f"{statistics.median(latencies) * 1000:>9.0f}ms {percentile(latencies, 95) * 1000:>9.0f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
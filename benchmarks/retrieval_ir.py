@@ -0,0 +1,174 @@
+# benchmarks/retrieval_ir.py
+"""
+Retrieval-only evaluation with offline IR metrics — no LLM calls.
+
+Every eval item carries `relevant_sources` labels: a file name, optionally
+narrowed to one heading of that file (`qprov_taxonomy.md#Q4 — Circuit Width`).
+A retrieved chunk is relevant to a label when its `source_file` has that name
+and, for heading labels, the heading appears in the chunk's `section`
+breadcrumb.
+
+For each retrieval mode the questions are retrieved in batches (one embedding
+call and one vector search per batch, as /query/batch does) at the largest
+requested k; metrics at smaller k use the prefix of that ranking.  With
+`--rerank`, RERANK_FETCH_K candidates are reranked by the cross-encoder first.
+Reported per (mode, rerank, k):
+
+  recall@k — fraction of an item's labels hit by at least one top-k chunk
+  MRR@k    — 1 / rank of the first relevant chunk (0 when none in top k)
+  nDCG@k   — binary gain, each label credited once at its best rank
+
+plus p50 / p95 / p99 latency of one batch retrieval (per question with the
+default `--batch-size 1`) and questions per second.
+
+Chunk sizes and index types (Chroma vs LOCAL_INDEX_ENABLED, quantisation) are
+process-wide settings: re-ingest / change the env, re-run with a `--label`,
+and collect the runs with `--json`.
+
+Usage
+─────
+  python -m benchmarks.retrieval_ir --mode similarity hybrid mmr --k 1 3 5 10
+  python -m benchmarks.retrieval_ir --rerank --batch-size 8 --label chunk2000 --json ir_runs.jsonl
+"""
+
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.config import (
+    COLLECTION_NAME,
+    LOCAL_INDEX_ENABLED,
+    LOCAL_INDEX_QUANTIZATION,
+    RERANK_FETCH_K,
+)
+from app.retriever import get_retriever
+from benchmarks.common import load_eval_items, percentile
+
+
+def _label_matches(doc, label: str) -> bool:
+    source, _, heading = label.partition("#")
+    if os.path.basename(doc.metadata.get("source_file") or "") != source:
+        return False
+    return not heading or heading in doc.metadata.get("section", "").split(" > ")
+
+
+def relevance(ranked: list, labels: list[str]) -> list[set[str]]:
+    """Labels matched by each ranked chunk."""
+    return [{label for label in labels if _label_matches(doc, label)} for doc in ranked]
+
+
+def recall_at_k(matched: list[set[str]], labels: list[str], k: int) -> float:
+    hit = set().union(*matched[:k])
+    return len(hit) / len(labels)
+
+
+def mrr_at_k(matched: list[set[str]], k: int) -> float:
+    return next((1 / (rank + 1) for rank, hits in enumerate(matched[:k]) if hits), 0.0)
+
+
+def ndcg_at_k(matched: list[set[str]], labels: list[str], k: int) -> float:
+    credited: set[str] = set()
+    dcg = 0.0
+    for rank, hits in enumerate(matched[:k]):
+        if hits - credited:
+            dcg += 1 / math.log2(rank + 2)
+            credited |= hits
+    ideal = sum(1 / math.log2(rank + 2) for rank in range(min(k, len(labels))))
+    return dcg / ideal
+
+
+def _reranked(question: str, docs: list) -> list:
+    from app.reranker import score_pairs
+    scores = score_pairs(question, [d.page_content for d in docs])
+    return [d for _, d in sorted(zip(scores, docs), key=lambda pair: pair[0], reverse=True)]
+
+
+def run(mode: str, rerank: bool, questions: list[str], depth: int, batch_size: int):
+    """Rankings for every question plus the latency of each batch call."""
+    retriever = get_retriever(k=RERANK_FETCH_K if rerank else depth, mode=mode, adaptive=False)
+    rankings, latencies = [], []
+    for start in range(0, len(questions), batch_size):
+        batch = questions[start:start + batch_size]
+        t = time.perf_counter()
+        results = retriever.retrieve_many(batch)
+        if rerank:
+            results = [_reranked(q, docs) for q, docs in zip(batch, results)]
+        latencies.append(time.perf_counter() - t)
+        rankings.extend(docs[:depth] for docs in results)
+    return rankings, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline IR metrics for the retriever.")
+    parser.add_argument("--mode", nargs="+", default=["similarity", "hybrid", "mmr"])
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--rerank", action="store_true", help="also run each mode with the cross-encoder")
+    parser.add_argument("--batch-size", type=int, default=1, help="questions per retrieve_many call")
+    parser.add_argument("--label", default="", help="name for this run (chunk size, index type, …)")
+    parser.add_argument("--json", help="append the results as one JSON line to this file")
+    args = parser.parse_args()
+
+    items = [item for item in load_eval_items() if item.get("relevant_sources")]
+    if not items:
+        sys.exit("No eval items have relevant_sources labels.")
+    questions = [item["inputs"]["question"] for item in items]
+    labels = [item["relevant_sources"] for item in items]
+    depth = max(args.k)
+
+    index = f"local ({LOCAL_INDEX_QUANTIZATION})" if LOCAL_INDEX_ENABLED else "chroma"
+    print(f"Collection: {COLLECTION_NAME} | Index: {index} | Questions: {len(items)} | "
+          f"batch size {args.batch_size}" + (f" | {args.label}" if args.label else ""))
+
+    get_retriever(k=1).retrieve_many(questions[:1])  # connect + load models outside the timed runs
+    if args.rerank:
+        from app.reranker import get_cross_encoder
+        get_cross_encoder()
+
+    configs = [(mode, False) for mode in args.mode]
+    if args.rerank:
+        configs += [(mode, True) for mode in args.mode]
+
+    rows = []
+    print(f"\n{'mode':<12} {'rerank':<6} {'k':>3} {'recall':>7} {'MRR':>6} {'nDCG':>6} "
+          f"{'p50':>8} {'p95':>8} {'p99':>8} {'q/s':>7}")
+    for mode, rerank in configs:
+        rankings, latencies = run(mode, rerank, questions, depth, args.batch_size)
+        matched = [relevance(ranked, item_labels) for ranked, item_labels in zip(rankings, labels)]
+        p50, p95, p99 = (percentile(latencies, q) for q in (50, 95, 99))
+        qps = len(questions) / sum(latencies)
+        for k in args.k:
+            row = {
+                "mode": mode,
+                "rerank": rerank,
+                "k": k,
+                "recall": statistics.mean(recall_at_k(m, l, k) for m, l in zip(matched, labels)),
+                "mrr": statistics.mean(mrr_at_k(m, k) for m in matched),
+                "ndcg": statistics.mean(ndcg_at_k(m, l, k) for m, l in zip(matched, labels)),
+                "p50_s": p50, "p95_s": p95, "p99_s": p99, "qps": qps,
+            }
+            rows.append(row)
+            print(f"{mode:<12} {'yes' if rerank else 'no':<6} {k:>3} {row['recall']:>7.3f} "
+                  f"{row['mrr']:>6.3f} {row['ndcg']:>6.3f} {p50:>7.3f}s {p95:>7.3f}s {p99:>7.3f}s {qps:>7.1f}")
+
+    if args.json:
+        record = {
+            "label": args.label,
+            "collection": COLLECTION_NAME,
+            "index": index,
+            "batch_size": args.batch_size,
+            "questions": len(items),
+            "results": rows,
+        }
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"\nAppended results to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# evaluation/judge_cache.py
+"""
+Persistent cache of judge-metric results.
+
+Every evaluation run re-asks the judge LLM about every (question, response,
+contexts) sample, even when only one answer changed since the last run.  This
+module stores each judge result in SQLite under
+
+    sha256(metric, judge model, metric inputs)
+
+so a re-run only pays for samples whose inputs changed — or all of them after
+switching judge model.  Two wrappers sit around the existing judges:
+
+  • CachedMetric — a RAGAS metric (`ascore(**fields)`), used by
+    evaluation/ragas/neweval.py with the clients from ragas_factory.py.
+  • cached_scorer — an MLflow scorer, used by evaluation/mlflow/evaluator.py.
+
+Only successful scores are stored.  EVAL_JUDGE_CACHE=false bypasses the cache;
+delete EVAL_JUDGE_CACHE_PATH to start over.
+
+Usage:
+    from evaluation.judge_cache import CachedMetric, get_judge_cache
+
+    metric = CachedMetric(Faithfulness(llm=llm), "faithfulness", model="gpt-4o-mini")
+    score = await metric.ascore(user_input=..., response=..., retrieved_contexts=[...])
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+
+from app.config import EVAL_JUDGE_CACHE, EVAL_JUDGE_CACHE_PATH
+
+
+def cache_key(metric: str, model: str, inputs: dict[str, Any]) -> str:
+    payload = json.dumps(
+        {"metric": metric, "model": model, "inputs": inputs},
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class JudgeCache:
+    """SQLite store of ``key → JSON result``, safe to share between threads."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS judge_results ("
+            " key TEXT PRIMARY KEY, metric TEXT, model TEXT, result TEXT, created_at REAL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM judge_results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, key: str, metric: str, model: str, result: dict) -> None:
+        # Committed per result, so an interrupted run keeps what it already paid for.
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO judge_results VALUES (?, ?, ?, ?, ?)",
+                (key, metric, model, json.dumps(result, default=str), time.time()),
+            )
+            self._conn.commit()
+
+    def summary(self) -> str:
+        return f"judge cache: {self.hits} hits, {self.misses} misses ({self.path})"
+
+
+@lru_cache(maxsize=1)
+def get_judge_cache() -> JudgeCache | None:
+    """The process-wide cache, or None when EVAL_JUDGE_CACHE is off."""
+    return JudgeCache(EVAL_JUDGE_CACHE_PATH) if EVAL_JUDGE_CACHE else None
+
+
+@dataclass
+class CachedScore:
+    value: Any
+    reason: str | None = None
+
+
+class CachedMetric:
+    """RAGAS metric whose ``ascore`` results are cached per (name, model, inputs)."""
+
+    def __init__(self, metric, name: str, model: str, cache: JudgeCache | None = None):
+        self.metric = metric
+        self.name = name
+        self.model = model
+        self.cache = cache if cache is not None else get_judge_cache()
+
+    async def ascore(self, **inputs):
+        if self.cache is None:
+            return await self.metric.ascore(**inputs)
+
+        key = cache_key(self.name, self.model, inputs)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return CachedScore(**cached)
+
+        result = await self.metric.ascore(**inputs)
+        self.cache.put(key, self.name, self.model, {
+            "value": result.value,
+            "reason": getattr(result, "reason", None),
+        })
+        return result
+
+
+def cached_scorer(inner, model: str, cache: JudgeCache | None = None):
+    """Wrap an MLflow scorer so its Feedback is cached per (name, model, inputs).
+
+    The key covers inputs, outputs and expectations, not the trace — the
+    predict function returns the retrieved contexts in its outputs, so they
+    are part of the key.
+    """
+    from mlflow.entities import AssessmentSource, Feedback
+    from mlflow.genai import scorer
+
+    cache = cache if cache is not None else get_judge_cache()
+    if cache is None:
+        return inner
+
+    @scorer(name=inner.name)
+    def cached(inputs=None, outputs=None, expectations=None, trace=None):
+        key = cache_key(inner.name, model, {
+            "inputs": inputs, "outputs": outputs, "expectations": expectations,
+        })
+        stored = cache.get(key)
+        if stored is not None:
+            source = AssessmentSource(**stored.pop("source"))
+            return Feedback(name=inner.name, source=source, **stored)
+
+        feedback = inner.run(inputs=inputs, outputs=outputs, expectations=expectations, trace=trace)
+        if isinstance(feedback, Feedback) and feedback.error is None:
+            cache.put(key, inner.name, model, {
+                "value": feedback.value,
+                "rationale": feedback.rationale,
+                "metadata": feedback.metadata,
+                "source": {"source_type": feedback.source.source_type,
+                           "source_id": feedback.source.source_id},
+            })
+        return feedback
+
+    return cached
@@ -23,6 +23,7 @@ from mlflow.genai.scorers.ragas import Faithfulness
 from app.config import LLM_MODEL, LLM_BASE_URL
 from app.factory import get_judge_model_uri
 from app.graph import graph
+from evaluation.judge_cache import cached_scorer
 
 # Use different env variable when using a different LLM provider
 mlflow.set_experiment("RAG Agent Evaluation 4")
@@ -62,10 +63,16 @@ def qa_predict_fn(question: str) -> dict[str, Any]:
 
 
 # Evaluation dataset
-_dataset_path = os.path.join(os.path.dirname(__file__), "eval_dataset.json")
+_dataset_path = os.path.join(os.path.dirname(__file__), "..", "eval_dataset.json")
 def load_eval_dataset(num_eval_questions: int | None = None):
     with open(_dataset_path) as f:
-        dataset = json.load(f)
+        # Only inputs / expectations go to MLflow; `relevant_sources` labels are
+        # for benchmarks/retrieval_ir.py (MLflow RAGAS scorers would fold them
+        # into the reference answer).
+        dataset = [
+            {key: item[key] for key in ("inputs", "expectations") if key in item}
+            for item in json.load(f)
+        ]
 
     if num_eval_questions is None:
         return dataset
@@ -84,7 +91,8 @@ def is_concise(outputs: Any) -> bool:
 
 scorers = [
     # Correctness(model=get_judge_model_uri()),
-    Faithfulness(model=get_judge_model_uri()),
+    # Judge results are cached per (scorer, judge model, inputs/outputs)
+    cached_scorer(Faithfulness(model=get_judge_model_uri()), get_judge_model_uri()),
     # ContextPrecision(model="openai:/gpt-4"),
     # Guidelines(name="is_english", guidelines="The answer must be in English"),
     # is_concise,
@@ -17,8 +17,14 @@ from app.config import (
     LLM_MODEL, LLM_PROVIDER, 
     EMBEDDING_MODEL, EMBEDDING_PROVIDER,
     JUDGE_PROVIDER, JUDGE_EMBEDDING_PROVIDER,
+    EVAL_RAG_CONCURRENCY, EVAL_JUDGE_CONCURRENCY, EVAL_JUDGE_RPS,
 )
-from evaluation.ragas.ragas_factory import get_ragas_judge_llm, get_ragas_judge_embeddings
+from evaluation.ragas.ragas_factory import (
+    get_ragas_judge_llm, get_ragas_judge_embeddings,
+    judge_llm_model, judge_embedding_model,
+)
+from evaluation.judge_cache import CachedMetric, get_judge_cache
+from evaluation.ragas.runner import run_rag_all, score_all
 
 
 EVAL_DATASET_PATH = os.path.abspath(
@@ -90,16 +96,16 @@ print(f"Using {JUDGE_PROVIDER} judge LLM for evaluation")
 print(f"Using {JUDGE_EMBEDDING_PROVIDER} judge embeddings for evaluation")
 print(f"Loaded {len(eval_dataset)} evaluation questions")
 print("Tip: set MAX_Q to limit questions, e.g. MAX_Q=3")
-print("\nRunning RAG on evaluation questions...")
+print(f"\nRunning RAG on evaluation questions ({EVAL_RAG_CONCURRENCY} at a time)...")
+
+# Build samples by running RAG for each question (concurrently; results in dataset order)
+rag_results = asyncio.run(run_rag_all(run_rag, [item["user_input"] for item in eval_dataset]))
 
-# Build samples by running RAG for each question
 samples = []
-for item in eval_dataset:
+for item, result in zip(eval_dataset, rag_results):
     question = item["user_input"]
     reference = item["reference"]
     
-    result = run_rag(question)
-    
     print(f"  Q: {question}")
     print(f"  A: {result['response']}")
     print(f"  Retrieved {len(result['retrieved_contexts'])} contexts\n")
@@ -119,63 +125,42 @@ ragas_dataset = EvaluationDataset(samples=samples)
 llm = get_ragas_judge_llm()
 embeddings = get_ragas_judge_embeddings()
 
-# Initialize metrics
-faithfulness_metric = Faithfulness(llm=llm)
-answer_relevance_metric = AnswerRelevancy(llm=llm, embeddings=embeddings)
-context_precision_metric = ContextPrecision(llm=llm)
-context_recall_metric = ContextRecall(llm=llm)
-factual_correctness_metric = FactualCorrectness(llm=llm)
-
-print("Running RAGAS evaluation...")
-
-# Evaluate each sample using the collections API
-async def evaluate_samples():
-    results = []
-    for sample in samples:
-        # Score each metric for this sample
-        faithfulness_score = await faithfulness_metric.ascore(
-            user_input=sample.user_input,
-            response=sample.response,
-            retrieved_contexts=sample.retrieved_contexts,
-        )
-
-        answer_relevance_score = await answer_relevance_metric.ascore(
-            user_input=sample.user_input,
-            response=sample.response,
-        )
-
-        context_precision_score = await context_precision_metric.ascore(
-            user_input=sample.user_input,
-            reference=sample.reference,
-            retrieved_contexts=sample.retrieved_contexts,
-        )
-        
-        context_recall_score = await context_recall_metric.ascore(
-            user_input=sample.user_input,
-            reference=sample.reference,
-            retrieved_contexts=sample.retrieved_contexts,
-        )
-
-        factual_correctness_score = await factual_correctness_metric.ascore(
-            response=sample.response,
-            reference=sample.reference,
-        )
-        
-        results.append({
-            "user_input": sample.user_input,
-            "response": sample.response,
-            "reference": sample.reference,
-            "faithfulness": faithfulness_score.value,
-            "context_precision": context_precision_score.value,
-            "context_recall": context_recall_score.value,
-            "answer_relevance": answer_relevance_score.value,
-            "factual_correctness": factual_correctness_score.value,
-        })
-    
-    return results
-
-# Run async evaluation
-results = asyncio.run(evaluate_samples())
+# Initialize metrics; results are cached per (metric, judge model, inputs)
+judge_model = judge_llm_model()
+judge_with_embeddings = f"{judge_model}+{judge_embedding_model()}"
+faithfulness_metric = CachedMetric(Faithfulness(llm=llm), "faithfulness", judge_model)
+answer_relevance_metric = CachedMetric(
+    AnswerRelevancy(llm=llm, embeddings=embeddings), "answer_relevance", judge_with_embeddings
+)
+context_precision_metric = CachedMetric(ContextPrecision(llm=llm), "context_precision", judge_model)
+context_recall_metric = CachedMetric(ContextRecall(llm=llm), "context_recall", judge_model)
+factual_correctness_metric = CachedMetric(FactualCorrectness(llm=llm), "factual_correctness", judge_model)
+
+print(f"Running RAGAS evaluation ({EVAL_JUDGE_CONCURRENCY} judge calls at a time"
+      + (f", max {EVAL_JUDGE_RPS:g}/s" if EVAL_JUDGE_RPS > 0 else "") + ")...")
+
+# Output column → (metric, sample fields passed to `ascore`)
+METRICS = {
+    "faithfulness": (faithfulness_metric, ("user_input", "response", "retrieved_contexts")),
+    "context_precision": (context_precision_metric, ("user_input", "reference", "retrieved_contexts")),
+    "context_recall": (context_recall_metric, ("user_input", "reference", "retrieved_contexts")),
+    "answer_relevance": (answer_relevance_metric, ("user_input", "response")),
+    "factual_correctness": (factual_correctness_metric, ("response", "reference")),
+}
+
+# Score every metric for every sample concurrently
+scores = asyncio.run(score_all(samples, METRICS))
+if get_judge_cache() is not None:
+    print(get_judge_cache().summary())
+results = [
+    {
+        "user_input": sample.user_input,
+        "response": sample.response,
+        "reference": sample.reference,
+        **row,
+    }
+    for sample, row in zip(samples, scores)
+]
 score_df = pd.DataFrame(results)
 print("\n=== Per-sample Scores ===")
 print(score_df[["user_input", "faithfulness", "context_precision", "context_recall", "answer_relevance", "factual_correctness"]].to_string(index=False))
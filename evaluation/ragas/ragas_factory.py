@@ -7,10 +7,11 @@ It supports independent configuration of judge LLM and judge embeddings provider
 allowing flexible mixing (e.g., Ollama LLM + OpenAI embeddings).
 
 Usage:
-    from evaluation.ragas.ragas_factory import get_ragas_judge_llm, get_ragas_judge_embeddings
+    from evaluation.ragas.ragas_factory import get_ragas_judge_llm, get_ragas_judge_embeddings, judge_llm_model
     
     llm = get_ragas_judge_llm()
     embeddings = get_ragas_judge_embeddings()
+    model = judge_llm_model()  # resolved model name, e.g. for cache keys
 """
 
 from __future__ import annotations
@@ -132,7 +133,7 @@ def get_async_judge_embeddings_client() -> AsyncOpenAI:
     raise ValueError(f"Unsupported JUDGE_EMBEDDING_PROVIDER: {JUDGE_EMBEDDING_PROVIDER!r}")
 
 
-def _resolve_judge_llm_model() -> str:
+def judge_llm_model() -> str:
     """Resolve the judge LLM model name with provider-specific defaults."""
     provider = JUDGE_PROVIDER.lower()
     model = (JUDGE_LLM_MODEL or "").strip()
@@ -150,7 +151,7 @@ def _resolve_judge_llm_model() -> str:
     return defaults.get(provider, "gpt-4o-mini")
 
 
-def _resolve_judge_embedding_model() -> str:
+def judge_embedding_model() -> str:
     """Resolve the judge embedding model name with provider-specific defaults."""
     provider = JUDGE_EMBEDDING_PROVIDER.lower()
     model = (JUDGE_EMBEDDING_MODEL or "").strip()
@@ -180,7 +181,7 @@ def get_ragas_judge_llm():
         >>> faithfulness = Faithfulness(llm=llm)
     """
     client = get_async_judge_llm_client()
-    model = _resolve_judge_llm_model()
+    model = judge_llm_model()
     
     # Ragas llm_factory expects model as first positional arg, provider as keyword
     # All providers use OpenAI-compatible endpoints (Ollama and Gemini via compatibility layer)
@@ -200,7 +201,7 @@ def get_ragas_judge_embeddings():
         >>> answer_relevancy = AnswerRelevancy(llm=llm, embeddings=embeddings)
     """
     client = get_async_judge_embeddings_client()
-    model = _resolve_judge_embedding_model()
+    model = judge_embedding_model()
     
     # Use OpenAIEmbeddings directly (works with OpenAI-compatible endpoints)
     return OpenAIEmbeddings(client=client, model=model)
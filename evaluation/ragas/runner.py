@@ -0,0 +1,105 @@
+# evaluation/ragas/runner.py
+"""
+Concurrent execution for the RAGAS evaluation.
+
+Run serially, an eval costs (questions × RAG latency) + (questions × metrics ×
+judge latency).  This module runs both phases concurrently instead:
+
+  • RAG calls — the graph is synchronous, so each question runs in a worker
+    thread; at most EVAL_RAG_CONCURRENCY are in flight.
+  • Judge calls — every (sample, metric) pair is one `ascore` coroutine; all
+    of them are gathered, at most EVAL_JUDGE_CONCURRENCY in flight, and with
+    EVAL_JUDGE_RPS > 0 their starts are spaced to respect provider rate limits.
+
+Results always come back in input order, so the output tables are the same
+as a serial run's.
+
+Usage:
+    from evaluation.ragas.runner import run_rag_all, score_all
+
+    results = asyncio.run(run_rag_all(run_rag, questions))
+    rows = asyncio.run(score_all(samples, {"faithfulness": (metric, ("user_input", "response", ...))}))
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+from app.config import EVAL_JUDGE_CONCURRENCY, EVAL_JUDGE_RPS, EVAL_RAG_CONCURRENCY
+
+
+class AsyncRateLimiter:
+    """Space call starts at least ``1 / rate_per_s`` seconds apart (``rate_per_s <= 0`` disables)."""
+
+    def __init__(self, rate_per_s: float):
+        self.interval = 1.0 / rate_per_s if rate_per_s > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+async def gather_bounded(
+    calls: list[Callable[[], Awaitable]],
+    concurrency: int,
+    limiter: AsyncRateLimiter | None = None,
+) -> list:
+    """Await every call with at most *concurrency* in flight; results in input order."""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def bounded(call):
+        async with semaphore:
+            if limiter is not None:
+                await limiter.wait()
+            return await call()
+
+    return await asyncio.gather(*(bounded(call) for call in calls))
+
+
+async def run_rag_all(
+    run_rag: Callable[[str], dict],
+    questions: list[str],
+    concurrency: int = EVAL_RAG_CONCURRENCY,
+) -> list[dict]:
+    """Run the synchronous *run_rag* for every question in worker threads."""
+    return await gather_bounded(
+        [lambda q=q: asyncio.to_thread(run_rag, q) for q in questions], concurrency
+    )
+
+
+async def score_all(
+    samples: list,
+    metrics: dict[str, tuple[object, tuple[str, ...]]],
+    concurrency: int = EVAL_JUDGE_CONCURRENCY,
+    rate_per_s: float = EVAL_JUDGE_RPS,
+) -> list[dict[str, float]]:
+    """Score every metric on every sample concurrently.
+
+    *metrics* maps an output column to ``(metric, sample fields passed to ascore)``.
+    Returns one ``{column: value}`` dict per sample, in sample order.
+    """
+    limiter = AsyncRateLimiter(rate_per_s)
+    pairs = [(sample, column) for sample in samples for column in metrics]
+
+    def call(sample, column):
+        metric, fields = metrics[column]
+        return metric.ascore(**{field: getattr(sample, field) for field in fields})
+
+    scores = await gather_bounded(
+        [lambda s=sample, c=column: call(s, c) for sample, column in pairs], concurrency, limiter
+    )
+
+    rows: list[dict[str, float]] = [{} for _ in samples]
+    for i, ((_, column), score) in enumerate(zip(pairs, scores)):
+        rows[i // len(metrics)][column] = score.value
+    return rows
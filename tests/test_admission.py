@@ -0,0 +1,108 @@
+import contextvars
+import threading
+import time
+
+import pytest
+
+from app.admission import AdmissionController, Overloaded
+
+
+def _controller(**kwargs) -> AdmissionController:
+    settings = dict(
+        enabled=True, max_concurrency=2, max_queue=4, shed_queue=2,
+        queue_timeout_s=5, default_priority=1,
+    )
+    settings.update(kwargs)
+    return AdmissionController(**settings)
+
+
+def test_single_requests_fill_slots_then_queue():
+    adm = _controller()
+    reservations = [adm.admit(0) for _ in range(6)]  # 2 slots + 4 queued
+    assert adm._depth() == 4
+    with pytest.raises(Overloaded) as exc:
+        adm.admit(0)
+    assert exc.value.status_code == 503
+    for reservation in reservations:
+        adm.release(reservation)
+    assert adm.stats()["reserved"] == 0
+
+
+def test_unprioritised_requests_are_shed_first():
+    adm = _controller()
+    held = [adm.admit(0) for _ in range(4)]  # depth 2 == shed_queue
+    with pytest.raises(Overloaded) as exc:
+        adm.admit(1)
+    assert exc.value.status_code == 429
+    assert exc.value.retry_after >= 1
+    assert adm.admit(0) is not None  # prioritised callers still get in
+    for reservation in held:
+        adm.release(reservation)
+
+
+def test_batch_larger_than_queue_is_rejected_without_a_cap():
+    adm = _controller()
+    with pytest.raises(Overloaded):
+        adm.admit(0, count=64)
+    assert adm.stats()["reserved"] == 0
+
+
+def test_full_size_batch_stays_within_queue_bounds():
+    adm = _controller()
+    batch_concurrency = 4
+    peak = {"depth": 0, "waiting": 0}
+    lock = threading.Lock()
+    gate = threading.Semaphore(batch_concurrency)
+
+    errors = []
+
+    def item():
+        try:
+            with gate, adm.slot(0):
+                with lock, adm._cond:
+                    peak["depth"] = max(peak["depth"], adm._depth())
+                    peak["waiting"] = max(peak["waiting"], len(adm._waiting))
+                time.sleep(0.002)
+        except Exception as exc:
+            errors.append(exc)
+
+    with adm.admitted(0, count=64, places=batch_concurrency):
+        assert adm._depth() <= adm.max_queue
+        # The batch leaves room for other callers the whole time it runs.
+        single = adm.admit(0)
+        adm.release(single)
+        # Like asyncio.to_thread, carry the reservation into the worker threads.
+        threads = [threading.Thread(target=contextvars.copy_context().run, args=(item,)) for _ in range(64)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert errors == []
+    assert peak["depth"] <= adm.max_queue
+    assert peak["waiting"] <= adm.max_queue
+    stats = adm.stats()
+    assert stats["reserved"] == 0 and stats["in_flight"] == 0 and stats["queue_depth"] == 0
+
+
+def test_reservation_released_when_request_fails_before_generating():
+    adm = _controller()
+    with pytest.raises(ValueError):
+        with adm.admitted(0):
+            raise ValueError
+    assert adm.stats()["reserved"] == 0
+
+
+def test_unreserved_callers_are_bounded_in_slot():
+    adm = _controller(max_concurrency=1, max_queue=0)
+    with adm.slot(0):
+        with pytest.raises(Overloaded):
+            with adm.slot(0):
+                pass
+
+
+def test_disabled_controller_admits_everything():
+    adm = _controller(enabled=False)
+    assert adm.admit(5, count=1000) is None
+    with adm.slot(5):
+        pass
@@ -0,0 +1,47 @@
+from app.bm25 import BM25Index, tokenize
+
+
+def test_tokenize_keeps_identifiers_and_their_parts():
+    tokens = tokenize("How do I call mlflow.log_metric?")
+    assert "mlflow.log_metric" in tokens
+    assert {"mlflow", "log_metric", "log", "metric"} <= set(tokens)
+    assert "how" not in tokens and "do" not in tokens  # stopwords
+
+
+def test_tokenize_splits_camel_case():
+    tokens = tokenize("QuantumCircuit")
+    assert tokens[0] == "quantumcircuit"
+    assert {"quantum", "circuit"} <= set(tokens)
+
+
+def _index() -> BM25Index:
+    texts = [
+        "Use mlflow.log_metric to record a metric value.",
+        "QuantumCircuit builds a circuit; transpile maps it to hardware.",
+        "General notes about experiments and runs.",
+    ]
+    return BM25Index.build(["m", "q", "g"], texts)
+
+
+def test_search_ranks_exact_identifier_first():
+    index = _index()
+    hits = index.search("mlflow.log_metric", k=3)
+    assert hits[0][0] == 0
+    assert all(score > 0 for _, score in hits)
+    assert [score for _, score in hits] == sorted((score for _, score in hits), reverse=True)
+
+
+def test_search_returns_only_matching_documents():
+    index = _index()
+    assert [row for row, _ in index.search("transpile", k=10)] == [1]
+    assert index.search("nonexistent", k=5) == []
+
+
+def test_save_load_round_trip(tmp_path):
+    index = _index()
+    path = tmp_path / "bm25.json"
+    index.save(path)
+    loaded = BM25Index.load(path)
+    assert loaded.search("QuantumCircuit", k=2) == index.search("QuantumCircuit", k=2)
+    docs = loaded.search_documents("transpile", k=1)
+    assert docs[0].id == "q" and docs[0].metadata["bm25_score"] > 0
@@ -0,0 +1,65 @@
+import json
+
+import numpy as np
+
+from app.local_index import LocalVectorIndex, quantize_int8
+
+
+def _vectors(n: int = 50, dim: int = 16, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_quantize_int8_round_trip():
+    vectors = _vectors()
+    codes, scale = quantize_int8(vectors)
+    assert codes.dtype == np.int8 and scale.dtype == np.float32
+    assert np.abs(codes).max() <= 127
+    assert np.abs(codes * scale - vectors).max() <= scale.max() / 2 + 1e-6
+
+
+def test_quantize_int8_zero_column():
+    vectors = _vectors()
+    vectors[:, 3] = 0
+    codes, scale = quantize_int8(vectors)
+    assert scale[3] == 1.0 and not codes[:, 3].any()
+
+
+def _write(tmp_path, vectors: np.ndarray, int8: bool = True):
+    vectors_path, meta_path = tmp_path / "vectors_x.npy", tmp_path / "vectors_x.json"
+    np.save(vectors_path, vectors)
+    if int8:
+        codes, scale = quantize_int8(vectors)
+        np.save(tmp_path / "vectors_x.int8.npy", codes)
+        np.save(tmp_path / "vectors_x.int8_scale.npy", scale)
+    n = len(vectors)
+    meta_path.write_text(json.dumps({
+        "count": n, "dim": vectors.shape[1],
+        "ids": [f"c{i}" for i in range(n)], "texts": [f"t{i}" for i in range(n)],
+        "metadatas": [{} for _ in range(n)],
+    }))
+    return vectors_path, meta_path
+
+
+def test_exact_search_finds_the_vector_itself(tmp_path):
+    vectors = _vectors()
+    index = LocalVectorIndex.load(*_write(tmp_path, vectors), quantization="none")
+    hits = index.search(vectors[7], k=3)
+    assert hits[0][0] == 7 and abs(hits[0][1] - 1.0) < 1e-5
+    assert isinstance(index.vectors, np.memmap)  # scanned in place, not copied
+
+
+def test_int8_search_with_rescore_matches_exact(tmp_path):
+    vectors = _vectors()
+    paths = _write(tmp_path, vectors)
+    exact = LocalVectorIndex.load(*paths, quantization="none")
+    int8 = LocalVectorIndex.load(*paths, quantization="int8", rescore_k=20)
+    query = vectors[11] + 0.05
+    assert [row for row, _ in int8.search(query, k=4)] == [row for row, _ in exact.search(query, k=4)]
+    assert int8.memory_bytes() < exact.memory_bytes()
+
+
+def test_missing_quantized_files_fall_back_to_float32(tmp_path):
+    index = LocalVectorIndex.load(*_write(tmp_path, _vectors(), int8=False), quantization="int8")
+    assert index.quantization == "none"
@@ -0,0 +1,34 @@
+import math
+
+from app.metrics import _number, counter, gauge, histogram, render
+
+
+def test_number_formatting():
+    assert _number(3) == "3"
+    assert _number(0.25) == "0.25"
+    assert _number(float("nan")) == "NaN"
+    assert _number(math.inf) == "+Inf"
+    assert _number(-math.inf) == "-Inf"
+
+
+def test_render_exposition_format():
+    requests = counter("test_render_requests_total", "Requests.", ["route"])
+    depth = gauge("test_render_depth", "Depth.")
+    latency = histogram("test_render_seconds", "Latency.", buckets=(0.1, 1.0))
+
+    requests.inc(route="/query")
+    requests.inc(route="/query")
+    depth.set(float("nan"))
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5.0)
+
+    text = render()
+    assert "# TYPE test_render_requests_total counter" in text
+    assert 'test_render_requests_total{route="/query"} 2' in text
+    assert "test_render_depth NaN" in text
+    assert 'test_render_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_render_seconds_bucket{le="1"} 2' in text
+    assert 'test_render_seconds_bucket{le="+Inf"} 3' in text
+    assert "test_render_seconds_count 3" in text
+    assert text.endswith("\n")
@@ -0,0 +1,26 @@
+import numpy as np
+
+from app.mmr import mmr_select
+
+QUERY = np.array([1.0, 0.0, 0.0])
+# 0 and 1 are near-duplicates close to the query; 2 is less relevant but different.
+CANDIDATES = np.array([[1.0, 0.05, 0.0], [1.0, 0.06, 0.0], [0.6, 0.0, 0.8]])
+
+
+def test_pure_relevance_matches_similarity_order():
+    assert mmr_select(QUERY, CANDIDATES, k=3, lambda_mult=1.0) == [0, 1, 2]
+
+
+def test_diversity_skips_near_duplicates():
+    assert mmr_select(QUERY, CANDIDATES, k=2, lambda_mult=0.5) == [0, 2]
+
+
+def test_per_source_cap():
+    picked = mmr_select(QUERY, CANDIDATES, k=3, lambda_mult=1.0, sources=["a", "a", "b"], per_source_cap=1)
+    assert picked == [0, 2]
+
+
+def test_edge_cases():
+    assert mmr_select(QUERY, np.zeros((0, 3)), k=3) == []
+    assert mmr_select(QUERY, CANDIDATES, k=0) == []
+    assert len(mmr_select(QUERY, CANDIDATES, k=10)) == 3
@@ -0,0 +1,80 @@
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from app import retriever as retriever_module
+from app.retriever import RAGRetriever, adaptive_cutoff, multi_query_fusion, reciprocal_rank_fusion
+
+
+def _doc(chunk_id: str, score: float | None = None, **metadata) -> Document:
+    if score is not None:
+        metadata["score"] = score
+    return Document(id=chunk_id, page_content=f"text {chunk_id}", metadata={"chunk_id": chunk_id, **metadata})
+
+
+def test_rrf_orders_by_fused_rank_and_keeps_vector_relevance():
+    vector = [_doc("a", 0.9), _doc("b", 0.5)]
+    keyword = [_doc("c", bm25_score=3.0), _doc("b", bm25_score=2.0)]
+
+    fused = reciprocal_rank_fusion([vector, keyword], k=60)
+
+    assert [d.id for d in fused] == ["b", "a", "c"]
+    by_id = {d.id: d.metadata for d in fused}
+    assert by_id["b"]["rrf_score"] == 1 / 62 + 1 / 62
+    assert by_id["a"]["score"] == 0.9 and by_id["b"]["score"] == 0.5
+    assert "score" not in by_id["c"]  # keyword-only hit: no vector relevance
+    assert by_id["c"]["bm25_score"] == 3.0
+
+
+def test_rrf_keeps_best_relevance_across_copies_including_negative():
+    fused = reciprocal_rank_fusion([[_doc("a", -0.2)], [_doc("a", -0.1)], [_doc("b", -0.5)]])
+    by_id = {d.id: d.metadata["score"] for d in fused}
+    assert by_id == {"a": -0.1, "b": -0.5}
+
+
+def test_multi_query_fusion_keeps_depth_of_longest_list():
+    lists = [[_doc("a", 0.9), _doc("b", 0.8)], [_doc("c", 0.7), _doc("a", 0.6)]]
+    assert [d.id for d in multi_query_fusion(lists)] == ["a", "c"]
+    assert multi_query_fusion(lists[:1]) is lists[0]
+
+
+def test_adaptive_cutoff_stops_at_score_drop_off():
+    docs = [_doc("a", 0.9), _doc("b", 0.8), _doc("c", 0.3), _doc("d", 0.85)]
+    kept = adaptive_cutoff(docs, min_k=1, min_score_ratio=0.5, token_budget=10_000)
+    assert [d.id for d in kept] == ["a", "b"]
+
+
+def test_adaptive_cutoff_keeps_min_k_and_respects_token_budget():
+    docs = [_doc("a", 0.9), _doc("b", 0.1), _doc("c", 0.1)]
+    assert [d.id for d in adaptive_cutoff(docs, min_k=2, min_score_ratio=0.5, token_budget=10_000)] == ["a", "b"]
+    long = [Document(id=str(i), page_content="x" * 400, metadata={"score": 0.9}) for i in range(5)]
+    assert len(adaptive_cutoff(long, min_k=1, min_score_ratio=0.5, token_budget=250)) == 2
+
+
+def test_adaptive_cutoff_unscored_chunks_only_bounded_by_budget():
+    docs = [_doc("k"), _doc("a", 0.9), _doc("b", 0.2)]  # keyword-only hit ranked first
+    assert [d.id for d in adaptive_cutoff(docs, min_k=1, min_score_ratio=0.5, token_budget=10_000)] == ["k", "a"]
+    assert adaptive_cutoff([], min_k=1) == []
+
+
+def test_adaptive_mmr_sizes_selection_on_score_order(monkeypatch):
+    # A and B are near-duplicates with high relevance; C and D are diverse but weak.
+    candidates = [_doc("A", 0.9, source_file="a"), _doc("B", 0.85, source_file="b"),
+                  _doc("C", 0.3, source_file="c"), _doc("D", 0.29, source_file="d")]
+    vectors = np.array([[1, 0, 0], [0.99, 0.14, 0], [0, 0, 1], [0, 0.1, 0.99]], dtype=np.float32)
+    monkeypatch.setattr(retriever_module, "embed_queries",
+                        lambda store, queries: np.array([[1, 0, 0.2]] * len(queries), dtype=np.float32))
+    monkeypatch.setattr(retriever_module, "search_by_vectors",
+                        lambda *args, **kwargs: [(candidates, vectors)])
+
+    retriever = RAGRetriever(
+        vectorstore=InMemoryVectorStore(DeterministicFakeEmbedding(size=3)),
+        mode="mmr", adaptive=True, adaptive_max_k=4, adaptive_min_k=1,
+        adaptive_min_score_ratio=0.5, token_budget=10_000, mmr_lambda=0.5,
+    )
+    picked = retriever.retrieve_many(["q"])[0]
+
+    # Two candidates clear the drop-off, so MMR picks two — including the
+    # diverse C — instead of being cut at the first low-scoring pick.
+    assert [d.id for d in picked] == ["A", "C"]
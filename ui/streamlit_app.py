@@ -138,6 +138,13 @@ if prompt := st.chat_input("Ask a question about your documents…"):
             except requests.exceptions.ConnectionError:
                 answer = "⚠️ Could not connect to the API. Is the server running?"
                 sources = []
+            except requests.exceptions.HTTPError as e:
+                if e.response is not None and e.response.status_code in (429, 503):
+                    retry = e.response.headers.get("Retry-After", "a few")
+                    answer = f"⚠️ The server is busy. Please try again in {retry} seconds."
+                else:
+                    answer = f"⚠️ API error: {e}"
+                sources = []
             except Exception as e:
                 answer = f"⚠️ API error: {e}"
                 sources = []